@@ -0,0 +1,43 @@
+"""add category parents and closure table
+
+Revision ID: add_category_tree
+Revises: normalize_customer_phones
+Create Date: 2025-07-22 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_category_tree'
+down_revision: Union[str, None] = 'normalize_customer_phones'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('categories', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_categories_parent_id', 'categories', 'categories', ['parent_id'], ['id'])
+    op.create_index('ix_categories_parent_id', 'categories', ['parent_id'])
+
+    op.create_table(
+        'category_closure',
+        sa.Column('ancestor_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('descendant_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('depth', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_category_closure_descendant_id', 'category_closure', ['descendant_id'])
+
+    # Existing categories are all roots
+    op.execute("INSERT INTO category_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM categories")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_category_closure_descendant_id', table_name='category_closure')
+    op.drop_table('category_closure')
+    op.drop_index('ix_categories_parent_id', table_name='categories')
+    op.drop_constraint('fk_categories_parent_id', 'categories', type_='foreignkey')
+    op.drop_column('categories', 'parent_id')
@@ -0,0 +1,61 @@
+"""add customer_stats table for RFM metrics
+
+Revision ID: add_customer_stats
+Revises: add_sale_item_unit_cost
+Create Date: 2025-07-10 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_customer_stats'
+down_revision: Union[str, None] = 'add_sale_item_unit_cost'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('customer_stats',
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('first_purchase_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('last_purchase_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('purchase_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('order_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('sale_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('total_spent', sa.Numeric(14, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('customer_id')
+    )
+    op.create_index('ix_customer_stats_last_purchase_at', 'customer_stats', ['last_purchase_at'])
+    op.create_index('ix_customer_stats_purchase_count', 'customer_stats', ['purchase_count'])
+    op.create_index('ix_customer_stats_total_spent', 'customer_stats', ['total_spent'])
+
+    # Backfill from existing history (same query as app.db.customer_stats.rebuild_customer_stats)
+    op.execute("""
+    INSERT INTO customer_stats
+        (customer_id, first_purchase_at, last_purchase_at, purchase_count, order_count, sale_count, total_spent)
+    SELECT customer_id, MIN(purchased_at), MAX(purchased_at),
+           SUM(orders) + SUM(sales), SUM(orders), SUM(sales), SUM(amount)
+    FROM (
+        SELECT customer_id, order_time AS purchased_at, 1 AS orders, 0 AS sales, total AS amount
+        FROM orders
+        WHERE status IS DISTINCT FROM 'cancelled'
+        UNION ALL
+        SELECT customer_id, sale_time, 0, 1, total
+        FROM sales
+        WHERE customer_id IS NOT NULL
+    ) purchases
+    GROUP BY customer_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_customer_stats_total_spent', table_name='customer_stats')
+    op.drop_index('ix_customer_stats_purchase_count', table_name='customer_stats')
+    op.drop_index('ix_customer_stats_last_purchase_at', table_name='customer_stats')
+    op.drop_table('customer_stats')
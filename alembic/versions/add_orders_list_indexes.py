@@ -0,0 +1,31 @@
+"""add indexes for the paginated order list
+
+Revision ID: add_orders_list_indexes
+Revises: add_customer_stats
+Create Date: 2025-07-12 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_orders_list_indexes'
+down_revision: Union[str, None] = 'add_customer_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination walks (order_time, id) newest first; created on the
+    # partitioned parent, so every monthly partition gets its own copy
+    op.execute("CREATE INDEX ix_orders_order_time_id ON orders (order_time DESC, id DESC)")
+    op.execute("CREATE INDEX ix_orders_wilaya_order_time ON orders (wilaya, order_time DESC)")
+    op.execute("CREATE INDEX ix_orders_status_order_time ON orders (status, order_time DESC)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_orders_status_order_time")
+    op.execute("DROP INDEX IF EXISTS ix_orders_wilaya_order_time")
+    op.execute("DROP INDEX IF EXISTS ix_orders_order_time_id")
@@ -0,0 +1,126 @@
+"""add product_images table
+
+Revision ID: add_product_images_table
+Revises: add_category_tree
+Create Date: 2025-07-24 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+import hashlib
+import os
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_product_images_table'
+down_revision: Union[str, None] = 'add_category_tree'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IMAGES_DIR = os.path.join('static', 'images', 'products')
+SIZES_DIR = os.path.join('static', 'images', 'sizes')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+NUMBERED = re.compile(r'^product_(\d+)\.')
+
+
+def _file_info(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    width = height = None
+    try:
+        from PIL import Image
+        with Image.open(path) as image:
+            width, height = image.size
+    except Exception:
+        pass
+    return os.path.getsize(path), digest.hexdigest(), width, height
+
+
+def _existing_images(bind):
+    """Rows for the image files already on disk. Directories are either
+    ``product_<id>`` or a variant barcode."""
+    if not os.path.isdir(IMAGES_DIR):
+        return []
+    products = dict(bind.execute(sa.text("SELECT id, image_url FROM products")).fetchall())
+    barcodes = dict(bind.execute(sa.text("SELECT barcode, product_id FROM variants")).fetchall())
+
+    files = []
+    for directory in sorted(os.listdir(IMAGES_DIR)):
+        if directory.startswith('product_') and directory[len('product_'):].isdigit():
+            product_id, barcode = int(directory[len('product_'):]), None
+        else:
+            product_id, barcode = barcodes.get(directory), directory
+        if product_id not in products:
+            continue
+        path = os.path.join(IMAGES_DIR, directory)
+        for filename in sorted(os.listdir(path)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(os.path.join(path, filename)):
+                match = NUMBERED.match(filename)
+                files.append((product_id, barcode, directory, filename, int(match.group(1)) if match else None))
+
+    # Keep the upload numbers as positions; other files go after them
+    files.sort(key=lambda f: f[4] is None)
+    rows, positions, mains = [], {}, set()
+    for product_id, barcode, directory, filename, position in files:
+        taken = positions.setdefault(product_id, set())
+        if position is None or position in taken:
+            position = max(taken, default=0) + 1
+        taken.add(position)
+
+        url = f"/{IMAGES_DIR}/{directory}/{filename}".replace('\\', '/')
+        is_main = products[product_id] == url and product_id not in mains
+        if is_main:
+            mains.add(product_id)
+        byte_size, content_hash, width, height = _file_info(os.path.join(IMAGES_DIR, directory, filename))
+        large = os.path.join(SIZES_DIR, 'products', directory, f"{filename}.large.jpg")
+        rows.append({
+            'product_id': product_id, 'url': url, 'barcode': barcode, 'position': position,
+            'is_main': is_main, 'width': width, 'height': height, 'byte_size': byte_size,
+            'content_hash': content_hash, 'sizes_ready': os.path.exists(large),
+        })
+    return rows
+
+
+def upgrade() -> None:
+    product_images = op.create_table(
+        'product_images',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('barcode', sa.Text(), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('is_main', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('byte_size', sa.BigInteger(), nullable=False),
+        sa.Column('content_hash', sa.Text(), nullable=False),
+        sa.Column('sizes_ready', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('product_id', 'position', name='uq_product_images_position'),
+        # A file is recorded once for the product and once per barcode it was uploaded for
+        sa.UniqueConstraint('product_id', 'url', 'barcode', name='uq_product_images_url'),
+    )
+    op.create_index('ix_product_images_barcode', 'product_images', ['barcode'])
+    op.create_index('ix_product_images_content_hash', 'product_images', ['content_hash'])
+    op.create_index('uq_product_images_main', 'product_images', ['product_id'], unique=True,
+                    postgresql_where=sa.text('is_main'))
+    op.create_index('uq_product_images_product_url', 'product_images', ['product_id', 'url'], unique=True,
+                    postgresql_where=sa.text('barcode IS NULL'))
+
+    # Index the files already on disk, so listing never needs a directory scan
+    rows = _existing_images(op.get_bind())
+    if rows:
+        op.bulk_insert(product_images, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_product_images_product_url', table_name='product_images')
+    op.drop_index('uq_product_images_main', table_name='product_images')
+    op.drop_index('ix_product_images_content_hash', table_name='product_images')
+    op.drop_index('ix_product_images_barcode', table_name='product_images')
+    op.drop_table('product_images')
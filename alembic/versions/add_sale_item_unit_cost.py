@@ -0,0 +1,57 @@
+"""snapshot unit cost on sale_items and order_items
+
+Revision ID: add_sale_item_unit_cost
+Revises: add_sales_daily_rollups
+Create Date: 2025-07-05 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_sale_item_unit_cost'
+down_revision: Union[str, None] = 'add_sales_daily_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sale_items', sa.Column('unit_cost', sa.Numeric(10, 2), server_default=sa.text('0'), nullable=False))
+    op.add_column('order_items', sa.Column('unit_cost', sa.Numeric(10, 2), server_default=sa.text('0'), nullable=False))
+
+    # Best available history: the variants' current cost price
+    op.execute("""
+    UPDATE sale_items si SET unit_cost = COALESCE(v.cost_price, 0)
+    FROM variants v WHERE v.id = si.variant_id
+    """)
+    op.execute("""
+    UPDATE order_items oi SET unit_cost = COALESCE(v.cost_price, 0)
+    FROM variants v WHERE v.id = oi.variant_id
+    """)
+
+    # Recompute rollup costs from the snapshots
+    op.execute("""
+    UPDATE sales_daily_variant r SET cost = c.cost
+    FROM (
+        SELECT CAST(sale_time AS date) AS day, COALESCE(variant_id, 0) AS variant_id,
+               SUM(quantity * unit_cost) AS cost
+        FROM sale_items GROUP BY 1, 2
+    ) c
+    WHERE r.day = c.day AND r.variant_id = c.variant_id
+    """)
+    op.execute("""
+    UPDATE sales_daily_totals r SET cost = c.cost
+    FROM (
+        SELECT CAST(sale_time AS date) AS day, SUM(quantity * unit_cost) AS cost
+        FROM sale_items GROUP BY 1
+    ) c
+    WHERE r.day = c.day
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('order_items', 'unit_cost')
+    op.drop_column('sale_items', 'unit_cost')
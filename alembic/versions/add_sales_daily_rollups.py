@@ -0,0 +1,79 @@
+"""add daily sales rollup tables
+
+Revision ID: add_sales_daily_rollups
+Revises: partition_sales_orders_monthly
+Create Date: 2025-07-03 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_sales_daily_rollups'
+down_revision: Union[str, None] = 'partition_sales_orders_monthly'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily_variant',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('variant_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(14, 3), server_default=sa.text('0'), nullable=False),
+        sa.Column('revenue', sa.Numeric(14, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('cost', sa.Numeric(14, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('transactions', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'variant_id')
+    )
+    op.create_index('ix_sales_daily_variant_variant_id', 'sales_daily_variant', ['variant_id'])
+
+    op.create_table('sales_daily_totals',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('quantity', sa.Numeric(14, 3), server_default=sa.text('0'), nullable=False),
+        sa.Column('revenue', sa.Numeric(14, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('cost', sa.Numeric(14, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('transactions', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+    # Backfill from existing history (same queries as app.db.rollups.rebuild_rollups)
+    op.execute("""
+    INSERT INTO sales_daily_variant (day, variant_id, quantity, revenue, cost, transactions)
+    SELECT CAST(si.sale_time AS date),
+           COALESCE(si.variant_id, 0),
+           SUM(si.quantity),
+           SUM(si.quantity * si.price),
+           SUM(si.quantity * COALESCE(v.cost_price, 0)),
+           COUNT(DISTINCT si.sale_id)
+    FROM sale_items si
+    LEFT JOIN variants v ON v.id = si.variant_id
+    GROUP BY 1, 2
+    """)
+    op.execute("""
+    INSERT INTO sales_daily_totals (day, quantity, revenue, cost, transactions)
+    SELECT CAST(s.sale_time AS date),
+           COALESCE(SUM(items.quantity), 0),
+           COALESCE(SUM(items.revenue), 0),
+           COALESCE(SUM(items.cost), 0),
+           COUNT(*)
+    FROM sales s
+    LEFT JOIN (
+        SELECT si.sale_id, si.sale_time,
+               SUM(si.quantity) AS quantity,
+               SUM(si.quantity * si.price) AS revenue,
+               SUM(si.quantity * COALESCE(v.cost_price, 0)) AS cost
+        FROM sale_items si
+        LEFT JOIN variants v ON v.id = si.variant_id
+        GROUP BY si.sale_id, si.sale_time
+    ) items ON items.sale_id = s.id AND items.sale_time = s.sale_time
+    GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('sales_daily_totals')
+    op.drop_index('ix_sales_daily_variant_variant_id', table_name='sales_daily_variant')
+    op.drop_table('sales_daily_variant')
@@ -0,0 +1,53 @@
+"""add reserved and available quantities to variants
+
+Revision ID: add_stock_reservations
+Revises: add_orders_list_indexes
+Create Date: 2025-07-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_stock_reservations'
+down_revision: Union[str, None] = 'add_orders_list_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('variants', sa.Column('reserved_quantity', sa.Numeric(10, 3), nullable=False, server_default=sa.text('0')))
+
+    # Open orders used to take their items off the stock on hand when they
+    # were created. Put those quantities back on hand as reservations, which
+    # leaves what can be sold unchanged.
+    op.execute("""
+        UPDATE variants v
+        SET quantity = COALESCE(v.quantity, 0) + open_items.quantity,
+            reserved_quantity = open_items.quantity
+        FROM (
+            SELECT oi.variant_id, SUM(oi.quantity) AS quantity
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id AND o.order_time = oi.order_time
+            WHERE COALESCE(o.status, 'pending') IN ('pending', 'confirmed', 'processing')
+            GROUP BY oi.variant_id
+        ) open_items
+        WHERE v.id = open_items.variant_id
+    """)
+
+    op.create_check_constraint('ck_variants_reserved_quantity', 'variants', 'reserved_quantity >= 0')
+    op.add_column('variants', sa.Column(
+        'available_quantity', sa.Numeric(10, 3),
+        sa.Computed('COALESCE(quantity, 0) - reserved_quantity', persisted=True)
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('variants', 'available_quantity')
+    op.drop_constraint('ck_variants_reserved_quantity', 'variants', type_='check')
+    # Back to taking open orders off the stock on hand
+    op.execute("UPDATE variants SET quantity = quantity - reserved_quantity WHERE reserved_quantity <> 0")
+    op.drop_column('variants', 'reserved_quantity')
@@ -0,0 +1,45 @@
+"""normalize customer phone numbers
+
+Revision ID: normalize_customer_phones
+Revises: add_stock_reservations
+Create Date: 2025-07-21 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'normalize_customer_phones'
+down_revision: Union[str, None] = 'add_stock_reservations'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same rules as app.schemas.customer.normalize_phone
+NORMALIZED = r"regexp_replace(regexp_replace(phone_number, '[^0-9+]', '', 'g'), '^(\+|00)213', '0')"
+
+
+def upgrade() -> None:
+    # Orders upsert customers by normalized phone number, so existing numbers
+    # must be stored that way too. Numbers that would collide with another
+    # customer's are left alone; those customers need merging by hand.
+    op.execute(f"""
+        WITH normalized AS (
+            SELECT id, {NORMALIZED} AS phone,
+                   COUNT(*) OVER (PARTITION BY {NORMALIZED}) AS duplicates
+            FROM customers
+        )
+        UPDATE customers c
+        SET phone_number = n.phone
+        FROM normalized n
+        WHERE c.id = n.id
+          AND n.duplicates = 1
+          AND c.phone_number <> n.phone
+    """)
+
+
+def downgrade() -> None:
+    # The original formatting isn't kept; normalized numbers stay valid
+    pass
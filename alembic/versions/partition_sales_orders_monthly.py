@@ -0,0 +1,183 @@
+"""partition sales, sale_items, orders and order_items by month
+
+Revision ID: partition_sales_orders_monthly
+Revises: add_order_items_table_rev, add_product_images_rev
+Create Date: 2025-07-01 09:00:00.000000
+
+Converts the ever-growing transaction tables to Postgres declarative range
+partitioning on their timestamp. Child tables (sale_items, order_items) carry a
+copy of the parent's timestamp so they can be partitioned identically and keep a
+foreign key to the parent (a key on a partitioned table must include the
+partition column). Existing rows are copied into the new partitions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'partition_sales_orders_monthly'
+down_revision: Union[str, Sequence[str], None] = ('add_order_items_table_rev', 'add_product_images_rev')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    # Helper used here and by app.db.partitions to keep future months available
+    op.execute("""
+    CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent TEXT, from_month DATE, to_month DATE)
+    RETURNS INTEGER AS $$
+    DECLARE
+        month_start DATE := date_trunc('month', from_month)::date;
+        partition_name TEXT;
+        created INTEGER := 0;
+    BEGIN
+        WHILE month_start <= to_month LOOP
+            partition_name := format('%s_y%sm%s', parent, to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+            IF to_regclass(partition_name) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                               partition_name, parent, month_start, (month_start + INTERVAL '1 month')::date);
+                created := created + 1;
+            END IF;
+            month_start := (month_start + INTERVAL '1 month')::date;
+        END LOOP;
+        RETURN created;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # Rows without a timestamp can't be routed to a partition
+    op.execute("UPDATE sales SET sale_time = CURRENT_TIMESTAMP WHERE sale_time IS NULL")
+    op.execute("UPDATE orders SET order_time = CURRENT_TIMESTAMP WHERE order_time IS NULL")
+
+    # New partitioned parents with the same columns, defaults and checks
+    op.execute("""
+    CREATE TABLE sales_p (LIKE sales INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (sale_time);
+    ALTER TABLE sales_p ALTER COLUMN sale_time SET NOT NULL;
+    ALTER TABLE sales_p ADD CONSTRAINT sales_p_pkey PRIMARY KEY (id, sale_time);
+
+    CREATE TABLE sale_items_p (LIKE sale_items INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                               sale_time TIMESTAMP NOT NULL)
+        PARTITION BY RANGE (sale_time);
+    ALTER TABLE sale_items_p ADD CONSTRAINT sale_items_p_pkey PRIMARY KEY (id, sale_time);
+
+    CREATE TABLE orders_p (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (order_time);
+    ALTER TABLE orders_p ALTER COLUMN order_time SET NOT NULL;
+    ALTER TABLE orders_p ADD CONSTRAINT orders_p_pkey PRIMARY KEY (id, order_time);
+
+    CREATE TABLE order_items_p (LIKE order_items INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+                                order_time TIMESTAMP NOT NULL)
+        PARTITION BY RANGE (order_time);
+    ALTER TABLE order_items_p ADD CONSTRAINT order_items_p_pkey PRIMARY KEY (id, order_time);
+    """)
+
+    # Partitions covering all existing data plus a few months ahead
+    for parent, source, column in (
+        ("sales_p", "sales", "sale_time"),
+        ("sale_items_p", "sales", "sale_time"),
+        ("orders_p", "orders", "order_time"),
+        ("order_items_p", "orders", "order_time"),
+    ):
+        op.execute(f"""
+        SELECT ensure_monthly_partitions(
+            '{parent}',
+            LEAST(COALESCE((SELECT MIN({column}) FROM {source}), CURRENT_DATE), CURRENT_DATE)::date,
+            (CURRENT_DATE + INTERVAL '{MONTHS_AHEAD} months')::date
+        )
+        """)
+
+    # Copy existing data
+    op.execute("""
+    INSERT INTO sales_p SELECT * FROM sales;
+    INSERT INTO sale_items_p
+        SELECT si.*, COALESCE(s.sale_time, CURRENT_TIMESTAMP)
+        FROM sale_items si LEFT JOIN sales s ON s.id = si.sale_id;
+    INSERT INTO orders_p SELECT * FROM orders;
+    INSERT INTO order_items_p
+        SELECT oi.*, COALESCE(o.order_time, CURRENT_TIMESTAMP)
+        FROM order_items oi LEFT JOIN orders o ON o.id = oi.order_id;
+    """)
+
+    # Keep the id sequences alive when the old tables are dropped
+    for table in ("sales", "sale_items", "orders", "order_items"):
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"DROP TABLE {table} CASCADE")
+        op.execute(f"ALTER TABLE {table}_p RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_p_pkey TO {table}_pkey")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        # Partitions were created while the parent still had its temporary name
+        op.execute(f"""
+        DO $$
+        DECLARE part RECORD;
+        BEGIN
+            FOR part IN
+                SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = '{table}'::regclass AND c.relname LIKE '{table}\\_p\\_y%'
+            LOOP
+                EXECUTE format('ALTER TABLE %I RENAME TO %I', part.relname,
+                               '{table}' || substr(part.relname, length('{table}_p') + 1));
+            END LOOP;
+        END $$;
+        """)
+
+    # Foreign keys and indexes; keys into partitioned parents include the partition column
+    op.execute("""
+    ALTER TABLE sales ADD CONSTRAINT sales_customer_id_fkey
+        FOREIGN KEY (customer_id) REFERENCES customers(id);
+    ALTER TABLE sale_items ADD CONSTRAINT sale_items_sale_fkey
+        FOREIGN KEY (sale_id, sale_time) REFERENCES sales(id, sale_time) ON DELETE CASCADE ON UPDATE CASCADE;
+    ALTER TABLE sale_items ADD CONSTRAINT sale_items_variant_id_fkey
+        FOREIGN KEY (variant_id) REFERENCES variants(id) ON DELETE SET NULL;
+    ALTER TABLE orders ADD CONSTRAINT orders_customer_id_fkey
+        FOREIGN KEY (customer_id) REFERENCES customers(id);
+    ALTER TABLE order_items ADD CONSTRAINT order_items_order_fkey
+        FOREIGN KEY (order_id, order_time) REFERENCES orders(id, order_time) ON DELETE CASCADE ON UPDATE CASCADE;
+    ALTER TABLE order_items ADD CONSTRAINT order_items_variant_id_fkey
+        FOREIGN KEY (variant_id) REFERENCES variants(id);
+
+    CREATE INDEX ix_sales_customer_id ON sales (customer_id);
+    CREATE INDEX ix_sale_items_sale_id ON sale_items (sale_id);
+    CREATE INDEX ix_sale_items_variant_id ON sale_items (variant_id);
+    CREATE INDEX ix_orders_customer_id ON orders (customer_id);
+    CREATE INDEX ix_orders_status ON orders (status);
+    CREATE INDEX ix_order_items_order_id ON order_items (order_id);
+    CREATE INDEX ix_order_items_variant_id ON order_items (variant_id);
+    """)
+
+
+def downgrade() -> None:
+    for table in ("order_items", "orders", "sale_items", "sales"):
+        op.execute(f"CREATE TABLE {table}_flat (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        op.execute(f"INSERT INTO {table}_flat SELECT * FROM {table}")
+
+    op.execute("ALTER TABLE sale_items_flat DROP COLUMN sale_time")
+    op.execute("ALTER TABLE order_items_flat DROP COLUMN order_time")
+
+    for table in ("order_items", "orders", "sale_items", "sales"):
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"DROP TABLE {table} CASCADE")
+        op.execute(f"ALTER TABLE {table}_flat RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+    op.execute("""
+    ALTER TABLE sales ADD CONSTRAINT sales_customer_id_fkey
+        FOREIGN KEY (customer_id) REFERENCES customers(id);
+    ALTER TABLE sale_items ADD CONSTRAINT sale_items_sale_id_fkey
+        FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE;
+    ALTER TABLE sale_items ADD CONSTRAINT sale_items_variant_id_fkey
+        FOREIGN KEY (variant_id) REFERENCES variants(id) ON DELETE SET NULL;
+    ALTER TABLE orders ADD CONSTRAINT orders_customer_id_fkey
+        FOREIGN KEY (customer_id) REFERENCES customers(id);
+    ALTER TABLE order_items ADD CONSTRAINT order_items_order_id_fkey
+        FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE;
+    ALTER TABLE order_items ADD CONSTRAINT order_items_variant_id_fkey
+        FOREIGN KEY (variant_id) REFERENCES variants(id);
+    """)
+
+    op.execute("DROP FUNCTION IF EXISTS ensure_monthly_partitions(TEXT, DATE, DATE)")
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from app.db.session import SessionLocal
 from app.db import models
-from app.schemas.category import Category, CategoryCreate, CategoryUpdate
+from app.db import category_tree
+from app.core.cache import category_tree_cache
+from app.schemas.category import Category, CategoryCreate, CategoryNode, CategoryUpdate
 from typing import List
 
 router = APIRouter()
@@ -14,23 +17,77 @@ def get_db():
     finally:
         db.close()
 
+def _categories_with_counts(db: Session, *filters) -> List[models.Category]:
+    """Categories with ``products_count`` set, counted in one grouped query."""
+    rows = db.query(
+        models.Category,
+        func.count(models.Product.id)
+    ).outerjoin(
+        models.Product, models.Product.category_id == models.Category.id
+    ).filter(*filters).group_by(models.Category.id).order_by(models.Category.id).all()
+    for category, products_count in rows:
+        setattr(category, "products_count", products_count)
+    return [category for category, _ in rows]
+
+def _check_parent(db: Session, parent_id) -> None:
+    if parent_id is not None and not db.query(models.Category.id).filter(models.Category.id == parent_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Parent category with id {parent_id} not found"
+        )
+
 @router.get("/", response_model=List[Category])
 def list_categories(db: Session = Depends(get_db)):
     try:
-        categories = db.query(models.Category).all()
-        
-        # Calculate products_count for each category
-        for category in categories:
-            products_count = db.query(models.Product).filter(models.Product.category_id == category.id).count()
-            setattr(category, "products_count", products_count)
-        
-        return categories
+        return _categories_with_counts(db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving categories: {str(e)}"
         )
 
+def _build_tree(db: Session) -> List[CategoryNode]:
+    # Products below each category, subcategories included, via the closure table
+    closure = models.CategoryClosure
+    totals = dict(db.query(
+        closure.ancestor_id,
+        func.count(models.Product.id)
+    ).join(
+        models.Product, models.Product.category_id == closure.descendant_id
+    ).group_by(closure.ancestor_id).all())
+
+    nodes = {
+        category.id: CategoryNode(
+            id=category.id,
+            name=category.name,
+            description=category.description,
+            parent_id=category.parent_id,
+            products_count=category.products_count,
+            total_products_count=totals.get(category.id, 0),
+            children=[]
+        )
+        for category in _categories_with_counts(db)
+    }
+    roots = []
+    for node in sorted(nodes.values(), key=lambda node: node.name.lower()):
+        parent = nodes.get(node.parent_id)
+        (parent.children if parent is not None else roots).append(node)
+    return roots
+
+@router.get("/tree", response_model=List[CategoryNode])
+def get_category_tree(db: Session = Depends(get_db)):
+    """All categories nested under their parents, with product counts.
+
+    Cached until a category or product is written.
+    """
+    try:
+        return category_tree_cache.get_or_compute(("tree",), lambda: _build_tree(db))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving category tree: {str(e)}"
+        )
+
 @router.post("/", response_model=Category)
 def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     try:
@@ -44,9 +101,13 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
                 detail=f"Category with name '{category.name}' already exists"
             )
         
+        _check_parent(db, category.parent_id)
         db_category = models.Category(**category.model_dump())
         db.add(db_category)
+        db.flush()
+        category_tree.add_category(db, db_category.id, db_category.parent_id)
         db.commit()
+        category_tree_cache.invalidate()
         db.refresh(db_category)
         
         # Set products_count for new category (will be 0)
@@ -65,18 +126,13 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
 @router.get("/{category_id}", response_model=Category)
 def get_category(category_id: int, db: Session = Depends(get_db)):
     try:
-        category = db.query(models.Category).filter(models.Category.id == category_id).first()
-        if not category:
+        categories = _categories_with_counts(db, models.Category.id == category_id)
+        if not categories:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category with id {category_id} not found"
             )
-        
-        # Calculate products_count for this category
-        products_count = db.query(models.Product).filter(models.Product.category_id == category.id).count()
-        setattr(category, "products_count", products_count)
-        
-        return category
+        return categories[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -106,19 +162,28 @@ def update_category(category_id: int, category: CategoryUpdate, db: Session = De
                 detail=f"Category with name '{category.name}' already exists"
             )
         
-        for key, value in category.model_dump().items():
+        for key, value in category.model_dump(exclude={"parent_id"}).items():
             setattr(db_category, key, value)
         
-        db.commit()
-        db.refresh(db_category)
+        # Only re-parent when parent_id was sent
+        if "parent_id" in category.model_fields_set and category.parent_id != db_category.parent_id:
+            _check_parent(db, category.parent_id)
+            category_tree.move_category(db, category_id, category.parent_id)
+            db_category.parent_id = category.parent_id
         
-        # Calculate products_count for updated category
-        products_count = db.query(models.Product).filter(models.Product.category_id == db_category.id).count()
-        setattr(db_category, "products_count", products_count)
+        db.commit()
+        category_tree_cache.invalidate()
         
-        return db_category
+        # Reload with products_count
+        return _categories_with_counts(db, models.Category.id == category_id)[0]
     except HTTPException:
         raise
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -144,8 +209,16 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
                 detail=f"Cannot delete category: {products} products are associated with it"
             )
         
+        children = db.query(models.Category).filter(models.Category.parent_id == category_id).count()
+        if children > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot delete category: it has {children} subcategories"
+            )
+        
         db.delete(db_category)
         db.commit()
+        category_tree_cache.invalidate()
     except HTTPException:
         raise
     except Exception as e:
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select
 from app.db.session import SessionLocal
 from app.db import models
-from app.schemas.customer import CustomerCreate, Customer as CustomerOut, CustomerUpdate
-from typing import List
+from app.schemas.customer import (
+    CustomerCreate, Customer as CustomerOut, CustomerUpdate,
+    CustomerMetrics, CustomerMetricsPage, CustomerMetricsSort, CustomerSegment
+)
+from typing import List, Optional
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
@@ -26,6 +31,109 @@ def list_customers(db: Session = Depends(get_db)):
             detail=f"Error retrieving customers: {str(e)}"
         )
 
+def _metrics_subquery():
+    """customer_stats with RFM quintile scores and a segment, computed over all customers."""
+    stats = models.CustomerStats
+    r_score = func.ntile(5).over(order_by=stats.last_purchase_at.asc().nulls_first())
+    f_score = func.ntile(5).over(order_by=stats.purchase_count.asc())
+    m_score = func.ntile(5).over(order_by=stats.total_spent.asc())
+    scored = select(
+        stats,
+        r_score.label("r_score"),
+        f_score.label("f_score"),
+        m_score.label("m_score")
+    ).subquery("scored")
+
+    segment = case(
+        (scored.c.purchase_count <= 1, case(
+            (scored.c.r_score >= 4, CustomerSegment.NEW.value), else_=CustomerSegment.LOST.value
+        )),
+        ((scored.c.r_score >= 4) & (scored.c.f_score >= 4), CustomerSegment.CHAMPIONS.value),
+        ((scored.c.r_score <= 2) & (scored.c.f_score >= 3), CustomerSegment.AT_RISK.value),
+        (scored.c.f_score >= 4, CustomerSegment.LOYAL.value),
+        (scored.c.r_score <= 1, CustomerSegment.LOST.value),
+        else_=CustomerSegment.REGULAR.value
+    )
+    return select(scored, segment.label("segment")).subquery("metrics")
+
+@router.get("/metrics", response_model=CustomerMetricsPage)
+def get_customer_metrics(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    sort_by: CustomerMetricsSort = CustomerMetricsSort.MONETARY,
+    descending: bool = True,
+    segment: Optional[CustomerSegment] = None,
+    min_purchases: Optional[int] = Query(None, ge=0),
+    min_spent: Optional[float] = Query(None, ge=0),
+    active_within_days: Optional[int] = Query(None, ge=0, description="Last purchase within this many days"),
+    inactive_for_days: Optional[int] = Query(None, ge=0, description="No purchase for at least this many days"),
+    db: Session = Depends(get_db)
+):
+    """Recency, frequency and monetary metrics per customer, from the customer_stats table."""
+    try:
+        metrics = _metrics_subquery()
+        now = datetime.now()
+
+        filters = []
+        if segment is not None:
+            filters.append(metrics.c.segment == segment.value)
+        if min_purchases is not None:
+            filters.append(metrics.c.purchase_count >= min_purchases)
+        if min_spent is not None:
+            filters.append(metrics.c.total_spent >= min_spent)
+        if active_within_days is not None:
+            filters.append(metrics.c.last_purchase_at >= now - timedelta(days=active_within_days))
+        if inactive_for_days is not None:
+            filters.append(metrics.c.last_purchase_at < now - timedelta(days=inactive_for_days))
+
+        average_order_value = metrics.c.total_spent / func.nullif(metrics.c.purchase_count, 0)
+        sort_column = {
+            CustomerMetricsSort.RECENCY: metrics.c.last_purchase_at,
+            CustomerMetricsSort.FREQUENCY: metrics.c.purchase_count,
+            CustomerMetricsSort.MONETARY: metrics.c.total_spent,
+            CustomerMetricsSort.FIRST_PURCHASE: metrics.c.first_purchase_at,
+            CustomerMetricsSort.AVERAGE_ORDER_VALUE: average_order_value,
+        }[sort_by]
+        ordering = sort_column.desc().nulls_last() if descending else sort_column.asc().nulls_last()
+        tiebreak = metrics.c.customer_id.desc() if descending else metrics.c.customer_id.asc()
+
+        total = db.execute(select(func.count()).select_from(metrics).where(*filters)).scalar()
+        rows = db.execute(
+            select(metrics, models.Customer.name, models.Customer.phone_number)
+            .join(models.Customer, models.Customer.id == metrics.c.customer_id)
+            .where(*filters)
+            .order_by(ordering, tiebreak)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        ).all()
+
+        items = [
+            CustomerMetrics(
+                customer_id=row.customer_id,
+                name=row.name,
+                phone_number=row.phone_number,
+                first_purchase_at=row.first_purchase_at,
+                last_purchase_at=row.last_purchase_at,
+                recency_days=(now - row.last_purchase_at).days if row.last_purchase_at else None,
+                purchase_count=row.purchase_count,
+                order_count=row.order_count,
+                sale_count=row.sale_count,
+                total_spent=float(row.total_spent),
+                average_order_value=round(float(row.total_spent) / row.purchase_count, 2) if row.purchase_count else 0.0,
+                r_score=row.r_score,
+                f_score=row.f_score,
+                m_score=row.m_score,
+                segment=row.segment
+            )
+            for row in rows
+        ]
+        return CustomerMetricsPage(total=total, page=page, page_size=page_size, items=items)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving customer metrics: {str(e)}"
+        )
+
 @router.get("/{customer_id}", response_model=CustomerOut)
 def get_customer(customer_id: int, db: Session = Depends(get_db)):
     """Get a customer by ID."""
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+
+router = APIRouter()
+
+HEARTBEAT_INTERVAL = 15  # seconds
+
+
+def _format_event(event: dict) -> str:
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+@router.get("/stream")
+async def stream_events(request: Request):
+    """Server-sent events for sales, orders and stock changes.
+
+    Event types: ``sale.created``, ``order.created``, ``order.status_changed``,
+    ``variant.stock_changed`` and ``resync`` (events may have been missed;
+    reload everything). A comment line is sent every 15 seconds as a heartbeat.
+    """
+    broker = request.app.state.event_broker
+    queue = broker.subscribe()
+
+    async def event_generator():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _format_event(event)
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/status")
+async def events_status(request: Request):
+    broker = request.app.state.event_broker
+    return {"listening": broker.connected, "subscribers": broker.subscriber_count}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
-from typing import List
-from datetime import datetime, date
+from sqlalchemy import extract, func, select
+from typing import List, Optional
+from datetime import datetime, date, timedelta
+from decimal import Decimal
 from ..db.session import get_db
 from ..db.models import Expense
+from ..db import spreadsheets
 from ..schemas.expense import ExpenseCreate, ExpenseUpdate, Expense as ExpenseSchema
 from ..api.auth import get_current_admin_user
 
@@ -79,6 +82,49 @@ def get_expenses_by_date_range(
             detail=f"Error filtering expenses: {str(e)}"
         )
 
+EXPENSE_EXPORT_COLUMNS = [
+    ("ID", 8), ("Date", 18), ("Category", 18), ("Amount", 14), ("Description", 40), ("Payment Method", 16),
+]
+
+@router.get("/export.xlsx")
+def export_expenses_xlsx(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Expenses between two dates (inclusive) as an Excel file with a total row.
+
+    Rows are streamed from a server-side cursor into a write-only workbook.
+    """
+    try:
+        spreadsheets.require_openpyxl()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    filters = []
+    if start_date:
+        filters.append(Expense.expense_date >= start_date)
+    if end_date:
+        filters.append(Expense.expense_date < end_date + timedelta(days=1))
+    if category:
+        filters.append(Expense.category == category)
+    statement = select(
+        Expense.id,
+        Expense.expense_date,
+        Expense.category,
+        Expense.amount,
+        Expense.description,
+        Expense.payment_method
+    ).where(*filters).order_by(Expense.expense_date.desc(), Expense.id.desc())
+
+    filename = f"expenses_{start_date or 'begin'}_{end_date or 'now'}.xlsx"
+    return StreamingResponse(
+        spreadsheets.iter_xlsx(statement, "Expenses", EXPENSE_EXPORT_COLUMNS, header_color="C0392B", total_columns=(3,)),
+        media_type=spreadsheets.XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{expense_id}", response_model=ExpenseSchema)
 def get_expense(
     expense_id: int,
@@ -155,27 +201,20 @@ def get_expense_summary(
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
     
-    # Get all expenses for the month
-    expenses = db.query(Expense).filter(
-        extract('year', Expense.expense_date) == year,
-        extract('month', Expense.expense_date) == month
-    ).all()
-    
-    # Calculate totals by category
-    categories = {}
-    total_amount = 0
-    
-    for expense in expenses:
-        category = expense.category
-        if category not in categories:
-            categories[category] = 0
-        
-        categories[category] += expense.amount
-        total_amount += expense.amount
+    # Totals by category in one grouped query
+    month_start = datetime(year, month, 1)
+    next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    rows = db.query(
+        Expense.category,
+        func.sum(Expense.amount).label("amount")
+    ).filter(
+        Expense.expense_date >= month_start,
+        Expense.expense_date < next_month
+    ).group_by(Expense.category).order_by(func.sum(Expense.amount).desc()).all()
     
     return {
         "year": year,
         "month": month,
-        "total": total_amount,
-        "categories": [{"name": k, "amount": v} for k, v in categories.items()]
-    }
\ No newline at end of file
+        "total": sum((row.amount for row in rows), Decimal("0")),
+        "categories": [{"name": row.category, "amount": row.amount} for row in rows]
+    }
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.db.session import SessionLocal
+from app.db import export
+from app.schemas.export import ExportDataset
+from datetime import date
+from typing import Optional
+
+router = APIRouter()
+
+
+class _ChunkSink:
+    """Write-only file object that collects what pyarrow writes so it can be streamed."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _stream_export(dataset: ExportDataset, start: Optional[date], end: Optional[date], file_format: str):
+    pa = export.require_pyarrow()
+    import pyarrow.parquet as pq
+
+    # The response outlives the request's dependencies, so use a dedicated session
+    db = SessionLocal()
+    sink = _ChunkSink()
+    try:
+        schema = export.arrow_schema(dataset.value)
+        if file_format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression=export.DEFAULT_COMPRESSION)
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+        # One Parquet row group / IPC message per batch, sent as soon as it is encoded
+        for batch in export.iter_record_batches(db, dataset.value, start, end):
+            writer.write_batch(batch)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
+
+
+def _export_response(dataset: ExportDataset, start: Optional[date], end: Optional[date], file_format: str):
+    try:
+        export.require_pyarrow()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    if start and end and start > end:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="start must be before end")
+
+    suffix = f"_{start or 'begin'}_{end or 'now'}" if dataset != ExportDataset.inventory else ""
+    filename = f"{dataset.value}{suffix}.{file_format}"
+    media_type = "application/vnd.apache.parquet" if file_format == "parquet" else "application/vnd.apache.arrow.stream"
+    return StreamingResponse(
+        _stream_export(dataset, start, end, file_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/{dataset}.parquet")
+def export_parquet(dataset: ExportDataset, start: Optional[date] = None, end: Optional[date] = None):
+    """Stream a dataset as one zstd-compressed Parquet file (``end`` is inclusive).
+
+    For month-partitioned files use ``python -m app.db.export``.
+    """
+    return _export_response(dataset, start, end, "parquet")
+
+
+@router.get("/{dataset}.arrow")
+def export_arrow(dataset: ExportDataset, start: Optional[date] = None, end: Optional[date] = None):
+    """Stream a dataset in the Arrow IPC streaming format (``end`` is inclusive)."""
+    return _export_response(dataset, start, end, "arrow")
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.db import invoices
+from app.core import jobs, pdf
+from app.api.auth import get_current_admin_user
+from app.schemas.invoice import InvoiceJob, InvoiceJobStatus, MonthlyInvoiceRequest
+import os
+
+router = APIRouter()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _job_out(job: jobs.Job) -> InvoiceJob:
+    year, month = job.key
+    return InvoiceJob(
+        id=job.id,
+        year=year,
+        month=month,
+        status=InvoiceJobStatus(job.status),
+        error=job.error,
+        download_url=f"/invoices/jobs/{job.id}/download" if job.status == jobs.DONE else None
+    )
+
+@router.post("/monthly", response_model=InvoiceJob, status_code=status.HTTP_202_ACCEPTED)
+def request_monthly_invoice(
+    invoice: MonthlyInvoiceRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Start rendering a month's invoice PDF in a worker process.
+
+    If the month's orders haven't changed since it was last rendered, the
+    job is done immediately. Poll ``GET /invoices/jobs/{id}`` until the status
+    is ``done``, then fetch ``download_url``.
+    """
+    try:
+        pdf.require_reportlab()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    queue: jobs.JobQueue = request.app.state.job_queue
+    key = (invoice.year, invoice.month)
+    try:
+        path = invoices.invoice_path(invoice.year, invoice.month, invoices.data_version(db, invoice.year, invoice.month))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error checking invoice cache: {str(e)}"
+        )
+    if os.path.exists(path):
+        return _job_out(queue.completed(key, path))
+    return _job_out(queue.submit(key, invoices.generate_monthly_invoice, invoice.year, invoice.month))
+
+@router.get("/jobs/{job_id}", response_model=InvoiceJob)
+def get_invoice_job(job_id: str, request: Request, current_user: dict = Depends(get_current_admin_user)):
+    job = request.app.state.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_out(job)
+
+@router.get("/jobs/{job_id}/download")
+def download_invoice(job_id: str, request: Request, current_user: dict = Depends(get_current_admin_user)):
+    job = request.app.state.job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != jobs.DONE:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Invoice is {job.status}")
+    if not os.path.exists(job.result):
+        # Replaced by a newer version of the month; request it again
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Invoice is out of date")
+    year, month = job.key
+    return FileResponse(
+        job.result,
+        media_type="application/pdf",
+        filename=f"Monthly-Invoice-{year}-{month:02d}.pdf"
+    )
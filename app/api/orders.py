@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only, with_loader_criteria
+from sqlalchemy import Integer, Numeric, and_, cast, column, func, insert, select, tuple_, update, values
 from app.db.session import SessionLocal
 from app.db import models
-from app.schemas.order import OrderCreate, OrderOut, OrderUpdate, OrderItemCreate, OrderItemUpdate
-from typing import List
+from app.core import events, pdf
+from app.db import customer_stats
+from app.db import customers
+from app.db import stock
+from app.db import spreadsheets
+from app.schemas.order import (
+    OrderCreate, OrderOut, OrderUpdate, OrderItemCreate, OrderItemUpdate,
+    OrderStatus, OrderSummary, OrderPage, OrderItemOut,
+    OrderStatusBulkUpdate, OrderStatusBulkResult, OrderStatusOutcome, OrderItemsReplace,
+    PickList, PickListLine
+)
+from app.schemas.customer import normalize_phone
+from typing import Dict, List, Optional
 from fastapi.security import OAuth2PasswordBearer
 from app.core.security import decode_access_token
 from decimal import Decimal, ROUND_HALF_UP
+from datetime import date, datetime, timedelta
+import base64
+import re
 
 router = APIRouter()
 
@@ -36,33 +52,165 @@ def _load_order_with_relationships(db: Session, order_id: int) -> models.Order:
     
     return order
 
+# Status each status may move to; delivered and cancelled orders are final
+ALLOWED_STATUS_TRANSITIONS = {
+    "pending": {"confirmed", "processing", "shipped", "cancelled"},
+    "confirmed": {"pending", "processing", "shipped", "cancelled"},
+    "processing": {"confirmed", "shipped", "cancelled"},
+    "shipped": {"delivered", "cancelled"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+def _transition_order_statuses(db: Session, order_ids: List[int], new_status: str) -> Dict[int, OrderStatusOutcome]:
+    """Move orders to ``new_status`` in one UPDATE, without committing.
+
+    Only orders whose current status allows the transition are updated.
+    Shipping fulfils the orders' reservations and cancelling releases them
+    (or restocks shipped items), one set-based UPDATE each; cancelled orders
+    are also taken out of the customers' purchase metrics. Orders already in
+    ``new_status`` succeed without changes. Returns an outcome per order id.
+    """
+    Order = models.Order.__table__
+    order_ids = list(dict.fromkeys(order_ids))
+    allowed_from = [old for old, targets in ALLOWED_STATUS_TRANSITIONS.items() if new_status in targets]
+
+    # Lock the matching rows and remember their old status for the response
+    targets = select(
+        Order.c.id, Order.c.order_time, Order.c.status.label("old_status")
+    ).where(
+        Order.c.id.in_(order_ids),
+        func.coalesce(Order.c.status, "pending").in_(allowed_from)
+    ).with_for_update().cte("targets")
+    changed = db.execute(
+        update(Order)
+        .where(Order.c.id == targets.c.id, Order.c.order_time == targets.c.order_time)
+        .values(status=new_status)
+        .returning(Order.c.id, targets.c.old_status, Order.c.customer_id, Order.c.total, Order.c.order_time)
+    ).all() if allowed_from else []
+
+    outcomes = {
+        row.id: OrderStatusOutcome(order_id=row.id, success=True, old_status=row.old_status, status=new_status)
+        for row in changed
+    }
+
+    # Explain the orders that were not updated
+    remaining = [order_id for order_id in order_ids if order_id not in outcomes]
+    if remaining:
+        current = dict(db.execute(select(Order.c.id, Order.c.status).where(Order.c.id.in_(remaining))).all())
+        for order_id in remaining:
+            if order_id not in current:
+                outcomes[order_id] = OrderStatusOutcome(order_id=order_id, success=False, error="Order not found")
+            elif current[order_id] == new_status:
+                outcomes[order_id] = OrderStatusOutcome(
+                    order_id=order_id, success=True, old_status=new_status, status=new_status
+                )
+            else:
+                outcomes[order_id] = OrderStatusOutcome(
+                    order_id=order_id, success=False, old_status=current[order_id],
+                    error=f"Cannot change status from {current[order_id]} to {new_status}"
+                )
+
+    if not changed:
+        return outcomes
+
+    # Shipping turns reservations into shipped stock; cancelling gives back
+    # reservations of open orders and puts shipped items back on hand
+    was_open = [row.id for row in changed if row.old_status in stock.RESERVING_STATUSES]
+    was_shipped = [row.id for row in changed if row.old_status not in stock.RESERVING_STATUSES]
+    stock_levels = []
+    if new_status == "shipped":
+        stock_levels += stock.fulfil(db, stock.order_quantities(db, was_open))
+    elif new_status == "cancelled":
+        stock_levels += stock.release(db, stock.order_quantities(db, was_open))
+        stock_levels += stock.restock(db, stock.order_quantities(db, was_shipped))
+    events.publish_stock(db, stock_levels)
+
+    if new_status == "cancelled":
+        # Cancelled orders don't count as purchases
+        customer_stats.record_purchases(db, [
+            (row.customer_id, None, -row.total, customer_stats.ORDER, -1) for row in changed
+        ])
+
+    changed_ids = [row.id for row in changed]
+    for i in range(0, len(changed_ids), events.EVENT_CHUNK_SIZE):
+        events.publish(db, events.ORDER_STATUS_CHANGED, order_ids=changed_ids[i:i + events.EVENT_CHUNK_SIZE], status=new_status)
+    return outcomes
+
+def _adjust_customer_spend(db: Session, order: models.Order, old_total) -> None:
+    """Carry a change of an open order's total into its customer's metrics."""
+    if order.status == "cancelled" or order.total == old_total:
+        return
+    customer_stats.record_purchase(
+        db, order.customer_id, None, Decimal(str(order.total)) - Decimal(str(old_total)), customer_stats.ORDER, count=0
+    )
+
+def _take_stock(db: Session, order: models.Order, quantities: Dict[int, Decimal]) -> None:
+    """Set stock aside for items added to ``order``; negative quantities give it back.
+
+    Raises stock.InsufficientStockError.
+    """
+    if order.status in stock.RESERVING_STATUSES:
+        events.publish_stock(db, stock.reserve(db, quantities))
+    elif order.status != "cancelled":
+        events.publish_stock(db, stock.deduct(db, quantities))
+
+def _return_stock(db: Session, order: models.Order, quantities: Dict[int, Decimal]) -> None:
+    """Give back the stock of items removed from ``order``."""
+    if order.status in stock.RESERVING_STATUSES:
+        events.publish_stock(db, stock.release(db, quantities))
+    elif order.status != "cancelled":
+        events.publish_stock(db, stock.restock(db, quantities))
+
+def _stock_error(e: stock.InsufficientStockError, variant: Optional[models.Variant] = None) -> HTTPException:
+    if variant is not None and variant.product is not None:
+        detail = (f"Not enough stock for {variant.product.name} - {variant.size or ''} {variant.color or ''}. "
+                  f"Available: {e.available}, Requested: {e.requested}")
+    else:
+        detail = str(e)
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
 @router.post("/", response_model=OrderOut)
 def create_order(order: OrderCreate, db: Session = Depends(get_db)):
+    """Create an order and reserve its items.
+
+    The customer is either an existing ``customer_id`` or inline ``customer``
+    data, upserted by phone number in the same transaction as the order.
+    """
     try:
-        # Verify customer exists
-        customer = db.query(models.Customer).filter(models.Customer.id == order.customer_id).first()
-        if not customer:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Customer {order.customer_id} not found"
-            )
+        if order.customer is not None:
+            customer_id = customers.upsert_customer(db, order.customer.name, order.customer.phone_number)
+        else:
+            # Verify customer exists
+            customer_id = db.query(models.Customer.id).filter(models.Customer.id == order.customer_id).scalar()
+            if customer_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Customer {order.customer_id} not found"
+                )
         
         # Extract items data
         items_data = order.items
-        order_dict = order.dict(exclude={'items'})
+        order_dict = order.dict(exclude={'items', 'customer'})
+        order_dict['customer_id'] = customer_id
         
         # Create order
         db_order = models.Order(**order_dict)
         db.add(db_order)
         db.flush()  # Get order ID without committing
         
-        # Process each item
-        for item in items_data:
-            # Get variant with product preloaded for validation
-            variant = db.query(models.Variant).options(
+        # Validate every variant with one query
+        variant_ids = {item.variant_id for item in items_data}
+        variants = {
+            variant.id: variant
+            for variant in db.query(models.Variant).options(
                 joinedload(models.Variant.product)
-            ).filter(models.Variant.id == item.variant_id).first()
-            
+            ).filter(models.Variant.id.in_(variant_ids)).all()
+        }
+        
+        quantities = {}
+        for item in items_data:
+            variant = variants.get(item.variant_id)
             if not variant:
                 db.rollback()
                 raise HTTPException(
@@ -77,26 +225,31 @@ def create_order(order: OrderCreate, db: Session = Depends(get_db)):
                     detail=f"Variant {item.variant_id} has no associated product"
                 )
             
-            # Check inventory
-            if variant.quantity < item.quantity:
-                db.rollback()
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail=f"Not enough stock for {variant.product.name} - {variant.size or ''} {variant.color or ''}. Available: {variant.quantity}, Requested: {item.quantity}"
-                )
-            
             # Create order item
             db_item = models.OrderItem(
                 order_id=db_order.id,
+                order_time=db_order.order_time,
                 variant_id=item.variant_id,
                 quantity=item.quantity,
-                price=Decimal(str(item.price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                price=Decimal(str(item.price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                unit_cost=variant.cost_price or Decimal('0')
             )
             db.add(db_item)
-            
-            # Update inventory
-            variant.quantity -= item.quantity
+            quantities[item.variant_id] = quantities.get(item.variant_id, 0) + item.quantity
         
+        # Reserve all items at once; fails if any variant has too little available
+        try:
+            stock_levels = stock.reserve(db, quantities)
+        except stock.InsufficientStockError as e:
+            error = _stock_error(e, variants.get(e.variant_id))
+            db.rollback()
+            raise error
+        
+        customer_stats.record_purchase(
+            db, db_order.customer_id, db_order.order_time, Decimal(str(db_order.total)), customer_stats.ORDER
+        )
+        events.publish(db, events.ORDER_CREATED, order_id=db_order.id, status=db_order.status, total=db_order.total)
+        events.publish_stock(db, stock_levels)
         db.commit()
         
         # Load and return the complete order
@@ -159,6 +312,367 @@ def list_orders(db: Session = Depends(get_db)):
             detail=f"Error loading orders: {str(e)}"
         )
 
+def _encode_cursor(order_time: datetime, order_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{order_time.isoformat()}|{order_id}".encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        order_time, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(order_time), int(order_id)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _order_list_filters(status_filter: Optional[List[OrderStatus]], start_date: Optional[date],
+                        end_date: Optional[date], wilaya: Optional[str], phone: Optional[str]) -> list:
+    Order = models.Order
+    filters = []
+    if status_filter:
+        filters.append(Order.status.in_([s.value for s in status_filter]))
+    if start_date:
+        filters.append(Order.order_time >= start_date)
+    if end_date:
+        filters.append(Order.order_time < end_date + timedelta(days=1))
+    if wilaya:
+        filters.append(Order.wilaya == wilaya)
+    if phone:
+        filters.append(Order.customer_id.in_(
+            select(models.Customer.id).where(_phone_match(phone))
+        ))
+    return filters
+
+def _phone_match(phone: str):
+    """Match part of a phone number against the normalized stored numbers.
+
+    A fragment starting with the country code is the start of a number, so
+    "+213 555 12" matches numbers beginning with "055512". The country code
+    alone is matched as its digits, not as "0", which every number contains.
+    """
+    fragment = re.sub(r"[^0-9+]", "", phone)
+    country_code = re.match(r"^(\+|00)213", fragment)
+    if country_code and len(fragment) > country_code.end():
+        return models.Customer.phone_number.startswith(normalize_phone(fragment))
+    return models.Customer.phone_number.contains(fragment.lstrip("+") or phone.strip())
+
+@router.get("/list", response_model=OrderPage)
+def list_orders_page(
+    status_filter: Optional[List[OrderStatus]] = Query(None, alias="status"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    wilaya: Optional[str] = None,
+    phone: Optional[str] = Query(None, description="Part of the customer's phone number"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_items: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Orders newest first, one page at a time.
+
+    Pages are keyset-paginated on (order_time, id): pass ``next_cursor`` back as
+    ``cursor``. Without ``include_items`` only the order row, customer and item
+    count are read.
+    """
+    Order = models.Order
+    filters = _order_list_filters(status_filter, start_date, end_date, wilaya, phone)
+    if cursor:
+        cursor_time, cursor_id = _decode_cursor(cursor)
+        filters.append(tuple_(Order.order_time, Order.id) < tuple_(cursor_time, cursor_id))
+
+    try:
+        item_count = select(func.count(models.OrderItem.id)).where(
+            models.OrderItem.order_id == Order.id,
+            models.OrderItem.order_time == Order.order_time
+        ).scalar_subquery()
+
+        # Fetch one extra row to know whether there is a next page
+        query = db.query(
+            Order,
+            models.Customer.name,
+            models.Customer.phone_number,
+            item_count.label("item_count")
+        ).outerjoin(
+            models.Customer, models.Customer.id == Order.customer_id
+        ).filter(*filters).order_by(Order.order_time.desc(), Order.id.desc()).limit(limit + 1)
+
+        if include_items:
+            query = query.options(
+                selectinload(Order.items).selectinload(models.OrderItem.variant).selectinload(models.Variant.product)
+            )
+        else:
+            query = query.options(
+                load_only(
+                    Order.id, Order.customer_id, Order.wilaya, Order.commune, Order.delivery_method,
+                    Order.order_time, Order.status, Order.notes, Order.total
+                )
+            )
+        rows = query.all()
+
+        page = rows[:limit]
+        orders = []
+        for order, customer_name, phone_number, count in page:
+            notes = order.notes
+            if notes and notes.startswith('Sample order'):
+                notes = None
+            orders.append(OrderSummary(
+                id=order.id,
+                customer_id=order.customer_id,
+                customer_name=customer_name or "Unknown Customer",
+                phone_number=phone_number or "No Phone",
+                wilaya=order.wilaya,
+                commune=order.commune,
+                delivery_method=order.delivery_method,
+                order_time=order.order_time,
+                status=order.status,
+                notes=notes,
+                total=order.total,
+                item_count=count or 0,
+                items=[OrderItemOut.from_orm(item) for item in order.items] if include_items else None
+            ))
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1][0]
+            next_cursor = _encode_cursor(last.order_time, last.id)
+        return OrderPage(orders=orders, next_cursor=next_cursor)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing orders: {str(e)}"
+        )
+
+@router.post("/status", response_model=OrderStatusBulkResult)
+def update_order_statuses(bulk: OrderStatusBulkUpdate, db: Session = Depends(get_db)):
+    """Move many orders to one status in a single transaction.
+
+    Orders whose current status doesn't allow the transition (or that don't
+    exist) are reported as failed without blocking the others. Cancelling
+    returns the orders' items to stock.
+    """
+    try:
+        outcomes = _transition_order_statuses(db, bulk.order_ids, bulk.status.value)
+        db.commit()
+        results = [outcomes[order_id] for order_id in dict.fromkeys(bulk.order_ids)]
+        updated = sum(1 for outcome in results if outcome.success)
+        return OrderStatusBulkResult(updated=updated, failed=len(results) - updated, results=results)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating order statuses: {str(e)}"
+        )
+
+def _build_pick_list(db: Session, statuses: List[OrderStatus], start_date: Optional[date],
+                     end_date: Optional[date]) -> PickList:
+    """Sum the items of the matching orders per variant in one grouped query."""
+    Order, Item = models.Order, models.OrderItem
+    order_filters = [Order.status.in_([s.value for s in statuses])]
+    # Bounding order_items' partition key as well lets both sides prune partitions
+    item_filters = []
+    if start_date:
+        order_filters.append(Order.order_time >= start_date)
+        item_filters.append(Item.order_time >= start_date)
+    if end_date:
+        end = end_date + timedelta(days=1)
+        order_filters.append(Order.order_time < end)
+        item_filters.append(Item.order_time < end)
+
+    product_name = func.coalesce(models.Product.name, "Unknown Product")
+    rows = db.query(
+        Item.variant_id,
+        product_name.label("product_name"),
+        models.Variant.size,
+        models.Variant.color,
+        models.Variant.barcode,
+        func.sum(Item.quantity).label("quantity"),
+        func.count(func.distinct(Item.order_id)).label("order_count")
+    ).join(
+        Order, and_(Order.id == Item.order_id, Order.order_time == Item.order_time)
+    ).outerjoin(
+        models.Variant, models.Variant.id == Item.variant_id
+    ).outerjoin(
+        models.Product, models.Product.id == models.Variant.product_id
+    ).filter(*order_filters, *item_filters).group_by(
+        Item.variant_id, product_name, models.Variant.size, models.Variant.color, models.Variant.barcode
+    ).order_by(
+        product_name, models.Variant.size, models.Variant.color, Item.variant_id
+    ).all()
+
+    order_count = db.query(func.count(Order.id)).filter(*order_filters).scalar()
+    lines = [PickListLine(**row._asdict()) for row in rows]
+    return PickList(
+        statuses=statuses,
+        start_date=start_date,
+        end_date=end_date,
+        order_count=order_count or 0,
+        total_units=sum(line.quantity for line in lines),
+        generated_at=datetime.now(),
+        lines=lines
+    )
+
+@router.get("/pick-list", response_model=PickList)
+def get_pick_list(
+    status_filter: List[OrderStatus] = Query([OrderStatus.CONFIRMED], alias="status"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Units to pick per variant across all orders in the given statuses and dates."""
+    try:
+        return _build_pick_list(db, status_filter, start_date, end_date)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building pick list: {str(e)}"
+        )
+
+@router.get("/pick-list.pdf")
+def get_pick_list_pdf(
+    status_filter: List[OrderStatus] = Query([OrderStatus.CONFIRMED], alias="status"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """The pick list as a printable PDF."""
+    try:
+        pdf.require_reportlab()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    try:
+        pick_list = _build_pick_list(db, status_filter, start_date, end_date)
+        filters = ", ".join(s.value for s in status_filter)
+        if start_date or end_date:
+            filters += f" ({start_date or 'begin'} to {end_date or 'now'})"
+        content = pdf.render_pick_list(pick_list.lines, pick_list.order_count, filters, pick_list.generated_at)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error building pick list: {str(e)}"
+        )
+    filename = f"pick-list-{pick_list.generated_at.strftime('%Y%m%d-%H%M')}.pdf"
+    return Response(
+        content=content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+ORDER_EXPORT_COLUMNS = [
+    ("Order ID", 10), ("Date", 18), ("Customer", 25), ("Phone", 16), ("Wilaya", 15), ("Commune", 18),
+    ("Delivery", 12), ("Status", 12), ("Items", 8), ("Units", 8), ("Total", 12), ("Notes", 40),
+]
+
+@router.get("/export.xlsx")
+def export_orders_xlsx(
+    status_filter: Optional[List[OrderStatus]] = Query(None, alias="status"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    wilaya: Optional[str] = None,
+    phone: Optional[str] = Query(None, description="Part of the customer's phone number"),
+):
+    """Orders matching the ``/orders/list`` filters as an Excel file, newest first.
+
+    Rows are read through a server-side cursor into a write-only workbook, so
+    memory stays flat for any number of orders.
+    """
+    try:
+        spreadsheets.require_openpyxl()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    Order, Item = models.Order, models.OrderItem
+    same_order = (Item.order_id == Order.id, Item.order_time == Order.order_time)
+    item_count = select(func.count(Item.id)).where(*same_order).scalar_subquery()
+    unit_count = select(func.coalesce(func.sum(Item.quantity), 0)).where(*same_order).scalar_subquery()
+    statement = select(
+        Order.id,
+        Order.order_time,
+        func.coalesce(models.Customer.name, "Unknown Customer"),
+        models.Customer.phone_number,
+        Order.wilaya,
+        Order.commune,
+        Order.delivery_method,
+        func.coalesce(Order.status, "pending"),
+        item_count,
+        unit_count,
+        Order.total,
+        Order.notes
+    ).outerjoin(
+        models.Customer, models.Customer.id == Order.customer_id
+    ).where(
+        *_order_list_filters(status_filter, start_date, end_date, wilaya, phone)
+    ).order_by(Order.order_time.desc(), Order.id.desc())
+
+    filename = f"orders_{start_date or 'begin'}_{end_date or 'now'}.xlsx"
+    return StreamingResponse(
+        spreadsheets.iter_xlsx(statement, "Orders", ORDER_EXPORT_COLUMNS, total_columns=(9, 10)),
+        media_type=spreadsheets.XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/date-range", response_model=List[OrderOut])
+@router.get("/date-range/", response_model=List[OrderOut])
+def get_orders_by_date_range(
+    start_date: str,
+    end_date: str,
+    db: Session = Depends(get_db)
+):
+    """Get orders between two dates (format: yyyy-MM-dd)."""
+    try:
+        # Parse start date with time at beginning of day
+        start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+        
+        # End date is inclusive, so the range ends at the start of the next day
+        end_datetime = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+        
+        # Query orders within date range with relationships. The same bounds are
+        # applied to order_items so both partitioned tables prune to the
+        # months in range.
+        orders = db.query(models.Order).options(
+            joinedload(models.Order.customer),
+            joinedload(models.Order.items).joinedload(models.OrderItem.variant).joinedload(models.Variant.product),
+            with_loader_criteria(
+                models.OrderItem,
+                and_(models.OrderItem.order_time >= start_datetime, models.OrderItem.order_time < end_datetime)
+            )
+        ).filter(
+            models.Order.order_time >= start_datetime,
+            models.Order.order_time < end_datetime
+        ).order_by(models.Order.order_time.desc()).all()
+        
+        results = []
+        for order in orders:
+            try:
+                # Force load relationships
+                for item in order.items:
+                    if item.variant:
+                        # Access variant attributes to ensure they're loaded
+                        _ = item.variant.size
+                        _ = item.variant.color
+                        if item.variant.product:
+                            # Access product name to ensure it's loaded
+                            _ = item.variant.product.name
+
+                # Create OrderOut instance
+                order_data = OrderOut.from_orm(order)
+                results.append(order_data)
+                
+            except Exception as e:
+                print(f"Error processing order {order.id}: {str(e)}")
+                # Continue processing other orders
+                continue
+                
+        return results
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid date format. Use YYYY-MM-DD. Error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching orders by date range: {str(e)}"
+        )
+
 @router.get("/{order_id}", response_model=OrderOut)
 def get_order(order_id: int, db: Session = Depends(get_db)):
     print(f"=== BACKEND: Getting individual order {order_id} ===")
@@ -201,6 +715,14 @@ def update_order(order_id: int, order_update: OrderUpdate, db: Session = Depends
     
     # Update only provided fields
     update_data = order_update.dict(exclude_unset=True)
+    new_status = update_data.pop("status", None)
+    if new_status is not None:
+        # Same rules and stock handling as the bulk endpoint
+        outcome = _transition_order_statuses(db, [order_id], OrderStatus(new_status).value)[order_id]
+        if not outcome.success:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=outcome.error)
+    
     for field, value in update_data.items():
         if hasattr(order, field):
             setattr(order, field, value)
@@ -211,11 +733,133 @@ def update_order(order_id: int, order_update: OrderUpdate, db: Session = Depends
     order = _load_order_with_relationships(db, order_id)
     return order
 
+@router.patch("/{order_id}/items", response_model=OrderOut)
+def replace_order_items(order_id: int, lines: OrderItemsReplace, db: Session = Depends(get_db)):
+    """Make the order's items match ``lines`` in one transaction.
+
+    Lines with an ``id`` update that item, lines without one are added and
+    items left out are removed. Stock moves by the per-variant difference in
+    one statement and the total is recomputed in SQL.
+    """
+    try:
+        Item = models.OrderItem.__table__
+        # Locked so its status (and so how stock is held) can't change meanwhile
+        order = db.query(models.Order).options(
+            load_only(models.Order.id, models.Order.order_time, models.Order.status,
+                      models.Order.customer_id, models.Order.total)
+        ).filter(models.Order.id == order_id).with_for_update().first()
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+        in_order = and_(Item.c.order_id == order.id, Item.c.order_time == order.order_time)
+
+        current = {
+            row.id: row
+            for row in db.execute(select(Item.c.id, Item.c.variant_id, Item.c.quantity).where(in_order)).all()
+        }
+        unknown = [line.id for line in lines.items if line.id is not None and line.id not in current]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Item {unknown[0]} is not part of order {order_id}")
+
+        # Costs are snapshotted for new lines and lines moved to another variant
+        costs = {}
+        variant_ids = {
+            line.variant_id for line in lines.items
+            if line.id is None or line.variant_id != current[line.id].variant_id
+        }
+        if variant_ids:
+            costs = dict(db.execute(
+                select(models.Variant.id, models.Variant.cost_price).where(models.Variant.id.in_(variant_ids))
+            ).all())
+            missing = variant_ids - costs.keys()
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Variant {min(missing)} not found")
+
+        # Per-variant difference between the current and the requested lines
+        deltas = {}
+        for row in current.values():
+            deltas[row.variant_id] = deltas.get(row.variant_id, 0) - row.quantity
+        for line in lines.items:
+            deltas[line.variant_id] = deltas.get(line.variant_id, 0) + line.quantity
+        try:
+            _take_stock(db, order, deltas)
+        except stock.InsufficientStockError as e:
+            db.rollback()
+            raise _stock_error(e)
+
+        kept = {line.id for line in lines.items if line.id is not None}
+        removed = [item_id for item_id in current if item_id not in kept]
+        if removed:
+            db.execute(Item.delete().where(in_order, Item.c.id.in_(removed)))
+
+        def price(line):
+            return line.price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+        changed = [line for line in lines.items if line.id is not None]
+        if changed:
+            rows = values(
+                column("id", Integer), column("variant_id", Integer), column("quantity", Integer),
+                column("price", Numeric(10, 2)), column("unit_cost", Numeric(10, 2)), name="lines"
+            ).data([
+                # NULL unit_cost keeps the current snapshot
+                (line.id, line.variant_id, line.quantity, price(line),
+                 None if line.variant_id == current[line.id].variant_id else costs[line.variant_id] or Decimal('0'))
+                for line in changed
+            ])
+            db.execute(
+                update(Item)
+                .where(in_order, Item.c.id == rows.c.id)
+                .values(
+                    variant_id=rows.c.variant_id,
+                    quantity=rows.c.quantity,
+                    price=rows.c.price,
+                    # An all-NULL VALUES column would otherwise be typed as text
+                    unit_cost=func.coalesce(cast(rows.c.unit_cost, Numeric(10, 2)), Item.c.unit_cost),
+                )
+            )
+
+        added = [line for line in lines.items if line.id is None]
+        if added:
+            db.execute(insert(Item), [
+                {
+                    "order_id": order.id,
+                    "order_time": order.order_time,
+                    "variant_id": line.variant_id,
+                    "quantity": line.quantity,
+                    "price": price(line),
+                    "unit_cost": costs.get(line.variant_id) or Decimal('0'),
+                }
+                for line in added
+            ])
+
+        old_total = order.total
+        new_total = db.execute(
+            update(models.Order.__table__)
+            .where(models.Order.id == order.id, models.Order.order_time == order.order_time)
+            .values(total=select(
+                func.coalesce(func.sum(Item.c.price * Item.c.quantity), 0)
+            ).where(in_order).scalar_subquery())
+            .returning(models.Order.total)
+        ).scalar_one()
+        if order.status != "cancelled" and new_total != old_total:
+            customer_stats.record_purchase(db, order.customer_id, None, new_total - old_total, customer_stats.ORDER, count=0)
+
+        db.commit()
+        return _load_order_with_relationships(db, order_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating order items: {str(e)}"
+        )
+
 @router.put("/{order_id}/items/{item_id}", response_model=OrderOut)
 def update_order_item(order_id: int, item_id: int, item_update: OrderItemUpdate, db: Session = Depends(get_db)):
     """Update a specific order item."""
-    # Check if order exists
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    # Check if order exists; locked so its status can't change under the stock update
+    order = db.query(models.Order).filter(models.Order.id == order_id).with_for_update().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -229,7 +873,8 @@ def update_order_item(order_id: int, item_id: int, item_update: OrderItemUpdate,
     
     # Update only provided fields
     update_data = item_update.dict(exclude_unset=True)
-    old_quantity = order_item.quantity
+    old_variant_id, old_quantity = order_item.variant_id, order_item.quantity
+    old_total = order.total
     
     # If variant_id is being changed, validate the new variant
     if 'variant_id' in update_data:
@@ -237,41 +882,26 @@ def update_order_item(order_id: int, item_id: int, item_update: OrderItemUpdate,
         if not new_variant:
             raise HTTPException(status_code=404, detail="New variant not found")
         
-        # Restore quantity to old variant
-        old_variant = db.query(models.Variant).filter(models.Variant.id == order_item.variant_id).first()
-        if old_variant:
-            old_variant.quantity += old_quantity
+        # Snapshot the new variant's cost
+        order_item.unit_cost = new_variant.cost_price or Decimal('0')
     
     # Apply updates
     for field, value in update_data.items():
         setattr(order_item, field, value)
     
-    # Handle inventory updates for quantity changes
-    new_quantity = order_item.quantity
-    if 'quantity' in update_data or 'variant_id' in update_data:
-        current_variant = db.query(models.Variant).filter(models.Variant.id == order_item.variant_id).first()
-        if current_variant:
-            if 'variant_id' in update_data:
-                # New variant, check if we have enough stock
-                if current_variant.quantity < new_quantity:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Not enough stock for variant {order_item.variant_id}. Available: {current_variant.quantity}"
-                    )
-                current_variant.quantity -= new_quantity
-            else:
-                # Same variant, adjust quantity difference
-                quantity_diff = new_quantity - old_quantity
-                if current_variant.quantity < quantity_diff:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Not enough stock for variant {order_item.variant_id}. Available: {current_variant.quantity}"
-                    )
-                current_variant.quantity -= quantity_diff
+    # Move stock by the difference between the old and the new line
+    deltas = {old_variant_id: -old_quantity}
+    deltas[order_item.variant_id] = deltas.get(order_item.variant_id, 0) + order_item.quantity
+    try:
+        _take_stock(db, order, deltas)
+    except stock.InsufficientStockError as e:
+        db.rollback()
+        raise _stock_error(e)
     
     # Recalculate order total
     total = sum(item.price * item.quantity for item in order.items)
     order.total = total
+    _adjust_customer_spend(db, order, old_total)
     
     db.commit()
     
@@ -282,8 +912,8 @@ def update_order_item(order_id: int, item_id: int, item_update: OrderItemUpdate,
 @router.post("/{order_id}/items", response_model=OrderOut)
 def add_order_item(order_id: int, item_create: OrderItemCreate, db: Session = Depends(get_db)):
     """Add a new item to an existing order."""
-    # Check if order exists
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    # Check if order exists; locked so its status can't change under the stock update
+    order = db.query(models.Order).filter(models.Order.id == order_id).with_for_update().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -292,27 +922,28 @@ def add_order_item(order_id: int, item_create: OrderItemCreate, db: Session = De
     if not variant:
         raise HTTPException(status_code=404, detail="Variant not found")
     
-    if variant.quantity < item_create.quantity:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Not enough stock for variant {item_create.variant_id}. Available: {variant.quantity}"
-        )
+    try:
+        _take_stock(db, order, {variant.id: item_create.quantity})
+    except stock.InsufficientStockError as e:
+        db.rollback()
+        raise _stock_error(e)
     
     # Create new order item
     new_item = models.OrderItem(
         order_id=order_id,
+        order_time=order.order_time,
         variant_id=item_create.variant_id,
         quantity=item_create.quantity,
-        price=item_create.price
+        price=item_create.price,
+        unit_cost=variant.cost_price or Decimal('0')
     )
     db.add(new_item)
     
-    # Update inventory
-    variant.quantity -= item_create.quantity
-    
     # Recalculate order total
+    old_total = order.total
     total = sum(item.price * item.quantity for item in order.items) + (item_create.price * item_create.quantity)
     order.total = total
+    _adjust_customer_spend(db, order, old_total)
     
     db.commit()
     
@@ -323,8 +954,8 @@ def add_order_item(order_id: int, item_create: OrderItemCreate, db: Session = De
 @router.delete("/{order_id}/items/{item_id}", response_model=OrderOut)
 def delete_order_item(order_id: int, item_id: int, db: Session = Depends(get_db)):
     """Delete an item from an order."""
-    # Check if order exists
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    # Check if order exists; locked so its status can't change under the stock update
+    order = db.query(models.Order).filter(models.Order.id == order_id).with_for_update().first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -336,17 +967,17 @@ def delete_order_item(order_id: int, item_id: int, db: Session = Depends(get_db)
     if not order_item:
         raise HTTPException(status_code=404, detail="Order item not found")
     
-    # Restore inventory
-    variant = db.query(models.Variant).filter(models.Variant.id == order_item.variant_id).first()
-    if variant:
-        variant.quantity += order_item.quantity
+    # Give back the item's stock
+    _return_stock(db, order, {order_item.variant_id: order_item.quantity})
     
     # Remove the item
     db.delete(order_item)
     
     # Recalculate order total
+    old_total = order.total
     total = sum(item.price * item.quantity for item in order.items if item.id != item_id)
     order.total = total
+    _adjust_customer_spend(db, order, old_total)
     
     db.commit()
     
@@ -354,76 +985,24 @@ def delete_order_item(order_id: int, item_id: int, db: Session = Depends(get_db)
     order = _load_order_with_relationships(db, order_id)
     return order
 
-@router.get("/date-range", response_model=List[OrderOut])
-@router.get("/date-range/", response_model=List[OrderOut])
-def get_orders_by_date_range(
-    start_date: str,
-    end_date: str,
-    db: Session = Depends(get_db)
-):
-    """Get orders between two dates (format: yyyy-MM-dd)."""
-    try:
-        # Parse dates
-        from datetime import datetime, time
-        
-        # Parse start date with time at beginning of day
-        start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-        start_datetime = datetime.combine(start_datetime.date(), time.min)
-        
-        # Parse end date with time at end of day
-        end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-        end_datetime = datetime.combine(end_datetime.date(), time.max)
-        
-        # Query orders within date range with relationships
-        orders = db.query(models.Order).options(
-            joinedload(models.Order.customer),
-            joinedload(models.Order.items).joinedload(models.OrderItem.variant).joinedload(models.Variant.product)
-        ).filter(
-            models.Order.order_time >= start_datetime,
-            models.Order.order_time <= end_datetime
-        ).order_by(models.Order.order_time.desc()).all()
-        
-        results = []
-        for order in orders:
-            try:
-                # Force load relationships
-                for item in order.items:
-                    if item.variant:
-                        # Access variant attributes to ensure they're loaded
-                        _ = item.variant.size
-                        _ = item.variant.color
-                        if item.variant.product:
-                            # Access product name to ensure it's loaded
-                            _ = item.variant.product.name
-
-                # Create OrderOut instance
-                order_data = OrderOut.from_orm(order)
-                results.append(order_data)
-                
-            except Exception as e:
-                print(f"Error processing order {order.id}: {str(e)}")
-                # Continue processing other orders
-                continue
-                
-        return results
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching orders by date range: {str(e)}"
-        )
-
 @router.delete("/{order_id}")
 def delete_order(order_id: int, db: Session = Depends(get_db)):
     """Delete an entire order."""
     try:
-        order = db.query(models.Order).filter(models.Order.id == order_id).first()
+        order = db.query(models.Order).filter(models.Order.id == order_id).with_for_update().first()
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
+        # Open orders hold reservations; shipped items have left the shop
+        if order.status in stock.RESERVING_STATUSES:
+            events.publish_stock(db, stock.release(db, stock.order_quantities(db, [order_id])))
+        
         # Delete order items first (cascade should handle this, but being explicit)
         db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).delete()
         
+        if order.status != "cancelled":
+            customer_stats.record_purchase(db, order.customer_id, None, -order.total, customer_stats.ORDER, count=-1)
+        
         # Delete the order
         db.delete(order)
         db.commit()
@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, File, UploadFile, Form, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.session import SessionLocal
 from app.db import models
+from app.db import product_images
+from app.core import images
+from app.core.config import MAX_IMAGE_UPLOAD_BYTES
 from pydantic import BaseModel
-from typing import List, Optional
-import shutil
+from typing import Dict, List, Optional
 import os
 from pathlib import Path
 
 router = APIRouter()
 
+# Most products one batch request may ask for
+MAX_BATCH_PRODUCTS = 1000
+
 def get_db():
     db = SessionLocal()
     try:
@@ -21,11 +27,59 @@ class ImageResponse(BaseModel):
     """Response model for image operations"""
     image_url: str
     is_main: bool = False
+    id: Optional[int] = None
+    position: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    byte_size: Optional[int] = None
+    content_hash: Optional[str] = None
+    # Small JPEG for grids and {size: {format: url}}, once generated after upload
+    thumbnail_url: Optional[str] = None
+    sizes: Dict[str, Dict[str, str]] = {}
+
+
+def _get_product(db: Session, product_id: int, lock: bool = False) -> models.Product:
+    if lock:
+        product = product_images.lock_product(db, product_id)
+    else:
+        product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f"Product with ID {product_id} not found"
+        )
+    return product
+
+
+def _get_image(db: Session, product_id: int, image_url: str) -> models.ProductImage:
+    if not image_url.startswith("/"):
+        image_url = f"/{image_url}"
+    image = db.query(models.ProductImage).filter(
+        models.ProductImage.product_id == product_id,
+        models.ProductImage.url == image_url
+    ).first()
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Image not found: {image_url}"
+        )
+    return image
+
+
+def _record_upload(db: Session, queue, product_id: int, temp_path: str, content_hash: str,
+                   extension: str, set_as_main: bool) -> dict:
+    product = _get_product(db, product_id, lock=True)
+    image = product_images.add_image(db, product, temp_path, content_hash, extension, set_as_main=set_as_main)
+    db.commit()
+    
+    product_images.queue_sizes(queue, image)
+    return product_images.image_out(image)
 
 
 @router.post("/upload/{product_id}", response_model=ImageResponse)
 async def upload_product_image(
     product_id: int, 
+    request: Request,
     file: UploadFile = File(...), 
     set_as_main: bool = Form(False),
     db: Session = Depends(get_db)
@@ -33,86 +87,40 @@ async def upload_product_image(
     """
     Upload an image for a product.
     All variants of this product will share the same images.
+    Files are stored by content, so re-uploading a photo reuses the stored file.
+    Resized copies are generated in the background.
     """
+    temp_path = None
     try:
-        # Check if product exists
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Product with ID {product_id} not found"
-            )
-            
-        # Create directory for this product's images
-        product_dir = f"static/images/products/product_{product_id}"
-        os.makedirs(product_dir, exist_ok=True)
-        
-        # Check how many images already exist for this product
-        existing_files = os.listdir(product_dir) if os.path.exists(product_dir) else []
-        image_number = len(existing_files) + 1
-        
-        # Generate a unique filename for the image
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"product_{image_number}{file_extension}"
-        file_path = os.path.join(product_dir, unique_filename)
-        
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Update the product image URL if it's the first image or set_as_main is True
-        image_url = f"/{file_path}"  
-        
-        if set_as_main or image_number == 1:
-            product.image_url = image_url
-            db.commit()
-        
-        return {"image_url": image_url, "is_main": set_as_main or image_number == 1}
+        temp_path, content_hash, extension = await images.receive_upload(file, MAX_IMAGE_UPLOAD_BYTES)
+        # The session is synchronous too; keep it off the event loop
+        return await run_in_threadpool(
+            _record_upload, db, request.app.state.image_queue, product_id,
+            temp_path, content_hash, extension, set_as_main
+        )
+    except images.ImageTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except images.UnsupportedImageError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        if db:
-            db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error uploading image: {str(e)}"
         )
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
 @router.get("/list/{product_id}", response_model=List[ImageResponse])
-async def get_product_images(product_id: int, db: Session = Depends(get_db)):
-    """Get all images for a product with the specified ID."""
+def get_product_images(product_id: int, db: Session = Depends(get_db)):
+    """Get all images for a product with the specified ID, in display order."""
     try:
-        # Check if product exists
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Product with ID {product_id} not found"
-            )
-            
-        # Check the product's image directory
-        product_dir = f"static/images/products/product_{product_id}"
-        
-        # If no directory, return empty list
-        if not os.path.exists(product_dir):
-            return []
-            
-        # Get all image files from the directory
-        image_files = []
-        
-        image_files = [f for f in os.listdir(product_dir) 
-                      if os.path.isfile(os.path.join(product_dir, f)) and 
-                      f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))]
-            
-        # Create response objects for all images
-        response_images = []
-        for img in image_files:
-            image_url = f"/{os.path.join(product_dir, img)}"
-            is_main = (product.image_url == image_url)
-            response_images.append({"image_url": image_url, "is_main": is_main})
-            
-        return response_images
+        _get_product(db, product_id)
+        return [product_images.image_out(image) for image in product_images.list_images(db, product_id)]
     except HTTPException:
         raise
     except Exception as e:
@@ -122,35 +130,47 @@ async def get_product_images(product_id: int, db: Session = Depends(get_db)):
         )
 
 
+@router.get("/batch", response_model=Dict[int, List[ImageResponse]])
+def get_images_for_products(
+    product_ids: str = Query(..., description="Comma-separated product IDs"),
+    db: Session = Depends(get_db)
+):
+    """Images of many products at once, keyed by product ID, in display order.
+    Unknown products and products without images get an empty list."""
+    try:
+        ids = list(dict.fromkeys(int(product_id) for product_id in product_ids.split(",") if product_id.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="product_ids must be a comma-separated list of integers"
+        )
+    if len(ids) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_PRODUCTS} products can be requested at once"
+        )
+    try:
+        return {
+            product_id: [product_images.image_out(image) for image in rows]
+            for product_id, rows in product_images.list_images_for_products(db, ids).items()
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting product images: {str(e)}"
+        )
+
+
 @router.post("/set-main/{product_id}")
-async def set_main_product_image(product_id: int, image_url: str, db: Session = Depends(get_db)):
+def set_main_product_image(product_id: int, image_url: str, db: Session = Depends(get_db)):
     """Set a specific image as the main image for a product."""
     try:
-        # Check if product exists
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Product with ID {product_id} not found"
-            )
-        
-        # Check if the image exists
-        if not image_url.startswith("/"):
-            image_url = f"/{image_url}"
-            
-        file_path = image_url[1:]  # Remove leading slash
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Image file not found: {image_url}"
-            )
-            
-        # Set as main image
-        product.image_url = image_url
+        product = _get_product(db, product_id, lock=True)
+        image = _get_image(db, product_id, image_url)
+        product_images.set_main(db, product, image)
         db.commit()
         
-        return {"message": "Main image set successfully", "image_url": image_url}
+        return {"message": "Main image set successfully", "image_url": image.url}
     except HTTPException:
         raise
     except Exception as e:
@@ -162,51 +182,15 @@ async def set_main_product_image(product_id: int, image_url: str, db: Session =
 
 
 @router.delete("/delete/{product_id}")
-async def delete_product_image(product_id: int, image_url: str = Query(..., description="URL of the image to delete"), db: Session = Depends(get_db)):
-    """Delete a specific image for a product."""
+def delete_product_image(product_id: int, image_url: str = Query(..., description="URL of the image to delete"), db: Session = Depends(get_db)):
+    """Delete a specific image for a product; the next image becomes main if needed."""
     try:
-        # Check if product exists
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Product with ID {product_id} not found"
-            )
-        
-        # Check if the image exists
-        if not image_url.startswith("/"):
-            image_url = f"/{image_url}"
-            
-        file_path = image_url[1:]  # Remove leading slash
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Image file not found: {image_url}"
-            )
-            
-        # Check if it's the main image
-        if product.image_url == image_url:
-            # Get product directory
-            product_dir = f"static/images/products/product_{product_id}"
-            
-            # Find other images that could be used as main
-            other_images = [f for f in os.listdir(product_dir) 
-                            if os.path.isfile(os.path.join(product_dir, f)) 
-                            and f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))
-                            and f"/{os.path.join(product_dir, f)}" != image_url]
-            
-            if other_images:
-                # Set first alternative as the main image
-                product.image_url = f"/{os.path.join(product_dir, other_images[0])}"
-            else:
-                # No other images, clear the image URL
-                product.image_url = None
-                
-            db.commit()
-        
-        # Delete the file
-        os.remove(file_path)
+        product = _get_product(db, product_id, lock=True)
+        image = _get_image(db, product_id, image_url)
+        if product_images.remove_image(db, product, image):
+            # No other product uses the file; delete it under the content lock
+            images.remove_file(image.url)
+        db.commit()
         
         return {"message": "Image deleted successfully"}
     except HTTPException:
@@ -223,7 +207,7 @@ class VisibilityUpdate(BaseModel):
     show_on_website: int
 
 @router.put("/website-visibility/{product_id}")
-async def update_product_visibility(product_id: int, visibility_data: VisibilityUpdate, db: Session = Depends(get_db)):
+def update_product_visibility(product_id: int, visibility_data: VisibilityUpdate, db: Session = Depends(get_db)):
     """Update whether a product is visible on the website."""
     try:
         # Check if product exists
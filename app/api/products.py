@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, File, UploadFile, Form
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 from app.db.session import SessionLocal
 from app.db import models
+from app.db import category_tree
+from app.db import product_images
+from app.core.cache import category_tree_cache
+from app.core import images
+from app.core.config import MAX_IMAGE_UPLOAD_BYTES
 from app.schemas.product import ProductCreate, ProductOut, ProductUpdate, ProductDetailOut
 from typing import List, Optional
-import shutil
 import os
 from pathlib import Path
 import uuid
@@ -203,6 +208,7 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         db_product = models.Product(**product.model_dump())
         db.add(db_product)
         db.commit()
+        category_tree_cache.invalidate()
         db.refresh(db_product)
         
         # Include category_name in response
@@ -221,15 +227,16 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[ProductOut])
-def list_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_products(skip: int = 0, limit: int = 100, category_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Products, optionally only those in a category or any of its subcategories."""
     try:
         # Join load categories and variants with proper relationships
-        products = (db.query(models.Product)
-                   .options(joinedload(models.Product.category),
-                           joinedload(models.Product.variants))
-                   .offset(skip)
-                   .limit(limit)
-                   .all())
+        query = (db.query(models.Product)
+                 .options(joinedload(models.Product.category),
+                          joinedload(models.Product.variants)))
+        if category_id is not None:
+            query = query.filter(models.Product.category_id.in_(category_tree.subtree_ids(category_id)))
+        products = query.offset(skip).limit(limit).all()
         
         # Validate and process products
         validated_products = []
@@ -312,6 +319,7 @@ def update_product(product_id: int, product_update: ProductUpdate, db: Session =
         setattr(db_product, key, value)
     
     db.commit()
+    category_tree_cache.invalidate()
     db.refresh(db_product)
     return db_product
 
@@ -323,74 +331,67 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_product)
     db.commit()
+    category_tree_cache.invalidate()
     return db_product
 
+def _record_barcode_upload(db: Session, queue, barcode: str, temp_path: str, content_hash: str, extension: str) -> dict:
+    # Find the variant with this barcode
+    variant = db.query(models.Variant).filter(models.Variant.barcode == barcode).first()
+    if not variant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f"Variant with barcode {barcode} not found"
+        )
+    
+    # Get the product for this variant
+    product = product_images.lock_product(db, variant.product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f"Product not found for variant with barcode {barcode}"
+        )
+    
+    # The product's first image becomes its main image
+    image = product_images.add_image(db, product, temp_path, content_hash, extension, barcode=barcode)
+    db.commit()
+    
+    product_images.queue_sizes(queue, image)
+    return {"filename": os.path.basename(image.url), "image_url": image.url}
+
 # Create an endpoint to handle file uploads for product images
 @router.post("/upload-image/{barcode}")
-async def upload_product_image(barcode: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_product_image(barcode: str, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Upload an image for a product variant with the specified barcode.
-    The image will be stored in a directory named after the barcode.
+    The image is stored by content and recorded against the barcode.
+    Resized copies are generated in the background.
     """
+    temp_path = None
     try:
-        # Find the variant with this barcode
-        variant = db.query(models.Variant).filter(models.Variant.barcode == barcode).first()
-        if not variant:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Variant with barcode {barcode} not found"
-            )
-        
-        # Get the product for this variant
-        product_id = variant.product_id
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail=f"Product not found for variant with barcode {barcode}"
-            )
-            
-        # Create directory for this product's images
-        product_dir = f"static/images/products/{barcode}"
-        os.makedirs(product_dir, exist_ok=True)
-        
-        # Check how many images already exist for this product
-        existing_files = os.listdir(product_dir) if os.path.exists(product_dir) else []
-        image_number = len(existing_files) + 1
-        
-        # Generate a unique filename for the image
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"product_{image_number}{file_extension}"
-        file_path = os.path.join(product_dir, unique_filename)
-        
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Update the product image URL
-        # If it's the first image, update the main image_url
-        # Ensure consistent forward slashes for URL paths
-        image_url = f"/{product_dir}/{unique_filename}".replace('\\', '/')
-        
-        print(f"[API DEBUG] Created image URL: {image_url}")
-        
-        if image_number == 1:
-            product.image_url = image_url
-        
-        db.commit()
-        
-        return {"filename": unique_filename, "image_url": image_url}
+        temp_path, content_hash, extension = await images.receive_upload(file, MAX_IMAGE_UPLOAD_BYTES)
+        # The session is synchronous too; keep it off the event loop
+        return await run_in_threadpool(
+            _record_barcode_upload, db, request.app.state.image_queue, barcode,
+            temp_path, content_hash, extension
+        )
+    except images.ImageTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except images.UnsupportedImageError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error uploading image: {str(e)}"
         )
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
 
 # Also add a utility endpoint to generate a unique barcode
 @router.get("/generate-barcode")
-async def generate_unique_barcode(db: Session = Depends(get_db)):
+def generate_unique_barcode(db: Session = Depends(get_db)):
     """Generate a unique barcode that doesn't exist in the database."""
     try:
         while True:
@@ -408,7 +409,7 @@ async def generate_unique_barcode(db: Session = Depends(get_db)):
         )
 
 @router.get("/product-images/{barcode}")
-async def get_product_images(barcode: str, db: Session = Depends(get_db)):
+def get_product_images(barcode: str, db: Session = Depends(get_db)):
     """Get all images for a product with the specified barcode."""
     try:
         # Find the variant with this barcode
@@ -428,29 +429,11 @@ async def get_product_images(barcode: str, db: Session = Depends(get_db)):
                 detail=f"Product not found for variant with barcode {barcode}"
             )
             
-        # Check the product's image directory
-        product_dir = f"static/images/products/{barcode}"
-        if not os.path.exists(product_dir):
-            print(f"[API DEBUG] Image directory not found for barcode {barcode}: {product_dir}")
-            return {"images": []}
-            
-        # Get all image files in this directory
-        image_files = [f for f in os.listdir(product_dir) 
-                      if os.path.isfile(os.path.join(product_dir, f)) and 
-                      f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))]
-        
-        print(f"[API DEBUG] Found {len(image_files)} images for barcode {barcode} in {product_dir}")
-        print(f"[API DEBUG] Image files: {image_files}")
-        
-        # Create URLs for all images with proper forward slashes
-        # Replace os.path.join with explicit path construction using forward slashes
-        image_urls = [f"/{product_dir}/{img}".replace('\\', '/') for img in image_files]
-        
-        print(f"[API DEBUG] Returning {len(image_urls)} image URLs")
-        # Add debugging to see actual URLs being returned
-        if image_urls:
-            print(f"[API DEBUG] Sample URL: {image_urls[0]}")
-        return {"images": image_urls, "main_image": product.image_url}
+        rows = product_images.list_images(db, product_id, barcode=barcode)
+        image_urls = [row.url for row in rows]
+        # Small JPEGs for grids, aligned with images (None until generated)
+        thumbnails = [images.thumbnail_url(images.size_urls(row.url)) if row.sizes_ready else None for row in rows]
+        return {"images": image_urls, "thumbnails": thumbnails, "main_image": product.image_url}
     except HTTPException:
         raise
     except Exception as e:
@@ -464,7 +447,7 @@ async def get_product_images(barcode: str, db: Session = Depends(get_db)):
         )
 
 @router.delete("/product-image/{barcode}/{filename}")
-async def delete_product_image(barcode: str, filename: str, db: Session = Depends(get_db)):
+def delete_product_image(barcode: str, filename: str, db: Session = Depends(get_db)):
     """Delete a specific image for a product with the specified barcode."""
     try:
         # Find the variant with this barcode
@@ -484,44 +467,26 @@ async def delete_product_image(barcode: str, filename: str, db: Session = Depend
                 detail=f"Product not found for variant with barcode {barcode}"
             )
             
-        # Check the product's image directory
-        product_dir = f"static/images/products/{barcode}"
-        if not os.path.exists(product_dir):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No image directory found for product with barcode {barcode}"
-            )
-            
-        # Create full file path
-        file_path = os.path.join(product_dir, filename)
-        
-        # Ensure the file exists and is within the product directory
-        if not os.path.exists(file_path) or not os.path.isfile(file_path):
+        # Stored by content, or under the barcode directory if uploaded before
+        image = db.query(models.ProductImage).filter(
+            models.ProductImage.product_id == product_id,
+            models.ProductImage.barcode == barcode,
+            models.ProductImage.url.in_([
+                images.content_url(filename),
+                f"/static/images/products/{barcode}/{filename}"
+            ])
+        ).first()
+        if not image:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Image file not found"
             )
             
-        # Check if it's the main image
-        image_url = f"/{file_path}"
-        if product.image_url == image_url:
-            # If deleting the main image, check if there are other images to set as main
-            other_images = [f for f in os.listdir(product_dir) 
-                           if os.path.isfile(os.path.join(product_dir, f)) 
-                           and f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif'))
-                           and f != filename]
-            
-            if other_images:
-                # Set first alternative as the main image
-                product.image_url = f"/{os.path.join(product_dir, other_images[0])}"
-            else:
-                # No other images, clear the image URL
-                product.image_url = None
-                
-            db.commit()
-        
-        # Delete the file
-        os.remove(file_path)
+        # If it was the main image, the next one takes over
+        if product_images.remove_image(db, product, image):
+            # No other product uses the file; delete it under the content lock
+            images.remove_file(image.url)
+        db.commit()
         
         return {"message": "Image deleted successfully"}
     except HTTPException:
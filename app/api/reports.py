@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, and_, Date
+from app.db.session import SessionLocal
+from app.db import models
+from app.api.auth import get_current_admin_user
+from app.schemas.report import PnLReport, PnLPeriod, ExpenseCategoryAmount, ReportGranularity
+from typing import Dict, List, Optional
+from decimal import Decimal
+from datetime import date, timedelta
+
+router = APIRouter()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Orders count towards revenue once delivered
+RECOGNIZED_ORDER_STATUSES = ("delivered",)
+
+_MONTHS_PER_PERIOD = {
+    ReportGranularity.MONTH: 1,
+    ReportGranularity.QUARTER: 3,
+    ReportGranularity.YEAR: 12,
+}
+
+def _period_start(value: date, granularity: ReportGranularity) -> date:
+    """Python equivalent of Postgres date_trunc for the report granularities."""
+    months = _MONTHS_PER_PERIOD[granularity]
+    return date(value.year, (value.month - 1) // months * months + 1, 1)
+
+def _next_period(value: date, granularity: ReportGranularity) -> date:
+    index = value.year * 12 + value.month - 1 + _MONTHS_PER_PERIOD[granularity]
+    return date(index // 12, index % 12 + 1, 1)
+
+def _percent(part: Decimal, whole: Decimal) -> float:
+    return round(float(part / whole * 100), 2) if whole else 0.0
+
+def _period_totals(start: date, end: date, sales: Decimal, orders: Decimal, cogs: Decimal,
+                   expenses: Dict[str, Decimal]) -> PnLPeriod:
+    revenue = sales + orders
+    gross_profit = revenue - cogs
+    total_expenses = sum(expenses.values(), Decimal("0"))
+    net_profit = gross_profit - total_expenses
+    return PnLPeriod(
+        period_start=start,
+        period_end=end,
+        sales_revenue=float(sales),
+        order_revenue=float(orders),
+        revenue=float(revenue),
+        cogs=float(cogs),
+        gross_profit=float(gross_profit),
+        gross_margin_percent=_percent(gross_profit, revenue),
+        expenses=[
+            ExpenseCategoryAmount(category=category, amount=float(amount))
+            for category, amount in sorted(expenses.items(), key=lambda item: item[1], reverse=True)
+        ],
+        total_expenses=float(total_expenses),
+        net_profit=float(net_profit),
+        net_margin_percent=_percent(net_profit, revenue)
+    )
+
+def _compute_pnl(db: Session, start: date, end: date, granularity: ReportGranularity) -> PnLReport:
+    """One grouped query each for sales, orders and expenses; periods are merged in Python."""
+    range_end = end + timedelta(days=1)
+
+    # In-store sales: revenue and cost from the daily rollup, one row per day
+    totals = models.SalesDailyTotal
+    sales_period = cast(func.date_trunc(granularity.value, totals.day), Date)
+    sales_rows = db.query(
+        sales_period.label("period"),
+        func.sum(totals.revenue).label("revenue"),
+        func.sum(totals.cost).label("cost")
+    ).filter(
+        totals.day >= start,
+        totals.day <= end
+    ).group_by(sales_period).all()
+
+    # Delivered online orders, valued from their lines
+    order_period = cast(func.date_trunc(granularity.value, models.Order.order_time), Date)
+    order_rows = db.query(
+        order_period.label("period"),
+        func.sum(models.OrderItem.quantity * models.OrderItem.price).label("revenue"),
+        func.sum(models.OrderItem.quantity * models.OrderItem.unit_cost).label("cost")
+    ).select_from(models.Order).join(
+        models.OrderItem,
+        and_(
+            models.OrderItem.order_id == models.Order.id,
+            models.OrderItem.order_time == models.Order.order_time
+        )
+    ).filter(
+        models.Order.status.in_(RECOGNIZED_ORDER_STATUSES),
+        models.Order.order_time >= start,
+        models.Order.order_time < range_end
+    ).group_by(order_period).all()
+
+    expense_period = cast(func.date_trunc(granularity.value, models.Expense.expense_date), Date)
+    expense_rows = db.query(
+        expense_period.label("period"),
+        models.Expense.category,
+        func.sum(models.Expense.amount).label("amount")
+    ).filter(
+        models.Expense.expense_date >= start,
+        models.Expense.expense_date < range_end
+    ).group_by(expense_period, models.Expense.category).all()
+
+    zero = Decimal("0")
+    sales_by_period = {row.period: (row.revenue or zero, row.cost or zero) for row in sales_rows}
+    orders_by_period = {row.period: (row.revenue or zero, row.cost or zero) for row in order_rows}
+    expenses_by_period: Dict[date, Dict[str, Decimal]] = {}
+    for row in expense_rows:
+        expenses_by_period.setdefault(row.period, {})[row.category] = row.amount or zero
+
+    periods: List[PnLPeriod] = []
+    all_sales = all_orders = all_cogs = zero
+    all_expenses: Dict[str, Decimal] = {}
+    current = _period_start(start, granularity)
+    while current <= end:
+        following = _next_period(current, granularity)
+        sales_revenue, sales_cost = sales_by_period.get(current, (zero, zero))
+        order_revenue, order_cost = orders_by_period.get(current, (zero, zero))
+        expenses = expenses_by_period.get(current, {})
+        periods.append(_period_totals(
+            max(current, start), min(following - timedelta(days=1), end),
+            sales_revenue, order_revenue, sales_cost + order_cost, expenses
+        ))
+        all_sales += sales_revenue
+        all_orders += order_revenue
+        all_cogs += sales_cost + order_cost
+        for category, amount in expenses.items():
+            all_expenses[category] = all_expenses.get(category, zero) + amount
+        current = following
+
+    return PnLReport(
+        start_date=start,
+        end_date=end,
+        granularity=granularity,
+        periods=periods,
+        totals=_period_totals(start, end, all_sales, all_orders, all_cogs, all_expenses)
+    )
+
+@router.get("/pnl", response_model=PnLReport)
+def get_pnl_report(
+    from_date: Optional[date] = Query(None, alias="from", description="First day (default: start of this year)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    granularity: ReportGranularity = ReportGranularity.MONTH,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Profit and loss per period: revenue, COGS, gross margin, expenses by category and net profit."""
+    to_date = to_date or date.today()
+    from_date = from_date or date(to_date.year, 1, 1)
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must not be after to"
+        )
+
+    try:
+        return _compute_pnl(db, from_date, to_date, granularity)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing P&L report: {str(e)}"
+        )
@@ -1,8 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert, update, values, column, Integer, Numeric
 from app.db.session import SessionLocal
 from app.db import models
-from app.schemas.sale import SaleCreate, SaleOut, SaleItemBase
+from app.db.partitions import ensure_partitions
+from app.db import rollups
+from app.db import customer_stats
+from app.core.cache import stats_cache
+from app.core import events
+from app.schemas.sale import SaleCreate, SaleOut, SaleItemBase, SaleBatchCreate, SaleBatchResult, SaleBatchOutcome
 from typing import List
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
@@ -131,12 +137,22 @@ def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
         # Convert total to Decimal for precision
         total = Decimal(str(sale.total)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
         
+        if sale.customer_id is not None:
+            customer = db.query(models.Customer.id).filter(models.Customer.id == sale.customer_id).first()
+            if not customer:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Customer {sale.customer_id} not found"
+                )
+        
         # Create the sale record
-        db_sale = models.Sale(total=total)
+        db_sale = models.Sale(total=total, customer_id=sale.customer_id)
         db.add(db_sale)
         db.flush()  # Get the sale.id
         
         # Process each item
+        rollup_lines = []
+        stock_levels = {}
         for item in sale.items:
             # Get the variant with product preloaded
             variant = db.query(models.Variant).options(
@@ -159,11 +175,13 @@ def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
             
             # Convert quantity and check inventory
             quantity = Decimal(str(item.quantity)).quantize(Decimal('0.003'), rounding=ROUND_HALF_UP)
-            if variant.quantity < quantity:
+            # Stock reserved by open orders isn't for sale
+            available = variant.quantity - variant.reserved_quantity
+            if available < quantity:
                 db.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Not enough items in stock for variant {item.variant_id}. Available: {variant.quantity}"
+                    detail=f"Not enough items in stock for variant {item.variant_id}. Available: {available}"
                 )
             
             # Convert price to Decimal with proper precision
@@ -172,16 +190,29 @@ def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
             # Create sale item record
             db_sale_item = models.SaleItem(
                 sale_id=db_sale.id,
+                sale_time=db_sale.sale_time,
                 variant_id=item.variant_id,
                 quantity=quantity,
-                price=price
+                price=price,
+                unit_cost=variant.cost_price or Decimal('0')
             )
             db.add(db_sale_item)
+            rollup_lines.append((item.variant_id, quantity, price, db_sale_item.unit_cost))
             
             # Update inventory with proper decimal handling
             variant.quantity = (variant.quantity - quantity).quantize(Decimal('0.003'), rounding=ROUND_HALF_UP)
+            stock_levels[variant.id] = (variant.quantity, variant.quantity - variant.reserved_quantity)
+        
+        # Keep the daily stats rollups in step within the same transaction
+        rollups.record_sale(db, db_sale.sale_time, rollup_lines)
+        customer_stats.record_purchase(db, db_sale.customer_id, db_sale.sale_time, total, customer_stats.SALE)
+        
+        # Delivered to /events/stream subscribers once the transaction commits
+        events.publish(db, events.SALE_CREATED, sale_id=db_sale.id, total=total, items=len(rollup_lines))
+        events.publish_stock(db, [(variant_id, *levels) for variant_id, levels in stock_levels.items()])
         
         db.commit()
+        stats_cache.invalidate()
         
         # Load all relationships for response
         return _load_sale_with_relationships(db, sale=db_sale)
@@ -201,6 +232,150 @@ def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
             detail=f"Error creating sale: {str(e)}"
         )
 
+@router.post("/batch", response_model=SaleBatchResult)
+def create_sales_batch(batch: SaleBatchCreate, db: Session = Depends(get_db)):
+    """Ingest many sales in one transaction.
+
+    All referenced variants are locked and validated in a single query, stock is
+    decremented with one set-based UPDATE and sales/sale_items are bulk inserted.
+    A sale that references a missing variant or exceeds the remaining stock is
+    rejected on its own without aborting the rest of the batch.
+    """
+    try:
+        variant_ids = {item.variant_id for sale in batch.sales for item in sale.items if item.variant_id is not None}
+
+        # Lock every referenced variant once so concurrent sales can't oversell
+        stock = {}
+        if variant_ids:
+            rows = db.query(
+                models.Variant.id, models.Variant.product_id, models.Variant.available_quantity, models.Variant.cost_price
+            ).filter(models.Variant.id.in_(variant_ids)).with_for_update().all()
+            stock = {row.id: row for row in rows}
+        remaining = {variant_id: row.available_quantity for variant_id, row in stock.items()}
+
+        customer_ids = {sale.customer_id for sale in batch.sales if sale.customer_id is not None}
+        known_customers = set()
+        if customer_ids:
+            known_customers = {row.id for row in db.query(models.Customer.id).filter(models.Customer.id.in_(customer_ids)).all()}
+
+        results = []
+        accepted = []  # (index, sale, items, rollup lines)
+        decrements = {}
+        for index, sale in enumerate(batch.sales):
+            items = []
+            lines = []
+            needed = {}
+            error = None
+            if sale.customer_id is not None and sale.customer_id not in known_customers:
+                error = f"Customer {sale.customer_id} not found"
+            for item in ([] if error else sale.items):
+                row = stock.get(item.variant_id)
+                if row is None:
+                    error = f"Variant {item.variant_id} not found"
+                    break
+                if row.product_id is None:
+                    error = f"Product data missing for variant {item.variant_id}"
+                    break
+                quantity = Decimal(str(item.quantity)).quantize(Decimal('0.003'), rounding=ROUND_HALF_UP)
+                price = Decimal(str(item.price)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                needed[item.variant_id] = needed.get(item.variant_id, Decimal('0')) + quantity
+                unit_cost = row.cost_price or Decimal('0')
+                items.append({"variant_id": item.variant_id, "quantity": quantity, "price": price, "unit_cost": unit_cost})
+                lines.append((item.variant_id, quantity, price, unit_cost))
+
+            if error is None:
+                for variant_id, quantity in needed.items():
+                    if remaining[variant_id] < quantity:
+                        error = f"Not enough items in stock for variant {variant_id}. Available: {remaining[variant_id]}"
+                        break
+
+            if error is not None:
+                results.append(SaleBatchOutcome(index=index, success=False, error=error))
+                continue
+
+            for variant_id, quantity in needed.items():
+                remaining[variant_id] -= quantity
+                decrements[variant_id] = decrements.get(variant_id, Decimal('0')) + quantity
+            accepted.append((index, sale, items, lines))
+            results.append(SaleBatchOutcome(index=index, success=True))
+
+        if accepted:
+            # Historical imports may land in months that have no partition yet
+            sale_times = [sale.sale_time for _, sale, _, _ in accepted if sale.sale_time is not None]
+            if sale_times:
+                ensure_partitions(db, min(sale_times), max(sale_times), tables=("sales", "sale_items"))
+
+            sale_rows = []
+            for _, sale, _, _ in accepted:
+                sale_row = {
+                    "total": Decimal(str(sale.total)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                    "sale_time": sale.sale_time or datetime.now(),
+                    "payment_method": sale.payment_method or "cash",
+                    "customer_id": sale.customer_id,
+                }
+                sale_rows.append(sale_row)
+
+            sale_ids = db.execute(
+                insert(models.Sale).returning(models.Sale.id, sort_by_parameter_order=True),
+                sale_rows
+            ).scalars().all()
+
+            item_rows = []
+            for sale_id, sale_row, (index, _, items, _) in zip(sale_ids, sale_rows, accepted):
+                results[index].sale_id = sale_id
+                for item in items:
+                    item_rows.append({"sale_id": sale_id, "sale_time": sale_row["sale_time"], **item})
+            # Sales without items (and so without stock changes) are valid
+            if item_rows:
+                db.execute(insert(models.SaleItem), item_rows)
+
+            # Apply the aggregated stock decrements in one statement
+            stock_levels = []
+            if decrements:
+                deltas = values(
+                    column("id", Integer), column("quantity", Numeric(10, 3)), name="deltas"
+                ).data(list(decrements.items()))
+                stock_levels = db.execute(
+                    update(models.Variant)
+                    .where(models.Variant.id == deltas.c.id)
+                    .values(quantity=models.Variant.quantity - deltas.c.quantity)
+                    .returning(models.Variant.id, models.Variant.quantity, models.Variant.available_quantity)
+                    .execution_options(synchronize_session=False)
+                ).all()
+
+            rollups.record_sales(db, [
+                (sale_row["sale_time"], lines) for sale_row, (_, _, _, lines) in zip(sale_rows, accepted)
+            ])
+
+            customer_stats.record_purchases(db, [
+                (sale_row["customer_id"], sale_row["sale_time"], sale_row["total"], customer_stats.SALE, 1)
+                for sale_row in sale_rows
+            ])
+
+            for i in range(0, len(sale_ids), events.EVENT_CHUNK_SIZE):
+                events.publish(db, events.SALE_CREATED, sale_ids=sale_ids[i:i + events.EVENT_CHUNK_SIZE])
+            if stock_levels:
+                events.publish_stock(db, stock_levels)
+
+        db.commit()
+        if accepted:
+            stats_cache.invalidate()
+
+        return SaleBatchResult(
+            accepted=len(accepted),
+            rejected=len(results) - len(accepted),
+            results=results
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating sales batch: {str(e)}"
+        )
+
 @router.get("/{sale_id}", response_model=SaleOut)
 def get_sale(sale_id: int, db: Session = Depends(get_db)):
     try:
@@ -260,7 +435,12 @@ def clear_all_sales(db: Session = Depends(get_db)):
         # Then delete all sales
         num_deleted = db.query(models.Sale).delete()
         
-        db.commit()
+        # Nothing left to aggregate
+        rollups.clear_rollups(db)
+        
+        # Customer metrics keep only their orders; rebuilding also commits
+        customer_stats.rebuild_customer_stats(db)
+        stats_cache.invalidate()
         return {"message": f"Successfully cleared {num_deleted} sales from database"}
     except Exception as e:
         db.rollback()
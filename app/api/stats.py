@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct, extract
+from sqlalchemy import func, distinct, extract, cast, and_, TIMESTAMP
 from app.db.session import SessionLocal
 from app.db import models
-from app.schemas.stats import StatsSummary, InventorySummary, ProductSaleSummary, SalesOverTime, ProductStats
-from typing import List
+from app.core.cache import stats_cache
+from app.core import replenishment
+from app.schemas.stats import (
+    StatsSummary, InventorySummary, ProductSaleSummary, SalesOverTime, ProductStats, MarginStats,
+    TimeSeries, TimeSeriesGroup, TimeGranularity, TimeSeriesGroupBy, ReorderSuggestion
+)
+from typing import List, Optional
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
+import numpy as np
 
 router = APIRouter()
 
@@ -17,44 +23,71 @@ def get_db():
     finally:
         db.close()
 
+def _day_filters(day_column, start_date: Optional[date], end_date: Optional[date]) -> list:
+    """Inclusive date range predicates on a rollup table's day column."""
+    filters = []
+    if start_date is not None:
+        filters.append(day_column >= start_date)
+    if end_date is not None:
+        filters.append(day_column <= end_date)
+    return filters
+
+
+def _margin_percent(revenue: float, cost: float) -> float:
+    return round((revenue - cost) / revenue * 100, 2) if revenue else 0.0
+
 
 @router.get("", response_model=StatsSummary)
 @router.get("/", response_model=StatsSummary)
 @router.get("/summary", response_model=StatsSummary)
-def get_stats_summary(db: Session = Depends(get_db)):
+def get_stats_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    return stats_cache.get_or_compute(
+        ("summary", start_date, end_date),
+        lambda: _compute_stats_summary(db, start_date, end_date)
+    )
+
+def _compute_stats_summary(db: Session, start_date: Optional[date], end_date: Optional[date]) -> StatsSummary:
     try:
         print("Calculating stats...")
+        totals = models.SalesDailyTotal
+        rollup = models.SalesDailyRollup
         
-        # Calculate total sales items and revenue with explicit joins
+        # Totals come from the per-day rollup, one row per day
         sales_stats = db.query(
-            func.count(distinct(models.Sale.id)).label('total_transactions'),
-            func.coalesce(func.sum(models.SaleItem.quantity), 0).label('total_items'),
-            func.coalesce(func.sum(models.SaleItem.quantity * models.SaleItem.price), 0).label('total_revenue')
-        ).select_from(models.Sale).join(
-            models.SaleItem, models.SaleItem.sale_id == models.Sale.id
-        ).first()
+            func.coalesce(func.sum(totals.transactions), 0).label('total_transactions'),
+            func.coalesce(func.sum(totals.quantity), 0).label('total_items'),
+            func.coalesce(func.sum(totals.revenue), 0).label('total_revenue'),
+            func.coalesce(func.sum(totals.cost), 0).label('total_cost')
+        ).filter(*_day_filters(totals.day, start_date, end_date)).first()
         
-        total_transactions = sales_stats.total_transactions if sales_stats else 0
+        total_transactions = int(sales_stats.total_transactions or 0) if sales_stats else 0
         total_items = float(sales_stats.total_items or 0)
         total_revenue = float(sales_stats.total_revenue or 0)
+        total_cost = float(sales_stats.total_cost or 0)
+        total_profit = total_revenue - total_cost
         
         print(f"Total transactions: {total_transactions}")
         print(f"Total items sold: {total_items}")
         print(f"Total revenue: {total_revenue}")
 
-        # Get top products with explicit joins
+        # Get top products from the per-day, per-variant rollup
         top_products_query = (
             db.query(
                 models.Product.id,
                 models.Product.name,
-                func.sum(models.SaleItem.quantity).label('total_sales'),
-                func.sum(models.SaleItem.quantity * models.SaleItem.price).label('total_revenue')
+                func.sum(rollup.quantity).label('total_sales'),
+                func.sum(rollup.revenue).label('total_revenue')
             )
-            .select_from(models.Product)
-            .join(models.Variant, models.Variant.product_id == models.Product.id)
-            .join(models.SaleItem, models.SaleItem.variant_id == models.Variant.id)
+            .select_from(rollup)
+            .join(models.Variant, models.Variant.id == rollup.variant_id)
+            .join(models.Product, models.Product.id == models.Variant.product_id)
+            .filter(*_day_filters(rollup.day, start_date, end_date))
             .group_by(models.Product.id, models.Product.name)
-            .order_by(func.sum(models.SaleItem.quantity * models.SaleItem.price).desc())
+            .order_by(func.sum(rollup.revenue).desc())
             .limit(5)
             .all()
         )
@@ -77,7 +110,9 @@ def get_stats_summary(db: Session = Depends(get_db)):
             total_sales=total_items,
             total_orders=total_transactions,
             total_revenue=total_revenue,
-            total_profit=total_revenue * 0.3,  # Using 30% profit margin
+            total_profit=total_profit,  # From unit costs captured at sale time
+            total_cost=total_cost,
+            margin_percent=_margin_percent(total_revenue, total_cost),
             top_products=top_products
         )
         
@@ -93,22 +128,22 @@ def get_stats_summary(db: Session = Depends(get_db)):
 
 @router.get("/sales-over-time", response_model=List[SalesOverTime])
 def get_sales_over_time(db: Session = Depends(get_db)):
+    return stats_cache.get_or_compute(("sales-over-time",), lambda: _compute_sales_over_time(db))
+
+def _compute_sales_over_time(db: Session) -> List[SalesOverTime]:
     try:
         # Get daily sales for the last 30 days
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        thirty_days_ago = (datetime.now() - timedelta(days=30)).date()
+        totals = models.SalesDailyTotal
         
         daily_sales = db.query(
-            func.date(models.Sale.sale_time).label('date'),
-            func.sum(models.SaleItem.quantity * models.SaleItem.price).label('revenue'),
-            func.count(distinct(models.Sale.id)).label('num_sales')
-        ).join(
-            models.SaleItem
+            totals.day.label('date'),
+            totals.revenue.label('revenue'),
+            totals.transactions.label('num_sales')
         ).filter(
-            models.Sale.sale_time >= thirty_days_ago
-        ).group_by(
-            func.date(models.Sale.sale_time)
+            totals.day >= thirty_days_ago
         ).order_by(
-            func.date(models.Sale.sale_time)
+            totals.day
         ).all()
         
         return [
@@ -164,23 +199,38 @@ def get_inventory_summary(db: Session = Depends(get_db)):
         )
 
 @router.get("/top-products", response_model=List[ProductSaleSummary])
-def get_top_products(db: Session = Depends(get_db)):
+def get_top_products(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    return stats_cache.get_or_compute(
+        ("top-products", start_date, end_date),
+        lambda: _compute_top_products(db, start_date, end_date)
+    )
+
+def _compute_top_products(db: Session, start_date: Optional[date], end_date: Optional[date]) -> List[ProductSaleSummary]:
     try:
-        # Get sales data for products
+        # Get sales data for products from the per-day, per-variant rollup
+        rollup = models.SalesDailyRollup
         product_sales = db.query(
             models.Product.id,
             models.Product.name,
-            func.coalesce(func.sum(models.SaleItem.quantity), 0).label('total_quantity'),
-            func.coalesce(func.sum(models.SaleItem.quantity * models.SaleItem.price), 0).label('total_revenue')
+            func.coalesce(func.sum(rollup.quantity), 0).label('total_quantity'),
+            func.coalesce(func.sum(rollup.revenue), 0).label('total_revenue')
+        ).select_from(
+            rollup
         ).join(
-            models.Variant
+            models.Variant, models.Variant.id == rollup.variant_id
         ).join(
-            models.SaleItem
+            models.Product, models.Product.id == models.Variant.product_id
+        ).filter(
+            *_day_filters(rollup.day, start_date, end_date)
         ).group_by(
             models.Product.id,
             models.Product.name
         ).order_by(
-            func.sum(models.SaleItem.quantity).desc()
+            func.sum(rollup.quantity).desc()
         ).limit(10).all()
         
         return [
@@ -196,4 +246,392 @@ def get_top_products(db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting top products: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/cache-metrics")
+def get_cache_metrics():
+    """Hit/recompute counters of the stats result cache (per worker process)."""
+    return stats_cache.metrics()
+
+def _compute_margins(db: Session, group_by: str, start_date: Optional[date], end_date: Optional[date], limit: int) -> List[MarginStats]:
+    try:
+        rollup = models.SalesDailyRollup
+        if group_by == "category":
+            key, name = models.Category.id, models.Category.name
+        else:
+            key, name = models.Product.id, models.Product.name
+
+        query = db.query(
+            key.label('id'),
+            name.label('name'),
+            func.sum(rollup.quantity).label('quantity'),
+            func.sum(rollup.revenue).label('revenue'),
+            func.sum(rollup.cost).label('cost')
+        ).select_from(
+            rollup
+        ).join(
+            models.Variant, models.Variant.id == rollup.variant_id
+        ).join(
+            models.Product, models.Product.id == models.Variant.product_id
+        )
+        if group_by == "category":
+            query = query.join(models.Category, models.Category.id == models.Product.category_id)
+
+        rows = query.filter(
+            *_day_filters(rollup.day, start_date, end_date)
+        ).group_by(
+            key, name
+        ).order_by(
+            (func.sum(rollup.revenue) - func.sum(rollup.cost)).desc()
+        ).limit(limit).all()
+
+        return [
+            MarginStats(
+                id=row.id,
+                name=row.name,
+                quantity=float(row.quantity or 0),
+                revenue=float(row.revenue or 0),
+                cost=float(row.cost or 0),
+                profit=float((row.revenue or 0) - (row.cost or 0)),
+                margin_percent=_margin_percent(float(row.revenue or 0), float(row.cost or 0))
+            )
+            for row in rows
+        ]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting {group_by} margins: {str(e)}"
+        )
+
+@router.get("/margins/products", response_model=List[MarginStats])
+def get_product_margins(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Revenue, cost and gross margin per product, from the daily rollups."""
+    return stats_cache.get_or_compute(
+        ("margins", "product", start_date, end_date, limit),
+        lambda: _compute_margins(db, "product", start_date, end_date, limit)
+    )
+
+@router.get("/margins/categories", response_model=List[MarginStats])
+def get_category_margins(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Revenue, cost and gross margin per category, from the daily rollups."""
+    return stats_cache.get_or_compute(
+        ("margins", "category", start_date, end_date, limit),
+        lambda: _compute_margins(db, "category", start_date, end_date, limit)
+    )
+
+# Upper bound on buckets x groups returned by /timeseries
+MAX_TIMESERIES_BUCKETS = 5000
+
+def _truncate(value: datetime, granularity: TimeGranularity) -> datetime:
+    """Python equivalent of Postgres date_trunc for the supported granularities."""
+    if granularity == TimeGranularity.HOUR:
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == TimeGranularity.WEEK:
+        return value - timedelta(days=value.weekday())
+    if granularity == TimeGranularity.MONTH:
+        return value.replace(day=1)
+    return value
+
+def _next_bucket(value: datetime, granularity: TimeGranularity) -> datetime:
+    if granularity == TimeGranularity.HOUR:
+        return value + timedelta(hours=1)
+    if granularity == TimeGranularity.DAY:
+        return value + timedelta(days=1)
+    if granularity == TimeGranularity.WEEK:
+        return value + timedelta(days=7)
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _bucket_starts(start: datetime, end: datetime, granularity: TimeGranularity) -> List[datetime]:
+    buckets = []
+    current = _truncate(start, granularity)
+    while current < end:
+        buckets.append(current)
+        if len(buckets) > MAX_TIMESERIES_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many buckets; use a coarser granularity or a shorter range (max {MAX_TIMESERIES_BUCKETS})"
+            )
+        current = _next_bucket(current, granularity)
+    return buckets
+
+def _timeseries_query(db: Session, granularity: TimeGranularity, group_by: Optional[TimeSeriesGroupBy],
+                      start: datetime, end: datetime):
+    """Build the single grouped query for /timeseries and name its source.
+
+    Day-or-coarser series that are ungrouped or grouped by product/category
+    read the daily rollups; hourly series and payment method groups scan
+    sales/sale_items and wilaya groups scan orders/order_items, bounded on the
+    partition keys so only the months in range are touched.
+    """
+    key = label = None
+
+    if group_by == TimeSeriesGroupBy.WILAYA:
+        bucket = func.date_trunc(granularity.value, models.Order.order_time)
+        key = label = models.Order.wilaya
+        query = db.query(
+            bucket.label('bucket'), key.label('key'), label.label('label'),
+            func.sum(models.OrderItem.quantity * models.OrderItem.price).label('revenue'),
+            func.sum(models.OrderItem.quantity).label('quantity'),
+            func.count(distinct(models.Order.id)).label('transactions')
+        ).select_from(models.Order).join(
+            models.OrderItem,
+            and_(models.OrderItem.order_id == models.Order.id, models.OrderItem.order_time == models.Order.order_time)
+        ).filter(
+            models.Order.order_time >= start, models.Order.order_time < end,
+            models.OrderItem.order_time >= start, models.OrderItem.order_time < end,
+            models.Order.status != "cancelled"
+        )
+        return "orders", query.group_by(bucket, key)
+
+    use_rollup = granularity != TimeGranularity.HOUR and group_by != TimeSeriesGroupBy.PAYMENT_METHOD
+
+    if use_rollup and group_by is None:
+        totals = models.SalesDailyTotal
+        bucket = func.date_trunc(granularity.value, cast(totals.day, TIMESTAMP))
+        query = db.query(
+            bucket.label('bucket'),
+            func.sum(totals.revenue).label('revenue'),
+            func.sum(totals.quantity).label('quantity'),
+            func.sum(totals.transactions).label('transactions')
+        ).filter(totals.day >= start.date(), totals.day < end.date())
+        return "rollup", query.group_by(bucket)
+
+    if use_rollup:
+        rollup = models.SalesDailyRollup
+        bucket = func.date_trunc(granularity.value, cast(rollup.day, TIMESTAMP))
+        # Transactions are counted per variant, so a sale with two variants of
+        # the same product counts twice for that product
+        query = db.query(
+            bucket.label('bucket'),
+            func.sum(rollup.revenue).label('revenue'),
+            func.sum(rollup.quantity).label('quantity'),
+            func.sum(rollup.transactions).label('transactions')
+        ).select_from(rollup).filter(rollup.day >= start.date(), rollup.day < end.date())
+        source = "rollup"
+        item_variant_id = rollup.variant_id
+    else:
+        bucket = func.date_trunc(granularity.value, models.SaleItem.sale_time)
+        query = db.query(
+            bucket.label('bucket'),
+            func.sum(models.SaleItem.quantity * models.SaleItem.price).label('revenue'),
+            func.sum(models.SaleItem.quantity).label('quantity'),
+            func.count(distinct(models.SaleItem.sale_id)).label('transactions')
+        ).select_from(models.SaleItem).filter(
+            models.SaleItem.sale_time >= start, models.SaleItem.sale_time < end
+        )
+        source = "sales"
+        item_variant_id = models.SaleItem.variant_id
+
+    if group_by == TimeSeriesGroupBy.PAYMENT_METHOD:
+        key = label = models.Sale.payment_method
+        query = query.join(
+            models.Sale,
+            and_(models.Sale.id == models.SaleItem.sale_id, models.Sale.sale_time == models.SaleItem.sale_time)
+        ).filter(models.Sale.sale_time >= start, models.Sale.sale_time < end)
+    elif group_by == TimeSeriesGroupBy.PRODUCT:
+        key, label = models.Product.id, models.Product.name
+        query = query.join(models.Variant, models.Variant.id == item_variant_id).join(
+            models.Product, models.Product.id == models.Variant.product_id
+        )
+    elif group_by == TimeSeriesGroupBy.CATEGORY:
+        key, label = models.Category.id, func.coalesce(models.Category.name, "Uncategorized")
+        query = query.join(models.Variant, models.Variant.id == item_variant_id).join(
+            models.Product, models.Product.id == models.Variant.product_id
+        ).outerjoin(models.Category, models.Category.id == models.Product.category_id)
+
+    if key is None:
+        return source, query.group_by(bucket)
+    query = query.add_columns(key.label('key'), label.label('label'))
+    return source, query.group_by(bucket, key, label)
+
+def _compute_timeseries(db: Session, granularity: TimeGranularity, start_date: date, end_date: date,
+                        group_by: Optional[TimeSeriesGroupBy], limit: int) -> TimeSeries:
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    buckets = _bucket_starts(start, end, granularity)
+    # Rows may start before `start` when it isn't aligned to the granularity
+    positions = {bucket: index for index, bucket in enumerate(buckets)}
+
+    try:
+        source, query = _timeseries_query(db, granularity, group_by, start, end)
+        rows = query.all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing time series: {str(e)}"
+        )
+
+    # Zero-filled, bucket-aligned arrays per group
+    groups = {}
+    for row in rows:
+        key = str(row.key) if group_by is not None and row.key is not None else None
+        group = groups.get(key)
+        if group is None:
+            label = (row.label if group_by is not None else None) or ("Total" if group_by is None else "Unknown")
+            group = groups[key] = TimeSeriesGroup(
+                key=key, label=str(label),
+                revenue=[0.0] * len(buckets), quantity=[0.0] * len(buckets), transactions=[0] * len(buckets)
+            )
+        index = positions.get(_truncate(row.bucket, granularity))
+        if index is None:
+            continue
+        group.revenue[index] += float(row.revenue or 0)
+        group.quantity[index] += float(row.quantity or 0)
+        group.transactions[index] += int(row.transactions or 0)
+
+    series = sorted(groups.values(), key=lambda group: sum(group.revenue), reverse=True)[:limit]
+    if group_by is None and not series:
+        series = [TimeSeriesGroup(
+            label="Total", revenue=[0.0] * len(buckets), quantity=[0.0] * len(buckets), transactions=[0] * len(buckets)
+        )]
+
+    return TimeSeries(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        source=source,
+        buckets=buckets,
+        series=series
+    )
+
+@router.get("/timeseries", response_model=TimeSeries)
+def get_timeseries(
+    granularity: TimeGranularity = TimeGranularity.DAY,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Optional[TimeSeriesGroupBy] = None,
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of groups, by revenue"),
+    db: Session = Depends(get_db)
+):
+    """Revenue, quantity and transactions per time bucket, optionally per group.
+
+    Defaults to the last 30 days. Buckets with no sales are zero-filled.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+
+    return stats_cache.get_or_compute(
+        ("timeseries", granularity, start_date, end_date, group_by, limit),
+        lambda: _compute_timeseries(db, granularity, start_date, end_date, group_by, limit)
+    )
+
+def _compute_reorder_suggestions(db: Session, window_days: int, lead_time_days: int, review_days: int,
+                                 service_level: float, category_id: Optional[int], only_needed: bool,
+                                 limit: int) -> List[ReorderSuggestion]:
+    try:
+        variant_query = db.query(
+            models.Variant.id,
+            models.Variant.product_id,
+            models.Product.name,
+            models.Variant.size,
+            models.Variant.color,
+            models.Variant.barcode,
+            # Reserved units are already spoken for by open orders
+            models.Variant.available_quantity.label("quantity")
+        ).outerjoin(
+            models.Product, models.Product.id == models.Variant.product_id
+        )
+        if category_id is not None:
+            variant_query = variant_query.filter(models.Product.category_id == category_id)
+        variants = variant_query.order_by(models.Variant.id).all()
+        if not variants:
+            return []
+
+        variant_ids = np.fromiter((v.id for v in variants), dtype=np.int64, count=len(variants))
+        stock = np.fromiter((float(v.quantity or 0) for v in variants), dtype=np.float64, count=len(variants))
+
+        # Daily series come from the rollups: at most one row per variant and day
+        end_date = date.today()
+        start_date = end_date - timedelta(days=window_days - 1)
+        rollup = models.SalesDailyRollup
+        rows = db.query(
+            rollup.variant_id,
+            rollup.day - start_date,
+            rollup.quantity
+        ).filter(
+            rollup.variant_id != 0,
+            *_day_filters(rollup.day, start_date, end_date)
+        ).all()
+
+        if rows:
+            sold = np.array(rows, dtype=np.float64)
+            # Map variant ids to matrix rows; drop variants outside the selection
+            positions = np.searchsorted(variant_ids, sold[:, 0].astype(np.int64))
+            positions = np.minimum(positions, len(variant_ids) - 1)
+            known = variant_ids[positions] == sold[:, 0]
+            daily_sales = replenishment.daily_matrix(
+                positions[known], sold[known, 1].astype(np.int64), sold[known, 2],
+                len(variant_ids), window_days
+            )
+        else:
+            daily_sales = np.zeros((len(variant_ids), window_days))
+
+        result = replenishment.compute_reorder(daily_sales, stock, lead_time_days, review_days, service_level)
+
+        # Most urgent first: least days of cover, then largest suggested order
+        candidates = np.flatnonzero(result["needs_reorder"]) if only_needed else np.arange(len(variant_ids))
+        order = np.lexsort((-result["suggested_quantity"][candidates], result["days_of_cover"][candidates]))
+        selected = candidates[order[:limit]]
+
+        suggestions = []
+        for i in selected.tolist():
+            variant = variants[i]
+            days_of_cover = result["days_of_cover"][i]
+            suggestions.append(ReorderSuggestion(
+                variant_id=variant.id,
+                product_id=variant.product_id,
+                product_name=variant.name or "Unknown",
+                size=variant.size,
+                color=variant.color,
+                barcode=variant.barcode,
+                stock=float(stock[i]),
+                daily_velocity=round(float(result["velocity"][i]), 3),
+                daily_std=round(float(result["std"][i]), 3),
+                days_of_cover=round(float(days_of_cover), 1) if np.isfinite(days_of_cover) else None,
+                safety_stock=round(float(result["safety_stock"][i]), 3),
+                reorder_point=round(float(result["reorder_point"][i]), 3),
+                suggested_quantity=float(result["suggested_quantity"][i]),
+                needs_reorder=bool(result["needs_reorder"][i])
+            ))
+        return suggestions
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing reorder suggestions: {str(e)}"
+        )
+
+@router.get("/reorder-suggestions", response_model=List[ReorderSuggestion])
+def get_reorder_suggestions(
+    window_days: int = Query(90, ge=7, le=365, description="Days of sales history to use"),
+    lead_time_days: int = Query(replenishment.DEFAULT_LEAD_TIME_DAYS, ge=0, le=180),
+    review_days: int = Query(replenishment.DEFAULT_REVIEW_DAYS, ge=0, le=180, description="Days until the next restock review"),
+    service_level: float = Query(replenishment.DEFAULT_SERVICE_LEVEL, gt=0.5, lt=1),
+    category_id: Optional[int] = None,
+    only_needed: bool = Query(True, description="Only variants at or below their reorder point"),
+    limit: int = Query(100, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Variants to restock, most urgent first, with velocity, days of cover and order quantity."""
+    return stats_cache.get_or_compute(
+        ("reorder", window_days, lead_time_days, review_days, service_level, category_id, only_needed, limit),
+        lambda: _compute_reorder_suggestions(
+            db, window_days, lead_time_days, review_days, service_level, category_id, only_needed, limit
+        )
+    )
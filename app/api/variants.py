@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 from app.db.session import SessionLocal
 from app.db import models
+from app.core import events
 from app.schemas.variant import VariantCreate, VariantOut, VariantUpdate
 from typing import List
+from decimal import Decimal
 
 router = APIRouter()
 
@@ -79,6 +81,9 @@ def create_variant(variant: VariantCreate, db: Session = Depends(get_db)):
         )
         
         db.add(db_variant)
+        db.flush()
+        # New variants have nothing reserved
+        events.publish_stock(db, [(db_variant.id, db_variant.quantity, db_variant.quantity)])
         db.commit()
         db.refresh(db_variant)
         
@@ -115,9 +120,20 @@ def update_variant(variant_id: int, variant: VariantUpdate, db: Session = Depend
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
     
+    # Stock on hand can't drop below what open orders have reserved
+    reserved = db_variant.reserved_quantity or 0
+    if update_data.get("quantity") is not None and Decimal(str(update_data["quantity"])) < reserved:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Quantity can't be less than the {reserved} reserved by open orders"
+        )
+    
     for key, value in update_data.items():
         setattr(db_variant, key, value)
     
+    if "quantity" in update_data:
+        quantity = Decimal(str(db_variant.quantity or 0))
+        events.publish_stock(db, [(db_variant.id, quantity, quantity - reserved)])
     db.commit()
     db.refresh(db_variant)
     return db_variant
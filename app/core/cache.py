@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    """In-process result cache with TTLs and single-flight recomputation.
+
+    When an entry is missing or expired, the first caller computes it while
+    concurrent callers for the same key wait for that result instead of running
+    the same query. ``invalidate()`` bumps a generation counter so a computation
+    that started before the invalidation is neither stored as fresh nor joined
+    by later callers.
+
+    Endpoints run in FastAPI's threadpool, hence threading primitives.
+    """
+
+    def __init__(self, name: str, default_ttl: float = 30.0):
+        self.name = name
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (expires_at, value)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._recomputes = 0
+        self._errors = 0
+        self._invalidations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            # A computation started before invalidate() may miss the write
+            leader = flight is None or flight.generation != self._generation
+            if leader:
+                flight = _Flight(self._generation)
+                self._inflight[key] = flight
+                self._misses += 1
+            else:
+                self._waits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+            flight.value = value
+            with self._lock:
+                self._recomputes += 1
+                if flight.generation == self._generation:
+                    self._entries[key] = (time.monotonic() + ttl, value)
+            return value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    def invalidate(self) -> None:
+        """Drop every cached entry; in-flight results won't be stored or shared."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._invalidations += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses + self._waits
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "recomputes": self._recomputes,
+                "errors": self._errors,
+                "invalidations": self._invalidations,
+                "hit_ratio": (self._hits + self._waits) / lookups if lookups else 0.0,
+            }
+
+
+# Shared cache for the /stats endpoints, invalidated whenever sales change
+STATS_CACHE_TTL = 30  # seconds
+stats_cache = SingleFlightCache("stats", default_ttl=STATS_CACHE_TTL)
+
+# Category tree with product counts, invalidated on category and product writes
+CATEGORY_TREE_CACHE_TTL = 300  # seconds
+category_tree_cache = SingleFlightCache("categories", default_ttl=CATEGORY_TREE_CACHE_TTL)
@@ -5,4 +5,12 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "changeme")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day 
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day 
+# Rendered monthly invoice PDFs, reused until the month's orders change
+INVOICE_CACHE_DIR = os.getenv("INVOICE_CACHE_DIR", "generated/invoices")
+# Worker processes rendering invoices in the background
+INVOICE_WORKERS = int(os.getenv("INVOICE_WORKERS", "1"))
+# Worker processes resizing uploaded product images
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Largest accepted product image upload
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_MB", "15")) * 1024 * 1024
@@ -0,0 +1,142 @@
+"""Change events pushed to connected clients.
+
+Writers call ``publish()`` inside the transaction that makes the change. The
+event is sent with ``pg_notify`` so it is delivered only if the transaction
+commits, and reaches every API process listening on the channel, not just the
+one that handled the request. Each process runs one ``EventBroker`` that
+LISTENs on the channel and fans events out to its subscribers (the
+``/events/stream`` connections).
+"""
+import asyncio
+import json
+import select
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+EVENT_CHANNEL = "shiakati_events"
+
+SALE_CREATED = "sale.created"
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+STOCK_CHANGED = "variant.stock_changed"
+
+# Ids per event; pg_notify payloads must stay below 8000 bytes
+EVENT_CHUNK_SIZE = 200
+
+# Events buffered per subscriber; past this it is sent a resync instead
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+_RECONNECT_DELAY_MAX = 30  # seconds
+
+
+def publish(db: Session, event_type: str, **data: Any) -> None:
+    """Queue an event; it is delivered when ``db``'s transaction commits."""
+    payload = json.dumps({"type": event_type, **data}, default=str, separators=(",", ":"))
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENT_CHANNEL, "payload": payload})
+
+
+def publish_stock(db: Session, levels: Iterable[Tuple[int, Any, Any]]) -> None:
+    """Publish ``variant.stock_changed`` for ``(variant_id, quantity, available)`` rows."""
+    variants = [
+        [variant_id, float(quantity or 0), float(available or 0)]
+        for variant_id, quantity, available in levels if variant_id is not None
+    ]
+    for i in range(0, len(variants), EVENT_CHUNK_SIZE):
+        publish(db, STOCK_CHANGED, variants=variants[i:i + EVENT_CHUNK_SIZE])
+
+
+class EventBroker:
+    """Listens on ``EVENT_CHANNEL`` and forwards events to asyncio subscribers.
+
+    psycopg2 has no asyncio support, so LISTEN runs on a daemon thread which
+    hands each event to the event loop with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, dsn: str, channel: str = EVENT_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.connected = False
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _dispatch(self, events: List[Dict[str, Any]]) -> None:
+        # Runs on the event loop
+        for queue in list(self._subscribers):
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # The client can't keep up: drop its backlog and have it reload
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait({"type": "resync"})
+                    break
+
+    def _run(self) -> None:
+        delay = 1
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                self.connected = True
+                delay = 1
+                # Clients may have missed events while we were disconnected
+                self._loop.call_soon_threadsafe(self._dispatch, [{"type": "resync"}])
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    events = []
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            events.append(json.loads(notify.payload))
+                        except ValueError:
+                            print(f"Warning: ignoring malformed event payload: {notify.payload[:100]}")
+                    if events:
+                        self._loop.call_soon_threadsafe(self._dispatch, events)
+            except Exception as e:
+                print(f"Warning: event listener disconnected: {str(e)}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, _RECONNECT_DELAY_MAX)
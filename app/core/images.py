@@ -0,0 +1,226 @@
+"""Product image files: content-addressed storage, metadata and resized
+copies for grids and pages.
+
+Uploads are stored under the SHA-256 of their bytes, so a photo used by
+several products is kept once and a URL never changes content::
+
+    /static/images/content/3f/3fa4...c2.jpg
+
+Every uploaded image gets ``thumb``, ``medium`` and ``large`` copies in WebP
+and JPEG, stored under ``static/images/sizes`` with the original's path::
+
+    /static/images/content/3f/3fa4...c2.jpg
+    -> /static/images/sizes/content/3f/3fa4...c2.jpg.thumb.webp
+
+Images uploaded before content addressing keep their
+``/static/images/products/...`` URLs.
+
+Resizing is CPU-bound, so uploads queue it on the image job queue's worker
+processes (see ``app.db.product_images``) and return immediately. Images are
+never upscaled.
+
+Requires Pillow for resizing and dimensions, imported lazily so the API runs
+without it.
+"""
+from starlette.concurrency import run_in_threadpool
+from typing import BinaryIO, Dict, Optional, Tuple
+import hashlib
+import os
+import tempfile
+
+STATIC_DIR = "static"
+IMAGES_DIR = os.path.join(STATIC_DIR, "images", "products")
+CONTENT_DIR = os.path.join(STATIC_DIR, "images", "content")
+SIZES_DIR = os.path.join(STATIC_DIR, "images", "sizes")
+
+# Longest side in pixels
+IMAGE_SIZES = {"thumb": 200, "medium": 600, "large": 1200}
+IMAGE_FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg")}
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+QUALITY = 82
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def require_pillow():
+    """Import Pillow, raising a RuntimeError that says how to install it."""
+    try:
+        import PIL.Image
+    except ImportError:
+        raise RuntimeError("Image resizing requires Pillow. Install it with: pip install Pillow")
+    return PIL.Image
+
+
+def content_url(filename: str) -> str:
+    """URL of a stored file named ``<sha256><ext>``."""
+    return f"/{CONTENT_DIR}/{filename[:2]}/{filename}".replace("\\", "/")
+
+
+class UnsupportedImageError(ValueError):
+    """Raised when an upload is not a JPEG, PNG, GIF or WebP image."""
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload is larger than the allowed size."""
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """File extension for the image format the bytes start with, if accepted."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def save_upload(source: BinaryIO, max_bytes: int) -> Tuple[str, str, str]:
+    """Copy an upload to a temporary file in the content store, hashing it
+    on the way. Blocking; call it from a worker thread.
+
+    Returns ``(path, content_hash, extension)``, the extension following the
+    file's actual format; pass them to ``store_file``. Raises
+    UnsupportedImageError or ImageTooLargeError as soon as the bytes read
+    show the upload is unacceptable.
+    """
+    os.makedirs(CONTENT_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    extension = None
+    size = 0
+    fd, path = tempfile.mkstemp(dir=CONTENT_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                if extension is None:
+                    extension = sniff_extension(chunk)
+                    if extension is None:
+                        raise UnsupportedImageError("Only JPEG, PNG, GIF and WebP images can be uploaded")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageTooLargeError(f"Images can be at most {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                f.write(chunk)
+        if extension is None:
+            raise UnsupportedImageError("The uploaded file is empty")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), extension
+
+
+async def receive_upload(upload, max_bytes: int) -> Tuple[str, str, str]:
+    """``save_upload`` for a FastAPI UploadFile, run off the event loop so
+    other requests are served while a large photo is copied and hashed.
+
+    The declared content type is only used to reject obvious non-images;
+    clients often send ``image/jpeg`` for any image, so the format is taken
+    from the bytes.
+    """
+    content_type = upload.content_type or "application/octet-stream"
+    if not (content_type.startswith("image/") or content_type == "application/octet-stream"):
+        raise UnsupportedImageError(f"Unsupported content type: {content_type}")
+    return await run_in_threadpool(save_upload, upload.file, max_bytes)
+
+
+def store_file(path: str, content_hash: str, extension: str) -> str:
+    """Move a file saved by ``save_upload`` to its content address and return
+    its URL. If the same bytes are already stored the copy is dropped."""
+    url = content_url(f"{content_hash}{extension}")
+    target = url.lstrip("/")
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    return url
+
+
+def remove_file(image_url: str) -> None:
+    """Delete an image file and its resized copies, if any."""
+    path = image_url.lstrip("/")
+    if os.path.exists(path):
+        os.remove(path)
+    remove_sizes(image_url)
+
+
+def sized_url(image_url: str, size: str, image_format: str) -> str:
+    """URL of one resized copy of the image at ``image_url`` ("/static/images/...")."""
+    relative = os.path.relpath(image_url.lstrip("/"), os.path.join(STATIC_DIR, "images"))
+    path = os.path.join(SIZES_DIR, f"{relative}.{size}{IMAGE_FORMATS[image_format][1]}")
+    return "/" + path.replace("\\", "/")
+
+
+def size_urls(image_url: str) -> Dict[str, Dict[str, str]]:
+    """{size: {format: url}} of every resized copy of the image."""
+    return {
+        size: {image_format: sized_url(image_url, size, image_format) for image_format in IMAGE_FORMATS}
+        for size in IMAGE_SIZES
+    }
+
+
+def thumbnail_url(sizes: Dict[str, Dict[str, str]]) -> Optional[str]:
+    """The JPEG thumbnail, which every client can decode."""
+    return sizes.get("thumb", {}).get("jpeg")
+
+
+def generate_sizes(image_url: str) -> Dict[str, Dict[str, str]]:
+    """Write every size of the image; returns their URLs like ``size_urls``.
+
+    Runs in a worker process. Each file is written under a temporary name
+    and renamed, so readers never see a partial image.
+    """
+    require_pillow()
+    from PIL import Image, ImageOps
+
+    with Image.open(image_url.lstrip("/")) as source:
+        # Apply the camera's EXIF orientation before it is dropped
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    for size, pixels in IMAGE_SIZES.items():
+        resized = image.convert("RGBA" if has_alpha else "RGB")
+        resized.thumbnail((pixels, pixels), Image.LANCZOS)
+        for image_format, (pil_format, _) in IMAGE_FORMATS.items():
+            path = sized_url(image_url, size, image_format).lstrip("/")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            output = resized
+            if pil_format == "JPEG" and has_alpha:
+                # JPEG has no transparency; flatten onto white
+                output = Image.new("RGB", resized.size, "white")
+                output.paste(resized, mask=resized.getchannel("A"))
+            output.save(path + ".tmp", pil_format, quality=QUALITY, optimize=True)
+            os.replace(path + ".tmp", path)
+    return size_urls(image_url)
+
+
+def remove_sizes(image_url: str) -> None:
+    """Delete the resized copies of an image, if any."""
+    for formats in size_urls(image_url).values():
+        for url in formats.values():
+            if os.path.exists(url.lstrip("/")):
+                os.remove(url.lstrip("/"))
+
+
+def file_info(path: str, content_hash: Optional[str] = None) -> dict:
+    """``byte_size``, SHA-256 ``content_hash`` and, with Pillow, ``width`` and
+    ``height`` of an image file. Only the image header is decoded; the file
+    is only hashed if ``content_hash`` is not given."""
+    if content_hash is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+    info = {"byte_size": os.path.getsize(path), "content_hash": content_hash, "width": None, "height": None}
+    try:
+        Image = require_pillow()
+        with Image.open(path) as image:
+            info["width"], info["height"] = image.size
+    except Exception:
+        # Without Pillow, or not an image Pillow can read
+        pass
+    return info
@@ -0,0 +1,102 @@
+"""Background jobs run in a process pool.
+
+CPU-heavy work such as rendering PDFs runs in worker processes so it neither
+blocks the event loop nor competes with request threads for the GIL. Jobs
+are tracked in memory; clients poll a job until it is done.
+
+Workers are spawned rather than forked, so they never inherit the API's
+open database connections. Job functions must be importable top-level
+functions and open their own sessions.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional
+import multiprocessing
+import threading
+import uuid
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# Finished jobs are forgotten after this long
+JOB_RETENTION = timedelta(hours=1)
+
+
+@dataclass
+class Job:
+    id: str
+    key: Hashable
+    status: str = PENDING
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+
+class JobQueue:
+    """Runs jobs in a lazily started process pool, one job per key at a time."""
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._running: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable, *args) -> Job:
+        """Queue ``fn(*args)``; returns the job already running for ``key`` if any."""
+        with self._lock:
+            self._prune()
+            job = self._running.get(key)
+            if job is not None:
+                return job
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            job = Job(id=uuid.uuid4().hex, key=key)
+            self._jobs[job.id] = job
+            self._running[key] = job
+            future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def completed(self, key: Hashable, result: Any) -> Job:
+        """Record a job that needed no work, e.g. because its result was cached."""
+        job = Job(id=uuid.uuid4().hex, key=key, status=DONE, result=result, finished_at=datetime.now())
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _finish(self, job: Job, future: Future):
+        with self._lock:
+            try:
+                job.result = future.result()
+                job.status = DONE
+            except Exception as e:
+                job.error = str(e) or e.__class__.__name__
+                job.status = FAILED
+                if isinstance(e, BrokenProcessPool) and self._executor is not None:
+                    # A worker died; start a fresh pool for the next job
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            job.finished_at = datetime.now()
+            self._running.pop(job.key, None)
+
+    def _prune(self):
+        cutoff = datetime.now() - JOB_RETENTION
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,203 @@
+"""Printable PDF documents rendered with reportlab.
+
+reportlab is imported lazily so the API runs without it; endpoints turn the
+RuntimeError from ``require_reportlab`` into a 503.
+"""
+from datetime import datetime
+from io import BytesIO
+from typing import Sequence
+from xml.sax.saxutils import escape
+
+
+def require_reportlab():
+    """Import reportlab, raising a RuntimeError that says how to install it."""
+    try:
+        import reportlab
+        import reportlab.platypus  # noqa: F401
+    except ImportError:
+        raise RuntimeError("PDF documents require reportlab. Install it with: pip install reportlab")
+    return reportlab
+
+
+def _format_quantity(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:g}"
+
+
+def render_pick_list(lines: Sequence, order_count: int, filters: str, generated_at: datetime) -> bytes:
+    """Render a pick list as an A4 PDF.
+
+    ``lines`` are rows with ``product_name``, ``size``, ``color``, ``barcode``,
+    ``quantity`` and ``order_count``, already in picking order. The table
+    header repeats on every page and each row has an empty box to tick.
+    """
+    require_reportlab()
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+    styles = getSampleStyleSheet()
+    cell = styles["BodyText"].clone("PickCell", fontSize=9, leading=11)
+    total_units = sum(float(line.quantity) for line in lines)
+
+    rows = [["", "Product", "Size", "Color", "Barcode", "Qty", "Orders"]]
+    for line in lines:
+        rows.append([
+            "",
+            Paragraph(escape(line.product_name or "Unknown Product"), cell),
+            line.size or "",
+            line.color or "",
+            line.barcode or "",
+            _format_quantity(line.quantity),
+            str(line.order_count),
+        ])
+
+    table = LongTable(
+        rows,
+        colWidths=[8 * mm, 70 * mm, 20 * mm, 25 * mm, 32 * mm, 14 * mm, 15 * mm],
+        repeatRows=1,
+    )
+    table.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#366092")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f1f2f6")]),
+        ("GRID", (1, 0), (-1, -1), 0.25, colors.HexColor("#dcdde1")),
+        ("BOX", (0, 1), (0, -1), 0.75, colors.black),
+        ("INNERGRID", (0, 1), (0, -1), 0.75, colors.black),
+        ("ALIGN", (5, 0), (-1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, title="Pick list",
+        leftMargin=12 * mm, rightMargin=12 * mm, topMargin=12 * mm, bottomMargin=12 * mm,
+    )
+    doc.build([
+        Paragraph("Pick list", styles["Title"]),
+        Paragraph(
+            f"{escape(filters)} &middot; {order_count} orders &middot; {_format_quantity(total_units)} units "
+            f"&middot; generated {generated_at.strftime('%Y-%m-%d %H:%M')}",
+            styles["Normal"],
+        ),
+        Spacer(1, 6 * mm),
+        table,
+    ])
+    return buffer.getvalue()
+
+
+class MonthlyInvoiceWriter:
+    """Draws the monthly sales report straight onto a canvas as orders arrive.
+
+    Unlike a platypus document, rows are laid out as they are added and each
+    page is compressed as soon as it is full, so a month of any size renders
+    without holding every order in memory::
+
+        writer = MonthlyInvoiceWriter(path, "July 2025", summary)
+        for rows in batches:
+            writer.add_orders(rows)
+        writer.close()
+
+    ``summary`` has ``period``, ``order_count``, ``item_count``, ``revenue`` and
+    ``status_counts`` ({status: count}). Rows have ``id``, ``order_time``,
+    ``customer_name``, ``item_count``, ``total`` and ``status``.
+    """
+
+    COLUMNS = (("Order ID", 0), ("Date", 55), ("Customer", 150), ("Items", 330), ("Total", 375), ("Status", 465))
+    ROW_HEIGHT = 15
+    STATUS_COLORS = {"delivered": "#27ae60", "shipped": "#2980b9", "cancelled": "#e74c3c", "pending": "#f39c12"}
+
+    def __init__(self, path: str, title: str, summary: dict, generated_at: datetime = None):
+        require_reportlab()
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.pdfgen.canvas import Canvas
+
+        self.width, self.height = A4
+        self.margin = 15 * mm
+        self.title = title
+        self.generated_at = generated_at or datetime.now()
+        self.canvas = Canvas(path, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle(f"Monthly Sales Report - {title}")
+        self.page = 1
+        self._draw_first_page(summary)
+
+    def _draw_first_page(self, summary: dict):
+        c = self.canvas
+        top = self.height - self.margin
+        c.setFont("Helvetica-Bold", 22)
+        c.drawCentredString(self.width / 2, top - 20, "Shiakati Store")
+        c.setFont("Helvetica", 16)
+        c.drawCentredString(self.width / 2, top - 42, "MONTHLY SALES REPORT")
+        c.setFont("Helvetica", 11)
+        c.drawCentredString(self.width / 2, top - 58, self.title)
+
+        lines = [
+            f"Period: {summary['period']}",
+            f"Total Orders: {summary['order_count']}",
+            f"Total Items Sold: {summary['item_count']}",
+            f"Total Revenue: {float(summary['revenue']):.2f} DZD",
+        ]
+        order_count = summary["order_count"] or 1
+        for status, count in sorted(summary["status_counts"].items(), key=lambda item: -item[1]):
+            lines.append(f"{(status or 'pending').upper()}: {count} ({count / order_count * 100:.1f}%)")
+
+        box_top = top - 75
+        box_height = 18 + 14 * len(lines)
+        c.setFillColorRGB(0.97, 0.98, 0.98)
+        c.rect(self.margin, box_top - box_height, self.width - 2 * self.margin, box_height, stroke=1, fill=1)
+        c.setFillColorRGB(0, 0, 0)
+        c.setFont("Helvetica", 10)
+        for i, line in enumerate(lines):
+            c.drawString(self.margin + 10, box_top - 16 - 14 * i, line)
+        self._start_table(box_top - box_height - 20)
+
+    def _start_table(self, y: float):
+        c = self.canvas
+        c.setFont("Helvetica-Bold", 10)
+        for label, x in self.COLUMNS:
+            c.drawString(self.margin + x, y, label)
+        c.line(self.margin, y - 4, self.width - self.margin, y - 4)
+        self.y = y - self.ROW_HEIGHT - 2
+        c.setFont("Helvetica", 9)
+
+    def _finish_page(self):
+        c = self.canvas
+        c.setFont("Helvetica", 8)
+        c.setFillColorRGB(0.5, 0.55, 0.55)
+        c.drawString(self.margin, self.margin / 2, f"Report generated on {self.generated_at.strftime('%Y-%m-%d %H:%M')}")
+        c.drawRightString(self.width - self.margin, self.margin / 2, f"Page {self.page}")
+        c.setFillColorRGB(0, 0, 0)
+        c.showPage()
+        self.page += 1
+
+    def add_orders(self, rows):
+        from reportlab.lib import colors
+
+        c = self.canvas
+        for row in rows:
+            if self.y < self.margin + self.ROW_HEIGHT:
+                self._finish_page()
+                self._start_table(self.height - self.margin - 10)
+            values = (
+                str(row.id),
+                row.order_time.strftime("%Y-%m-%d %H:%M"),
+                (row.customer_name or "N/A")[:38],
+                str(row.item_count or 0),
+                f"{float(row.total or 0):.2f} DZD",
+            )
+            for (_, x), value in zip(self.COLUMNS, values):
+                c.drawString(self.margin + x, self.y, value)
+            status = row.status or "pending"
+            c.setFillColor(colors.HexColor(self.STATUS_COLORS.get(status, "#2c3e50")))
+            c.drawString(self.margin + self.COLUMNS[-1][1], self.y, status.upper())
+            c.setFillColorRGB(0, 0, 0)
+            self.y -= self.ROW_HEIGHT
+
+    def close(self):
+        self._finish_page()
+        self.canvas.save()
@@ -0,0 +1,39 @@
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core import images
+
+# A year, the longest max-age caches are expected to honour
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Files below these directories are named by their content hash
+IMMUTABLE_DIRS = tuple(
+    os.path.relpath(directory, images.STATIC_DIR) + os.sep
+    for directory in (images.CONTENT_DIR, os.path.join(images.SIZES_DIR, "content"))
+)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets clients cache content-addressed images forever.
+
+    A file whose name is its content hash never changes, so it is served with
+    ``Cache-Control: immutable`` and its name as a strong ETag. Other files
+    can be replaced under the same name and must be revalidated.
+    """
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+        if relative.startswith(IMMUTABLE_DIRS):
+            response.headers["etag"] = f'"{os.path.basename(relative)}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = "no-cache"
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
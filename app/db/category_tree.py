@@ -0,0 +1,111 @@
+"""Category hierarchy stored as a closure table.
+
+``categories.parent_id`` is the source of truth; ``category_closure`` holds
+every (ancestor, descendant, depth) pair, including each category with itself
+at depth 0. A whole subtree ("Women > Dresses" and everything below it) is
+then a single indexed lookup instead of a recursive query::
+
+    db.query(models.Product).filter(models.Product.category_id.in_(subtree_ids(category_id)))
+
+Call ``add_category`` and ``move_category`` in the transaction that inserts or
+re-parents the category.
+
+Usage:
+    python -m app.db.category_tree rebuild
+"""
+from sqlalchemy import delete, insert, literal, select, text, true
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
+from app.db import models
+from typing import List, Optional
+import argparse
+
+Closure = models.CategoryClosure
+
+
+def _lock(db: Session) -> None:
+    # Serialise tree writes; readers are not blocked
+    db.execute(text("LOCK TABLE category_closure IN EXCLUSIVE MODE"))
+
+
+def subtree_ids(category_id: int) -> Select:
+    """SELECT of the ids of the category and all its descendants."""
+    return select(Closure.descendant_id).where(Closure.ancestor_id == category_id)
+
+
+def add_category(db: Session, category_id: int, parent_id: Optional[int]) -> None:
+    """Link a new category below ``parent_id`` (or as a root)."""
+    _lock(db)
+    rows = select(literal(category_id), literal(category_id), literal(0))
+    if parent_id is not None:
+        rows = rows.union_all(
+            select(Closure.ancestor_id, literal(category_id), Closure.depth + 1)
+            .where(Closure.descendant_id == parent_id)
+        )
+    db.execute(insert(Closure).from_select(["ancestor_id", "descendant_id", "depth"], rows))
+
+
+def move_category(db: Session, category_id: int, parent_id: Optional[int]) -> None:
+    """Move a category and its subtree below ``parent_id`` (or to the root).
+
+    Raises ValueError if ``parent_id`` is the category itself or one of its
+    descendants.
+    """
+    _lock(db)
+    if parent_id is not None and db.execute(
+        subtree_ids(category_id).where(Closure.descendant_id == parent_id)
+    ).first():
+        raise ValueError("A category cannot be moved below itself or one of its subcategories")
+
+    # Detach the subtree from its current ancestors
+    db.execute(delete(Closure).where(
+        Closure.descendant_id.in_(subtree_ids(category_id)),
+        Closure.ancestor_id.notin_(subtree_ids(category_id))
+    ))
+    if parent_id is not None:
+        # Every ancestor of the new parent above every node of the subtree
+        above, below = aliased(Closure), aliased(Closure)
+        db.execute(insert(Closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .select_from(above).join(below, true())
+            .where(above.descendant_id == parent_id, below.ancestor_id == category_id)
+        ))
+
+
+def rebuild_category_closure(db: Session) -> None:
+    """Recompute category_closure from categories.parent_id. Commits."""
+    _lock(db)
+    db.execute(text("DELETE FROM category_closure"))
+    db.execute(text("""
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION ALL
+            SELECT tree.ancestor_id, c.id, tree.depth + 1
+            FROM tree
+            JOIN categories c ON c.parent_id = tree.descendant_id
+        )
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """))
+    db.commit()
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the category closure table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Recompute category_closure from categories.parent_id")
+
+    parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        rebuild_category_closure(db)
+        print("Category closure rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Per-customer purchase metrics (recency, frequency, monetary value).
+
+``customer_stats`` holds one row per customer with first/last purchase time,
+purchase counts and total spent. It is updated in the same transaction as the
+order or sale, so segmentation reads one small row per customer instead of
+scanning orders and sales.
+
+Orders count while they are not cancelled: cancelling one subtracts it.
+Cancellation is final (see ALLOWED_STATUS_TRANSITIONS in app.api.orders),
+so a cancelled order never counts again.
+First/last purchase times only move outwards; run ``rebuild`` to tighten them
+after cancellations or deletions.
+
+Usage:
+    python -m app.db.customer_stats rebuild
+"""
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from app.db import models
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+import argparse
+
+ORDER = "order"
+SALE = "sale"
+
+# (customer_id, purchased_at, amount, kind, count delta)
+Purchase = Tuple[int, datetime, Decimal, str, int]
+
+
+def record_purchases(db: Session, purchases: Iterable[Purchase]) -> None:
+    """Apply purchases to customer_stats. Call inside the transaction creating them.
+
+    A count delta of -1 with a negative amount takes a purchase back out (e.g.
+    a cancelled order); a delta of 0 adjusts the amount only.
+    """
+    per_customer = {}
+    for customer_id, purchased_at, amount, kind, count in purchases:
+        if customer_id is None:
+            continue
+        row = per_customer.setdefault(customer_id, {
+            "first": None, "last": None, "orders": 0, "sales": 0, "spent": Decimal("0")
+        })
+        if count > 0 and purchased_at is not None:
+            row["first"] = purchased_at if row["first"] is None else min(row["first"], purchased_at)
+            row["last"] = purchased_at if row["last"] is None else max(row["last"], purchased_at)
+        row["orders" if kind == ORDER else "sales"] += count
+        row["spent"] += amount or Decimal("0")
+
+    if not per_customer:
+        return
+
+    table = models.CustomerStats.__table__
+    # Sorted keys give concurrent transactions the same lock order
+    stmt = insert(table).values([
+        {
+            "customer_id": customer_id,
+            "first_purchase_at": row["first"],
+            "last_purchase_at": row["last"],
+            "purchase_count": row["orders"] + row["sales"],
+            "order_count": row["orders"],
+            "sale_count": row["sales"],
+            "total_spent": row["spent"],
+        }
+        for customer_id, row in sorted(per_customer.items())
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.customer_id],
+        set_={
+            # LEAST/GREATEST ignore NULLs, so adjustments without a time keep the old values
+            "first_purchase_at": func.least(table.c.first_purchase_at, stmt.excluded.first_purchase_at),
+            "last_purchase_at": func.greatest(table.c.last_purchase_at, stmt.excluded.last_purchase_at),
+            "purchase_count": table.c.purchase_count + stmt.excluded.purchase_count,
+            "order_count": table.c.order_count + stmt.excluded.order_count,
+            "sale_count": table.c.sale_count + stmt.excluded.sale_count,
+            "total_spent": table.c.total_spent + stmt.excluded.total_spent,
+            "updated_at": func.now(),
+        }
+    ))
+
+
+def record_purchase(db: Session, customer_id: Optional[int], purchased_at: Optional[datetime],
+                    amount: Decimal, kind: str, count: int = 1) -> None:
+    """Apply a single purchase (or adjustment) to customer_stats."""
+    record_purchases(db, [(customer_id, purchased_at, amount, kind, count)])
+
+
+def rebuild_customer_stats(db: Session) -> None:
+    """Recompute customer_stats from orders and sales. Commits."""
+    db.execute(text("LOCK TABLE customer_stats IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM customer_stats"))
+    db.execute(text("""
+        INSERT INTO customer_stats
+            (customer_id, first_purchase_at, last_purchase_at, purchase_count, order_count, sale_count, total_spent)
+        SELECT customer_id, MIN(purchased_at), MAX(purchased_at),
+               SUM(orders) + SUM(sales), SUM(orders), SUM(sales), SUM(amount)
+        FROM (
+            SELECT customer_id, order_time AS purchased_at, 1 AS orders, 0 AS sales, total AS amount
+            FROM orders
+            WHERE status IS DISTINCT FROM 'cancelled'
+            UNION ALL
+            SELECT customer_id, sale_time, 0, 1, total
+            FROM sales
+            WHERE customer_id IS NOT NULL
+        ) purchases
+        GROUP BY customer_id
+    """))
+    db.commit()
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain per-customer purchase metrics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Recompute customer_stats from orders and sales")
+
+    parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        rebuild_customer_stats(db)
+        print("Customer stats rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Customer writes shared by several endpoints."""
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.db import models
+
+
+def upsert_customer(db: Session, name: str, phone_number: str) -> int:
+    """Create the customer, or rename the one with this phone number; returns its id.
+
+    ``phone_number`` must already be normalized (see
+    ``app.schemas.customer.normalize_phone``). A single INSERT ... ON CONFLICT,
+    so concurrent orders from a new customer can't create duplicates.
+    """
+    table = models.Customer.__table__
+    stmt = insert(table).values(name=name, phone_number=phone_number)
+    return db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.phone_number],
+        set_={"name": stmt.excluded.name}
+    ).returning(table.c.id)).scalar_one()
@@ -0,0 +1,281 @@
+"""Columnar export of sales, orders and inventory to Arrow / Parquet.
+
+Rows are read with server-side cursors and converted to Arrow record batches
+of ``batch_size`` rows, so memory stays bounded however much history is
+exported. The time-partitioned tables are read one month (one partition) at a
+time and written as one compressed Parquet file per month, laid out
+hive-style so pyarrow, pandas, polars or duckdb can read the whole directory
+as a single dataset::
+
+    <out>/sales/month=2025-01/sales-2025-01.parquet
+
+Requires pyarrow, which is imported lazily so the API runs without it.
+
+Usage:
+    python -m app.db.export sales sale_items orders --out exports/ [--start 2024-01-01] [--end 2024-12-31]
+    python -m app.db.export all --out exports/
+"""
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.db import models
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import os
+
+DATASETS = ("sales", "sale_items", "orders", "order_items", "inventory")
+
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_COMPRESSION = "zstd"
+
+
+def require_pyarrow():
+    """Import pyarrow, raising a RuntimeError that says how to install it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Exports require pyarrow. Install it with: pip install pyarrow")
+    return pyarrow
+
+
+def _dataset_query(name: str):
+    """Return ``(select, time column or None)`` for an export dataset."""
+    if name == "sales":
+        t = models.Sale
+        return select(t.id, t.sale_time, t.customer_id, t.total, t.payment_method), t.sale_time
+    if name == "sale_items":
+        t = models.SaleItem
+        return select(t.id, t.sale_id, t.sale_time, t.variant_id, t.quantity, t.price, t.unit_cost), t.sale_time
+    if name == "orders":
+        t = models.Order
+        return select(
+            t.id, t.order_time, t.customer_id, t.status, t.delivery_method,
+            t.wilaya, t.commune, t.total, t.notes
+        ), t.order_time
+    if name == "order_items":
+        t = models.OrderItem
+        return select(t.id, t.order_id, t.order_time, t.variant_id, t.quantity, t.price, t.unit_cost), t.order_time
+    if name == "inventory":
+        return select(
+            models.Variant.id.label("variant_id"),
+            models.Variant.product_id,
+            models.Product.name.label("product_name"),
+            models.Category.name.label("category_name"),
+            models.Variant.size,
+            models.Variant.color,
+            models.Variant.barcode,
+            models.Variant.price,
+            models.Variant.cost_price,
+            models.Variant.quantity,
+        ).outerjoin(models.Product, models.Product.id == models.Variant.product_id).outerjoin(
+            models.Category, models.Category.id == models.Product.category_id
+        ).order_by(models.Variant.id), None
+    raise ValueError(f"Unknown dataset '{name}'. Expected one of: {', '.join(DATASETS)}")
+
+
+def arrow_schema(name: str):
+    """Arrow schema for a dataset; money and quantities keep their exact decimal scale."""
+    pa = require_pyarrow()
+    ts = pa.timestamp("us")
+    money = pa.decimal128(10, 2)
+    schemas = {
+        "sales": [
+            ("id", pa.int32()), ("sale_time", ts), ("customer_id", pa.int32()),
+            ("total", money), ("payment_method", pa.string()),
+        ],
+        "sale_items": [
+            ("id", pa.int32()), ("sale_id", pa.int32()), ("sale_time", ts), ("variant_id", pa.int32()),
+            ("quantity", pa.decimal128(10, 3)), ("price", money), ("unit_cost", money),
+        ],
+        "orders": [
+            ("id", pa.int32()), ("order_time", ts), ("customer_id", pa.int32()), ("status", pa.string()),
+            ("delivery_method", pa.string()), ("wilaya", pa.string()), ("commune", pa.string()),
+            ("total", money), ("notes", pa.string()),
+        ],
+        "order_items": [
+            ("id", pa.int32()), ("order_id", pa.int32()), ("order_time", ts), ("variant_id", pa.int32()),
+            ("quantity", pa.int32()), ("price", money), ("unit_cost", money),
+        ],
+        "inventory": [
+            ("variant_id", pa.int32()), ("product_id", pa.int32()), ("product_name", pa.string()),
+            ("category_name", pa.string()), ("size", pa.string()), ("color", pa.string()),
+            ("barcode", pa.string()), ("price", money), ("cost_price", money),
+            ("quantity", pa.decimal128(10, 3)),
+        ],
+    }
+    if name not in schemas:
+        raise ValueError(f"Unknown dataset '{name}'. Expected one of: {', '.join(DATASETS)}")
+    return pa.schema(schemas[name])
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _time_bounds(time_column, start: Optional[date], end: Optional[date]) -> list:
+    conditions = []
+    if start:
+        conditions.append(time_column >= start)
+    if end:
+        # ``end`` is inclusive
+        conditions.append(time_column < end + timedelta(days=1))
+    return conditions
+
+
+def export_months(db: Session, name: str, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+    """Months (first days) that have rows in ``name`` within ``start``..``end``."""
+    query, time_column = _dataset_query(name)
+    if time_column is None:
+        return []
+    first, last = db.execute(
+        select(func.min(time_column), func.max(time_column)).where(*_time_bounds(time_column, start, end))
+    ).one()
+    if first is None:
+        return []
+    months = []
+    month = _month_start(first)
+    while month <= last.date():
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def iter_record_batches(
+    db: Session,
+    name: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator:
+    """Yield Arrow record batches for a dataset, reading through a server-side cursor.
+
+    Time-partitioned datasets are read month by month in time order, so each
+    query only scans one partition.
+    """
+    pa = require_pyarrow()
+    schema = arrow_schema(name)
+    query, time_column = _dataset_query(name)
+
+    if time_column is None:
+        queries = [query]
+    else:
+        queries = []
+        for month in export_months(db, name, start, end):
+            month_start = max(month, start) if start else month
+            month_end = _next_month(month) - timedelta(days=1)
+            month_end = min(month_end, end) if end else month_end
+            queries.append(query.where(*_time_bounds(time_column, month_start, month_end)).order_by(time_column))
+
+    for stmt in queries:
+        result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": batch_size})
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+
+def write_parquet_dataset(
+    db: Session,
+    name: str,
+    out_dir: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+) -> Dict[str, int]:
+    """Write a dataset under ``out_dir/<name>/``, one Parquet file per month.
+
+    Each file is written under a temporary name and renamed when complete, so
+    readers never see a half-written month. Returns ``{path: row_count}``.
+    """
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(name)
+    _, time_column = _dataset_query(name)
+    dataset_dir = os.path.join(out_dir, name)
+    written = {}
+
+    def open_writer(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return pq.ParquetWriter(path + ".tmp", schema, compression=compression)
+
+    def close_writer(writer, path):
+        writer.close()
+        os.replace(path + ".tmp", path)
+
+    if time_column is None:
+        path = os.path.join(dataset_dir, f"{name}.parquet")
+        writer = open_writer(path)
+        written[path] = 0
+        for batch in iter_record_batches(db, name, batch_size=batch_size):
+            writer.write_batch(batch)
+            written[path] += batch.num_rows
+        close_writer(writer, path)
+        return written
+
+    # Batches arrive in time order, so a month's file is finished as soon as
+    # the first row of the next month shows up
+    time_field = schema.names.index(time_column.key)
+    writer = path = current_month = None
+    for batch in iter_record_batches(db, name, start, end, batch_size):
+        month = _month_start(batch.column(time_field)[0].as_py())
+        if month != current_month:
+            if writer is not None:
+                close_writer(writer, path)
+            current_month = month
+            label = month.strftime("%Y-%m")
+            path = os.path.join(dataset_dir, f"month={label}", f"{name}-{label}.parquet")
+            writer = open_writer(path)
+            written[path] = 0
+        writer.write_batch(batch)
+        written[path] += batch.num_rows
+    if writer is not None:
+        close_writer(writer, path)
+    return written
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Export sales, orders and inventory to Parquet")
+    parser.add_argument("datasets", nargs="+", choices=DATASETS + ("all",))
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--start", type=_parse_date, default=None, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=_parse_date, default=None, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION, help="zstd, snappy, gzip or none")
+
+    args = parser.parse_args(argv)
+    datasets = DATASETS if "all" in args.datasets else args.datasets
+    try:
+        require_pyarrow()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    db = SessionLocal()
+    try:
+        for name in datasets:
+            started = datetime.now()
+            written = write_parquet_dataset(
+                db, name, args.out, args.start, args.end, args.batch_size, args.compression
+            )
+            elapsed = (datetime.now() - started).total_seconds()
+            print(f"{name}: {sum(written.values())} rows in {len(written)} files ({elapsed:.1f}s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
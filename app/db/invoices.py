@@ -0,0 +1,149 @@
+"""Monthly invoice (sales report) PDFs.
+
+Orders of the month are read through a server-side cursor and drawn onto the
+PDF as they arrive, so memory stays flat however many orders a month has.
+
+Finished files are cached under ``INVOICE_CACHE_DIR`` by month and data
+version, a digest of the month's orders and item count. The same month is
+only rendered again once one of its orders changes.
+
+Usage:
+    python -m app.db.invoices monthly 2025 7 [--out DIR]
+"""
+from sqlalchemy import DateTime, text
+from sqlalchemy.orm import Session
+from app.core import pdf
+from app.core.config import INVOICE_CACHE_DIR
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+import argparse
+import calendar
+import glob
+import os
+
+STREAM_BATCH_SIZE = 1000
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First day of the month and first day of the next month."""
+    if not 1 <= month <= 12:
+        raise ValueError("month must be between 1 and 12")
+    start = date(year, month, 1)
+    return start, date(year + month // 12, month % 12 + 1, 1)
+
+
+def data_version(db: Session, year: int, month: int) -> str:
+    """Digest of the month's orders; changes whenever an order, its status,
+    total or its number of items changes. Reads one monthly partition."""
+    start, end = month_bounds(year, month)
+    return db.execute(text("""
+        SELECT md5(
+            COALESCE(string_agg(o.id || ':' || COALESCE(o.status, '') || ':' || o.total, ',' ORDER BY o.id), '')
+            || '|' || (SELECT COUNT(*) FROM order_items WHERE order_time >= :start AND order_time < :end)
+        )
+        FROM orders o
+        WHERE o.order_time >= :start AND o.order_time < :end
+    """), {"start": start, "end": end}).scalar()
+
+
+def invoice_path(year: int, month: int, version: str, cache_dir: str = INVOICE_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"monthly-invoice-{year}-{month:02d}-{version[:16]}.pdf")
+
+
+def _summary(db: Session, start: date, end: date) -> dict:
+    rows = db.execute(text("""
+        SELECT o.status, COUNT(*) AS orders, COALESCE(SUM(o.total), 0) AS revenue,
+               COALESCE(SUM(items.n), 0) AS items
+        FROM orders o
+        LEFT JOIN (
+            SELECT order_id, order_time, COUNT(*) AS n
+            FROM order_items
+            WHERE order_time >= :start AND order_time < :end
+            GROUP BY order_id, order_time
+        ) items ON items.order_id = o.id AND items.order_time = o.order_time
+        WHERE o.order_time >= :start AND o.order_time < :end
+        GROUP BY o.status
+    """), {"start": start, "end": end}).all()
+    last_day = end - timedelta(days=1)
+    return {
+        "period": f"{start.strftime('%B %d, %Y')} - {last_day.strftime('%B %d, %Y')}",
+        "order_count": sum(row.orders for row in rows),
+        "item_count": sum(row.items for row in rows),
+        "revenue": sum(row.revenue for row in rows),
+        "status_counts": {row.status: row.orders for row in rows},
+    }
+
+
+def write_monthly_invoice(db: Session, year: int, month: int, path: str) -> int:
+    """Render the month's report to ``path``; returns the number of orders.
+
+    Written under a temporary name and renamed when complete.
+    """
+    start, end = month_bounds(year, month)
+    writer = pdf.MonthlyInvoiceWriter(
+        path + ".tmp", f"{calendar.month_name[month]} {year}", _summary(db, start, end)
+    )
+    result = db.execute(text("""
+        SELECT o.id, o.order_time, c.name AS customer_name, o.total, o.status,
+               (SELECT COUNT(*) FROM order_items oi
+                WHERE oi.order_id = o.id AND oi.order_time = o.order_time) AS item_count
+        FROM orders o
+        LEFT JOIN customers c ON c.id = o.customer_id
+        WHERE o.order_time >= :start AND o.order_time < :end
+        ORDER BY o.order_time, o.id
+    """).columns(order_time=DateTime).execution_options(
+        stream_results=True, yield_per=STREAM_BATCH_SIZE
+    ), {"start": start, "end": end})
+    count = 0
+    for rows in result.partitions():
+        writer.add_orders(rows)
+        count += len(rows)
+    writer.close()
+    os.replace(path + ".tmp", path)
+    return count
+
+
+def generate_monthly_invoice(year: int, month: int, cache_dir: str = INVOICE_CACHE_DIR) -> str:
+    """Return the path of the month's invoice, rendering it unless the current
+    version is cached. Opens its own session, so it can run in a worker process."""
+    from app.db.session import SessionLocal
+
+    os.makedirs(cache_dir, exist_ok=True)
+    db = SessionLocal()
+    try:
+        # One snapshot for the version and the rows it describes
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        path = invoice_path(year, month, data_version(db, year, month), cache_dir)
+        if not os.path.exists(path):
+            write_monthly_invoice(db, year, month, path)
+            # Older versions of the month are stale now
+            for old in glob.glob(os.path.join(cache_dir, f"monthly-invoice-{year}-{month:02d}-*.pdf")):
+                if old != path:
+                    os.remove(old)
+        return path
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Render monthly invoice PDFs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    monthly = subparsers.add_parser("monthly", help="Render (or reuse) a month's invoice")
+    monthly.add_argument("year", type=int)
+    monthly.add_argument("month", type=int)
+    monthly.add_argument("--out", default=INVOICE_CACHE_DIR, help="Cache directory")
+
+    args = parser.parse_args(argv)
+    try:
+        pdf.require_reportlab()
+        month_bounds(args.year, args.month)
+    except (RuntimeError, ValueError) as e:
+        parser.error(str(e))
+
+    started = datetime.now()
+    path = generate_monthly_invoice(args.year, args.month, args.out)
+    print(f"{path} ({(datetime.now() - started).total_seconds():.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, TIMESTAMP, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, Date, TIMESTAMP, CheckConstraint, ForeignKeyConstraint, Computed, Boolean, BigInteger, Index, UniqueConstraint
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import text
 import datetime
@@ -16,11 +16,20 @@ class Category(Base):
     id = Column(Integer, primary_key=True)
     name = Column(Text, nullable=False, unique=True)
     description = Column(Text, nullable=True)
+    parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
     
     # Relationships
     products = relationship("Product", back_populates="category")
 
+class CategoryClosure(Base):
+    """Every (ancestor, descendant) pair of the category tree, including each
+    category with itself at depth 0. Maintained by app.db.category_tree."""
+    __tablename__ = "category_closure"
+    ancestor_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True)
@@ -34,6 +43,38 @@ class Product(Base):
     # Relationships
     category = relationship("Category", back_populates="products")
     variants = relationship("Variant", back_populates="product", cascade="all, delete-orphan")
+    images = relationship("ProductImage", back_populates="product", passive_deletes=True,
+                          order_by="ProductImage.position")
+
+class ProductImage(Base):
+    """An image file of a product. products.image_url mirrors the main one.
+    Written through app.db.product_images."""
+    __tablename__ = "product_images"
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    url = Column(Text, nullable=False)  # "/static/images/products/..."
+    barcode = Column(Text, nullable=True, index=True)  # Set for images uploaded for a variant barcode
+    position = Column(Integer, nullable=False)  # Display order, never reused while the image exists
+    is_main = Column(Boolean, nullable=False, server_default=text("false"))
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    byte_size = Column(BigInteger, nullable=False)
+    content_hash = Column(Text, nullable=False, index=True)  # SHA-256, hex
+    sizes_ready = Column(Boolean, nullable=False, server_default=text("false"))  # See app.core.images
+    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+    product = relationship("Product", back_populates="images")
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "position", name="uq_product_images_position"),
+        # A file is recorded once for the product and once per barcode it was uploaded for
+        UniqueConstraint("product_id", "url", "barcode", name="uq_product_images_url"),
+        Index("uq_product_images_product_url", "product_id", "url", unique=True,
+              postgresql_where=text("barcode IS NULL"), sqlite_where=text("barcode IS NULL")),
+        # At most one main image per product
+        Index("uq_product_images_main", "product_id", unique=True,
+              postgresql_where=text("is_main"), sqlite_where=text("is_main")),
+    )
 
 class Variant(Base):
     __tablename__ = "variants"
@@ -45,8 +86,15 @@ class Variant(Base):
     price = Column(Numeric(10, 2))
     cost_price = Column(Numeric(10, 2), server_default=text("0"))  # Added cost price field
     quantity = Column(Numeric(10, 3), server_default=text("0"))  # Allow decimal quantities
+    # Held by open orders; see app.db.stock
+    reserved_quantity = Column(Numeric(10, 3), nullable=False, server_default=text("0"))
+    available_quantity = Column(Numeric(10, 3), Computed("COALESCE(quantity, 0) - reserved_quantity", persisted=True))
     created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
     
+    __table_args__ = (
+        CheckConstraint("reserved_quantity >= 0", name="ck_variants_reserved_quantity"),
+    )
+    
     # Relationships
     product = relationship("Product", back_populates="variants")
     sale_items = relationship("SaleItem", back_populates="variant")
@@ -57,7 +105,8 @@ class Sale(Base):
     id = Column(Integer, primary_key=True)
     customer_id = Column(Integer, ForeignKey("customers.id"))
     total = Column(Numeric(10, 2), nullable=False)
-    sale_time = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+    # Partition key: sales are range partitioned by month on sale_time
+    sale_time = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now, server_default=text("CURRENT_TIMESTAMP"))
     payment_method = Column(Text, server_default=text("'cash'"))
     
     # Relationships
@@ -67,10 +116,16 @@ class Sale(Base):
 class SaleItem(Base):
     __tablename__ = "sale_items"
     id = Column(Integer, primary_key=True)
-    sale_id = Column(Integer, ForeignKey("sales.id", ondelete="CASCADE"))
+    sale_id = Column(Integer)
     variant_id = Column(Integer, ForeignKey("variants.id", ondelete="SET NULL"), nullable=True)
     quantity = Column(Numeric(10, 3), nullable=False)  # 3 decimal places for precise quantities
     price = Column(Numeric(10, 2), nullable=False)  # 2 decimal places for money
+    unit_cost = Column(Numeric(10, 2), nullable=False, server_default=text("0"))  # Variant cost price at sale time
+    sale_time = Column(TIMESTAMP, nullable=False)  # Copy of the parent sale's partition key
+    
+    __table_args__ = (
+        ForeignKeyConstraint(["sale_id", "sale_time"], ["sales.id", "sales.sale_time"], ondelete="CASCADE"),
+    )
     
     # Relationships
     sale = relationship("Sale", back_populates="items")
@@ -93,14 +148,21 @@ class Customer(Base):
     # Relationships
     orders = relationship("Order", back_populates="customer")
     sales = relationship("Sale", back_populates="customer")
+    stats = relationship("CustomerStats", back_populates="customer", uselist=False, passive_deletes=True)
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"))
+    order_id = Column(Integer)
     variant_id = Column(Integer, ForeignKey("variants.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     price = Column(Numeric(10, 2), nullable=False)  # Store price at time of order
+    unit_cost = Column(Numeric(10, 2), nullable=False, server_default=text("0"))  # Variant cost price at time of order
+    order_time = Column(TIMESTAMP, nullable=False)  # Copy of the parent order's partition key
+    
+    __table_args__ = (
+        ForeignKeyConstraint(["order_id", "order_time"], ["orders.id", "orders.order_time"], ondelete="CASCADE"),
+    )
     
     # Relationships
     order = relationship("Order", back_populates="items")
@@ -120,7 +182,8 @@ class Order(Base):
     wilaya = Column(Text, nullable=False)
     commune = Column(Text, nullable=False)
     delivery_method = Column(Text, nullable=False)
-    order_time = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+    # Partition key: orders are range partitioned by month on order_time
+    order_time = Column(TIMESTAMP, nullable=False, default=datetime.datetime.now, server_default=text("CURRENT_TIMESTAMP"))
     status = Column(Text, server_default=text("'pending'"))
     notes = Column(Text)
     total = Column(Numeric(10, 2), nullable=False)
@@ -135,6 +198,39 @@ class Order(Base):
     customer = relationship("Customer", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+class SalesDailyRollup(Base):
+    """Sales aggregated per day and variant, maintained by app.db.rollups."""
+    __tablename__ = "sales_daily_variant"
+    day = Column(Date, primary_key=True)
+    variant_id = Column(Integer, primary_key=True)  # 0 for items whose variant was deleted
+    quantity = Column(Numeric(14, 3), nullable=False, server_default=text("0"))
+    revenue = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    cost = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    transactions = Column(Integer, nullable=False, server_default=text("0"))  # Sales containing the variant
+
+class SalesDailyTotal(Base):
+    """Sales aggregated per day, maintained by app.db.rollups."""
+    __tablename__ = "sales_daily_totals"
+    day = Column(Date, primary_key=True)
+    quantity = Column(Numeric(14, 3), nullable=False, server_default=text("0"))
+    revenue = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    cost = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    transactions = Column(Integer, nullable=False, server_default=text("0"))
+
+class CustomerStats(Base):
+    """Per-customer purchase metrics (RFM), maintained by app.db.customer_stats."""
+    __tablename__ = "customer_stats"
+    customer_id = Column(Integer, ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    first_purchase_at = Column(TIMESTAMP, nullable=True)
+    last_purchase_at = Column(TIMESTAMP, nullable=True, index=True)
+    purchase_count = Column(Integer, nullable=False, server_default=text("0"), index=True)  # Orders + sales
+    order_count = Column(Integer, nullable=False, server_default=text("0"))  # Non-cancelled orders
+    sale_count = Column(Integer, nullable=False, server_default=text("0"))  # In-store sales
+    total_spent = Column(Numeric(14, 2), nullable=False, server_default=text("0"), index=True)
+    updated_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+    customer = relationship("Customer", back_populates="stats")
+
 class Expense(Base):
     __tablename__ = "expenses"
     id = Column(Integer, primary_key=True)
@@ -0,0 +1,122 @@
+"""Monthly partition maintenance for sales, sale_items, orders and order_items.
+
+The tables are range partitioned by month (see the
+``partition_sales_orders_monthly`` migration). Partitions are named
+``<table>_yYYYYmMM``. This module creates upcoming partitions and detaches old
+ones for retention.
+
+Usage:
+    python -m app.db.partitions ensure [--months-ahead 3]
+    python -m app.db.partitions detach --before 2024-01 [--drop]
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import List, Optional
+import argparse
+import re
+
+# Parents before children, so partitions exist for both sides of a foreign key
+PARTITIONED_TABLES = ("sales", "sale_items", "orders", "order_items")
+
+# Children are detached before their parents to keep foreign keys valid
+_DETACH_ORDER = ("sale_items", "sales", "order_items", "orders")
+
+DEFAULT_MONTHS_AHEAD = 3
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, start: date, end: date, tables=PARTITIONED_TABLES) -> int:
+    """Create any missing monthly partitions covering ``start``..``end``."""
+    created = 0
+    for table in tables:
+        created += db.execute(
+            text("SELECT ensure_monthly_partitions(:parent, :start, :end)"),
+            {"parent": table, "start": _month_start(start), "end": _month_start(end)}
+        ).scalar() or 0
+    return created
+
+
+def ensure_future_partitions(db: Session, months_ahead: int = DEFAULT_MONTHS_AHEAD) -> int:
+    """Make sure the current month and the next ``months_ahead`` months exist."""
+    this_month = _month_start(date.today())
+    created = ensure_partitions(db, this_month, _add_months(this_month, months_ahead))
+    db.commit()
+    return created
+
+
+def list_partitions(db: Session, table: str) -> List[str]:
+    rows = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+        ORDER BY c.relname
+    """), {"parent": table}).scalars().all()
+    return list(rows)
+
+
+def detach_partitions_before(db: Session, before: date, drop: bool = False) -> List[str]:
+    """Detach every partition whose month starts before ``before``.
+
+    Detached partitions stay in the database as standalone tables so they can be
+    archived (e.g. with pg_dump) before being dropped, unless ``drop`` is set.
+    """
+    cutoff = _month_start(before)
+    detached = []
+    for table in _DETACH_ORDER:
+        for name in list_partitions(db, table):
+            match = _PARTITION_NAME.search(name)
+            if not match:
+                continue
+            if date(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+                continue
+            db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if drop:
+                db.execute(text(f'DROP TABLE "{name}"'))
+            detached.append(name)
+    db.commit()
+    return detached
+
+
+def _parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ensure_parser = subparsers.add_parser("ensure", help="Create upcoming monthly partitions")
+    ensure_parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+
+    detach_parser = subparsers.add_parser("detach", help="Detach partitions older than a month")
+    detach_parser.add_argument("--before", type=_parse_month, required=True, help="YYYY-MM")
+    detach_parser.add_argument("--drop", action="store_true", help="Drop detached partitions")
+
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        if args.command == "ensure":
+            created = ensure_future_partitions(db, args.months_ahead)
+            print(f"Created {created} partitions")
+        else:
+            detached = detach_partitions_before(db, args.before, drop=args.drop)
+            print(f"Detached {len(detached)} partitions: {', '.join(detached) or '-'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Product image rows: the files of each product and which one is main.
+
+``product_images`` is the source of truth for listing images, so requests
+never scan the image directories. ``products.image_url`` keeps mirroring the
+main image for the clients that read it.
+
+Files are content-addressed (see ``app.core.images``), so several rows, of
+one or many products, can point at the same file. A file is only deleted
+once no row references it; ``add_image`` and ``remove_image`` take a lock on
+the content hash so an upload can't reuse a file that is being deleted.
+
+Call these functions inside the transaction that writes the product.
+
+Usage:
+    python -m app.db.product_images sizes [--force] [--workers N]
+    python -m app.db.product_images prune
+"""
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import func, text, update
+from sqlalchemy.orm import Session
+from app.core import images
+from app.db import models
+from typing import Dict, Iterable, List, Optional
+import argparse
+import os
+import time
+
+ProductImage = models.ProductImage
+
+# Stored files younger than this may belong to an upload still in progress
+PRUNE_MIN_AGE = 3600
+
+
+def _lock_content(db: Session, content_hash: str) -> None:
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:content_hash))"), {"content_hash": content_hash})
+
+
+def lock_product(db: Session, product_id: int) -> Optional[models.Product]:
+    """Load the product FOR UPDATE, so concurrent uploads number images one at a time."""
+    return db.query(models.Product).filter(models.Product.id == product_id).with_for_update().first()
+
+
+def next_position(db: Session, product_id: int) -> int:
+    return (db.query(func.max(ProductImage.position)).filter(ProductImage.product_id == product_id).scalar() or 0) + 1
+
+
+def list_images(db: Session, product_id: int, barcode: Optional[str] = None) -> List[models.ProductImage]:
+    """A product's images in display order; one indexed query."""
+    query = db.query(ProductImage).filter(ProductImage.product_id == product_id)
+    if barcode is not None:
+        query = query.filter(ProductImage.barcode == barcode)
+    return query.order_by(ProductImage.position).all()
+
+
+def list_images_for_products(db: Session, product_ids: Iterable[int]) -> Dict[int, List[models.ProductImage]]:
+    """Images of many products in display order, keyed by product id; one
+    query. Products without images map to an empty list."""
+    result = {product_id: [] for product_id in product_ids}
+    query = db.query(ProductImage).filter(ProductImage.product_id.in_(list(result)))
+    for image in query.order_by(ProductImage.product_id, ProductImage.position):
+        result[image.product_id].append(image)
+    return result
+
+
+def add_image(db: Session, product: models.Product, path: str, content_hash: str, extension: str,
+              barcode: Optional[str] = None, set_as_main: bool = False) -> models.ProductImage:
+    """Store a file saved by ``images.save_upload`` and record it for the
+    product. The product's first image becomes its main one.
+
+    Uploading bytes the product already has, for the same barcode or for
+    none, returns the existing row. Each barcode records its own row, since
+    the barcode's image list only shows rows uploaded for it.
+    """
+    _lock_content(db, content_hash)
+    info = images.file_info(path, content_hash)
+    url = images.store_file(path, content_hash, extension)
+
+    image = db.query(ProductImage).filter(
+        ProductImage.product_id == product.id, ProductImage.url == url,
+        ProductImage.barcode.is_not_distinct_from(barcode)
+    ).first()
+    if image is None:
+        has_main = db.query(ProductImage.id).filter(
+            ProductImage.product_id == product.id, ProductImage.is_main
+        ).first() is not None
+        # Another product's copy may already have its sizes
+        sizes_ready = db.query(ProductImage.id).filter(
+            ProductImage.url == url, ProductImage.sizes_ready
+        ).first() is not None
+        image = ProductImage(product_id=product.id, url=url, barcode=barcode,
+                             position=next_position(db, product.id), sizes_ready=sizes_ready, **info)
+        db.add(image)
+        db.flush()
+        set_as_main = set_as_main or not has_main
+    if set_as_main:
+        set_main(db, product, image)
+    return image
+
+
+def set_main(db: Session, product: models.Product, image: models.ProductImage) -> None:
+    # Clear the old flag first; the partial unique index allows one main image
+    db.execute(update(ProductImage).where(
+        ProductImage.product_id == product.id, ProductImage.is_main, ProductImage.id != image.id
+    ).values(is_main=False))
+    image.is_main = True
+    product.image_url = image.url
+
+
+def remove_image(db: Session, product: models.Product, image: models.ProductImage) -> bool:
+    """Delete the row; if it was the main image the next one takes over.
+
+    Returns True when no other row uses the file. The caller should then
+    delete it with ``images.remove_file`` before committing, while the
+    content lock is held.
+    """
+    _lock_content(db, image.content_hash)
+    db.delete(image)
+    db.flush()
+    if image.is_main:
+        successor = db.query(ProductImage).filter(
+            ProductImage.product_id == product.id
+        ).order_by(ProductImage.position).first()
+        if successor is not None:
+            set_main(db, product, successor)
+        else:
+            product.image_url = None
+    return db.query(ProductImage.id).filter(ProductImage.url == image.url).first() is None
+
+
+def generate_image_sizes(url: str) -> None:
+    """Resize the image and mark its rows ready. Opens its own session, so it
+    can run in a worker process."""
+    from app.db.session import SessionLocal
+
+    images.generate_sizes(url)
+    db = SessionLocal()
+    try:
+        db.execute(update(ProductImage).where(ProductImage.url == url).values(sizes_ready=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+def queue_sizes(queue, image: models.ProductImage) -> None:
+    """Generate the sizes of a newly saved image on ``queue`` (a JobQueue),
+    unless a copy already has them.
+
+    Without Pillow the image is served at its original size only.
+    """
+    if image.sizes_ready:
+        return
+    try:
+        images.require_pillow()
+    except RuntimeError as e:
+        print(f"Warning: {str(e)}")
+        return
+    queue.submit(("image-sizes", image.url), generate_image_sizes, image.url)
+
+
+def image_out(image: models.ProductImage) -> dict:
+    """API representation of an image row."""
+    sizes = images.size_urls(image.url) if image.sizes_ready else {}
+    return {
+        "id": image.id,
+        "image_url": image.url,
+        "is_main": image.is_main,
+        "position": image.position,
+        "width": image.width,
+        "height": image.height,
+        "byte_size": image.byte_size,
+        "content_hash": image.content_hash,
+        "thumbnail_url": images.thumbnail_url(sizes),
+        "sizes": sizes,
+    }
+
+
+def prune_content(db: Session) -> int:
+    """Delete stored files no row references, e.g. left by a failed upload.
+    Returns how many were removed."""
+    removed = 0
+    cutoff = time.time() - PRUNE_MIN_AGE
+    for directory, _, filenames in os.walk(images.CONTENT_DIR):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if os.path.getmtime(path) > cutoff:
+                continue
+            if filename.endswith(".part"):
+                os.remove(path)
+                removed += 1
+                continue
+            url = images.content_url(filename)
+            _lock_content(db, filename.split(".")[0])
+            if db.query(ProductImage.id).filter(ProductImage.url == url).first() is None:
+                images.remove_file(url)
+                removed += 1
+            db.commit()
+    return removed
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain product image files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sizes = subparsers.add_parser("sizes", help="Create resized copies for images that lack them")
+    sizes.add_argument("--force", action="store_true", help="Regenerate every image's sizes")
+    sizes.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    subparsers.add_parser("prune", help="Delete stored files that no product image uses")
+
+    args = parser.parse_args(argv)
+    if args.command == "prune":
+        db = SessionLocal()
+        try:
+            print(f"Removed {prune_content(db)} unused files")
+        finally:
+            db.close()
+        return
+
+    try:
+        images.require_pillow()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    db = SessionLocal()
+    try:
+        query = db.query(ProductImage.url).distinct()
+        if not args.force:
+            query = query.filter(ProductImage.sizes_ready.is_(False))
+        urls = [url for url, in query.all()]
+    finally:
+        db.close()
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {url: executor.submit(generate_image_sizes, url) for url in urls}
+        for url, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"{url}: {str(e)}")
+    print(f"Generated sizes for {len(urls) - failed} images ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Daily sales rollups.
+
+``sales_daily_variant`` holds one row per day and variant and
+``sales_daily_totals`` one row per day. They are updated in the same
+transaction that records a sale, so stats can be answered from a number of
+rows proportional to the number of days instead of the number of sales.
+
+Usage:
+    python -m app.db.rollups rebuild [--start 2025-01-01] [--end 2025-12-31]
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from app.db import models
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+import argparse
+
+# variant_id recorded for sale items whose variant no longer exists
+UNKNOWN_VARIANT_ID = 0
+
+# (variant_id, quantity, price, unit_cost)
+SaleLine = Tuple[Optional[int], Decimal, Decimal, Decimal]
+
+
+def record_sales(db: Session, sales: Iterable[Tuple[datetime, List[SaleLine]]]) -> None:
+    """Add sales to the rollups. Call inside the transaction creating them.
+
+    ``sales`` is an iterable of ``(sale_time, lines)``. Rows are aggregated in
+    memory first so each rollup row is touched by exactly one upsert.
+    """
+    per_variant = {}
+    per_day = {}
+    for sale_time, lines in sales:
+        day = sale_time.date()
+        totals = per_day.setdefault(day, [Decimal("0"), Decimal("0"), Decimal("0"), 0])
+        totals[3] += 1
+        seen_variants = set()
+        for variant_id, quantity, price, unit_cost in lines:
+            variant_id = variant_id if variant_id is not None else UNKNOWN_VARIANT_ID
+            revenue = quantity * price
+            cost = quantity * (unit_cost or Decimal("0"))
+            row = per_variant.setdefault((day, variant_id), [Decimal("0"), Decimal("0"), Decimal("0"), 0])
+            row[0] += quantity
+            row[1] += revenue
+            row[2] += cost
+            if variant_id not in seen_variants:
+                row[3] += 1
+                seen_variants.add(variant_id)
+            totals[0] += quantity
+            totals[1] += revenue
+            totals[2] += cost
+
+    if not per_day:
+        return
+
+    # Sorted keys give concurrent transactions the same lock order
+    if per_variant:
+        variant_table = models.SalesDailyRollup.__table__
+        stmt = insert(variant_table).values([
+            {"day": day, "variant_id": variant_id, "quantity": q, "revenue": r, "cost": c, "transactions": t}
+            for (day, variant_id), (q, r, c, t) in sorted(per_variant.items())
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[variant_table.c.day, variant_table.c.variant_id],
+            set_={
+                "quantity": variant_table.c.quantity + stmt.excluded.quantity,
+                "revenue": variant_table.c.revenue + stmt.excluded.revenue,
+                "cost": variant_table.c.cost + stmt.excluded.cost,
+                "transactions": variant_table.c.transactions + stmt.excluded.transactions,
+            }
+        ))
+
+    totals_table = models.SalesDailyTotal.__table__
+    stmt = insert(totals_table).values([
+        {"day": day, "quantity": q, "revenue": r, "cost": c, "transactions": t}
+        for day, (q, r, c, t) in sorted(per_day.items())
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[totals_table.c.day],
+        set_={
+            "quantity": totals_table.c.quantity + stmt.excluded.quantity,
+            "revenue": totals_table.c.revenue + stmt.excluded.revenue,
+            "cost": totals_table.c.cost + stmt.excluded.cost,
+            "transactions": totals_table.c.transactions + stmt.excluded.transactions,
+        }
+    ))
+
+
+def record_sale(db: Session, sale_time: datetime, lines: List[SaleLine]) -> None:
+    """Add a single sale to the rollups."""
+    record_sales(db, [(sale_time, lines)])
+
+
+def clear_rollups(db: Session) -> None:
+    db.execute(text("DELETE FROM sales_daily_variant"))
+    db.execute(text("DELETE FROM sales_daily_totals"))
+
+
+def rebuild_rollups(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> None:
+    """Recompute the rollups from sales/sale_items for ``start``..``end`` (inclusive).
+
+    The rollup tables are locked for the duration so concurrent sales wait
+    instead of incrementing rows that are being replaced. Commits.
+    """
+    db.execute(text("LOCK TABLE sales_daily_variant, sales_daily_totals IN EXCLUSIVE MODE"))
+
+    params = {"start": start, "end": end, "unknown": UNKNOWN_VARIANT_ID}
+    day_filter = "(CAST(:start AS date) IS NULL OR day >= :start) AND (CAST(:end AS date) IS NULL OR day <= :end)"
+    time_filter = (
+        "(CAST(:start AS date) IS NULL OR {col} >= CAST(:start AS date)) "
+        "AND (CAST(:end AS date) IS NULL OR {col} < CAST(:end AS date) + 1)"
+    )
+
+    db.execute(text(f"DELETE FROM sales_daily_variant WHERE {day_filter}"), params)
+    db.execute(text(f"DELETE FROM sales_daily_totals WHERE {day_filter}"), params)
+
+    db.execute(text(f"""
+        INSERT INTO sales_daily_variant (day, variant_id, quantity, revenue, cost, transactions)
+        SELECT CAST(si.sale_time AS date),
+               COALESCE(si.variant_id, :unknown),
+               SUM(si.quantity),
+               SUM(si.quantity * si.price),
+               SUM(si.quantity * si.unit_cost),
+               COUNT(DISTINCT si.sale_id)
+        FROM sale_items si
+        WHERE {time_filter.format(col="si.sale_time")}
+        GROUP BY 1, 2
+    """), params)
+
+    db.execute(text(f"""
+        INSERT INTO sales_daily_totals (day, quantity, revenue, cost, transactions)
+        SELECT CAST(s.sale_time AS date),
+               COALESCE(SUM(items.quantity), 0),
+               COALESCE(SUM(items.revenue), 0),
+               COALESCE(SUM(items.cost), 0),
+               COUNT(*)
+        FROM sales s
+        LEFT JOIN (
+            SELECT si.sale_id, si.sale_time,
+                   SUM(si.quantity) AS quantity,
+                   SUM(si.quantity * si.price) AS revenue,
+                   SUM(si.quantity * si.unit_cost) AS cost
+            FROM sale_items si
+            WHERE {time_filter.format(col="si.sale_time")}
+            GROUP BY si.sale_id, si.sale_time
+        ) items ON items.sale_id = s.id AND items.sale_time = s.sale_time
+        WHERE {time_filter.format(col="s.sale_time")}
+        GROUP BY 1
+    """), params)
+
+    db.commit()
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain daily sales rollups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute rollups from sales history")
+    rebuild_parser.add_argument("--start", type=_parse_date, default=None, help="YYYY-MM-DD")
+    rebuild_parser.add_argument("--end", type=_parse_date, default=None, help="YYYY-MM-DD")
+
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, args.start, args.end)
+        print("Rollups rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -89,6 +89,7 @@ def seed_orders(db: Session):
         for item_data in order_items:
             item = OrderItem(
                 order_id=order.id,
+                order_time=order.order_time,
                 variant_id=item_data['variant_id'],
                 quantity=item_data['quantity'],
                 price=item_data['price']
@@ -0,0 +1,121 @@
+"""Excel (.xlsx) exports written with openpyxl's write-only mode.
+
+Rows come from a server-side cursor and are appended to a write-only
+worksheet, which serialises each row to a temporary file as soon as it is
+added. Memory stays flat however many rows are exported; the finished file is
+then sent in chunks.
+
+Requires openpyxl, which is imported lazily so the API runs without it.
+"""
+from sqlalchemy.sql import Select
+from typing import Iterator, Sequence, Tuple
+import os
+import tempfile
+
+STREAM_BATCH_SIZE = 2000
+CHUNK_SIZE = 64 * 1024
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# (header, column width)
+Column = Tuple[str, float]
+
+
+def require_openpyxl():
+    """Import openpyxl, raising a RuntimeError that says how to install it."""
+    try:
+        import openpyxl
+    except ImportError:
+        raise RuntimeError("Excel exports require openpyxl. Install it with: pip install openpyxl")
+    return openpyxl
+
+
+def _clean(value):
+    # Control characters make Excel reject the whole file
+    if isinstance(value, str):
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def write_xlsx(path: str, db, statement: Select, title: str, columns: Sequence[Column],
+               header_color: str = "366092", total_columns: Sequence[int] = ()) -> int:
+    """Write the rows of ``statement`` to a one-sheet workbook at ``path``.
+
+    Columns listed in ``total_columns`` (0-based) are summed into a bold
+    total row at the bottom. Returns the number of rows written.
+    """
+    require_openpyxl()
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    # Layout must be set before the first row is written
+    for index, (_, width) in enumerate(columns, 1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+    ws.freeze_panes = "A2"
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+    header = []
+    for name, _ in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="center")
+        header.append(cell)
+    ws.append(header)
+
+    totals = {index: 0 for index in total_columns}
+    count = 0
+    result = db.execute(statement, execution_options={"stream_results": True, "yield_per": STREAM_BATCH_SIZE})
+    for rows in result.partitions():
+        for row in rows:
+            for index in totals:
+                totals[index] += row[index] or 0
+            ws.append([_clean(value) for value in row])
+        count += len(rows)
+
+    if totals:
+        bold = Font(bold=True)
+        label_index = min(totals) - 1
+        total_row = []
+        for index in range(len(columns)):
+            value = "Total" if index == label_index else totals.get(index)
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = bold
+            total_row.append(cell)
+        ws.append([])
+        ws.append(total_row)
+
+    wb.save(path)
+    return count
+
+
+def iter_xlsx(statement: Select, title: str, columns: Sequence[Column],
+              header_color: str = "366092", total_columns: Sequence[int] = ()) -> Iterator[bytes]:
+    """Build the workbook in a temporary file and yield it in chunks.
+
+    Uses its own session, as a streaming response outlives the request's
+    dependencies.
+    """
+    from app.db.session import SessionLocal
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    db = SessionLocal()
+    try:
+        write_xlsx(path, db, statement, title, columns, header_color, total_columns)
+        db.close()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        db.close()
+        os.remove(path)
@@ -0,0 +1,134 @@
+"""Variant stock: on hand, reserved by open orders, and available to sell.
+
+``variants.quantity`` is the stock on hand and ``variants.reserved_quantity``
+what open (pending, confirmed or processing) orders have set aside. The
+generated column ``variants.available_quantity`` is their difference, so the
+POS and the website read what can be sold without touching orders.
+
+An order's lifecycle moves stock as follows:
+
+* created: ``reserve`` (fails unless enough is available)
+* shipped: ``fulfil`` (the reservation leaves stock on hand)
+* cancelled while open: ``release``
+* cancelled after shipping: ``restock``
+
+Every function applies all its variants in one conditional UPDATE and returns
+``(variant_id, quantity, available_quantity)`` rows for the stock events.
+Call them inside the transaction making the change.
+"""
+from sqlalchemy import Integer, Numeric, column, func, or_, select, update, values
+from sqlalchemy.orm import Session
+from app.db import models
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+# Order statuses that hold a reservation; NULL status counts as pending
+RESERVING_STATUSES = (None, "pending", "confirmed", "processing")
+
+# (variant_id, quantity on hand, available quantity)
+StockLevel = Tuple[int, Decimal, Decimal]
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a variant doesn't have enough stock available."""
+
+    def __init__(self, variant_id: int, requested: Decimal, available: Decimal):
+        self.variant_id = variant_id
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Not enough stock for variant {variant_id}. Available: {available}, Requested: {requested}"
+        )
+
+
+def _apply(db: Session, quantities: Dict[int, Decimal], changes, check_available: bool = False) -> List[StockLevel]:
+    """Run one UPDATE over ``quantities`` joined as a VALUES list named ``deltas``."""
+    rows = sorted(
+        (variant_id, Decimal(str(quantity)))
+        for variant_id, quantity in quantities.items()
+        if variant_id is not None and quantity
+    )
+    if not rows:
+        return []
+
+    Variant = models.Variant
+    deltas = values(
+        column("id", Integer), column("quantity", Numeric(10, 3)), name="deltas"
+    ).data(rows)
+    # Lock in id order so concurrent multi-variant updates can't deadlock
+    locked = select(Variant.id).where(
+        Variant.id.in_([variant_id for variant_id, _ in rows])
+    ).order_by(Variant.id).with_for_update().cte("locked")
+
+    conditions = [Variant.id == deltas.c.id, Variant.id == locked.c.id]
+    if check_available:
+        # Re-evaluated against the latest row version, so two orders can't
+        # both take the last unit. Negative quantities give stock back.
+        conditions.append(or_(deltas.c.quantity < 0, Variant.available_quantity >= deltas.c.quantity))
+    levels = db.execute(
+        update(Variant)
+        .where(*conditions)
+        .values(changes(Variant, deltas.c.quantity))
+        .returning(Variant.id, Variant.quantity, Variant.available_quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if check_available and len(levels) < len(rows):
+        updated = {row.id for row in levels}
+        variant_id, requested = next(row for row in rows if row[0] not in updated)
+        available = db.execute(
+            select(Variant.available_quantity).where(Variant.id == variant_id)
+        ).scalar()
+        if available is None:
+            raise ValueError(f"Variant {variant_id} not found")
+        raise InsufficientStockError(variant_id, requested, available)
+    return [tuple(row) for row in levels]
+
+
+def reserve(db: Session, quantities: Dict[int, Decimal]) -> List[StockLevel]:
+    """Reserve ``{variant_id: quantity}`` for an open order.
+
+    Negative quantities release, so an edited order's per-variant differences
+    go through one call. Raises InsufficientStockError if any variant has less
+    available; the caller must roll back, as the other variants may already
+    be reserved.
+    """
+    return _apply(db, quantities, lambda v, q: {"reserved_quantity": v.reserved_quantity + q}, check_available=True)
+
+
+def release(db: Session, quantities: Dict[int, Decimal]) -> List[StockLevel]:
+    """Give back quantities reserved by an order that is cancelled or edited."""
+    return _apply(db, quantities, lambda v, q: {"reserved_quantity": v.reserved_quantity - q})
+
+
+def fulfil(db: Session, quantities: Dict[int, Decimal]) -> List[StockLevel]:
+    """Turn reservations into shipped stock: both on hand and reserved go down."""
+    return _apply(db, quantities, lambda v, q: {
+        "quantity": v.quantity - q,
+        "reserved_quantity": v.reserved_quantity - q,
+    })
+
+
+def deduct(db: Session, quantities: Dict[int, Decimal]) -> List[StockLevel]:
+    """Take stock on hand without a reservation, e.g. items added to a shipped order.
+
+    Negative quantities put stock back. Raises InsufficientStockError like ``reserve``.
+    """
+    return _apply(db, quantities, lambda v, q: {"quantity": v.quantity - q}, check_available=True)
+
+
+def restock(db: Session, quantities: Dict[int, Decimal]) -> List[StockLevel]:
+    """Put stock back on hand, e.g. a shipped order that was cancelled."""
+    return _apply(db, quantities, lambda v, q: {"quantity": v.quantity + q})
+
+
+def order_quantities(db: Session, order_ids: List[int]) -> Dict[int, Decimal]:
+    """Total quantity per variant across the items of ``order_ids``."""
+    if not order_ids:
+        return {}
+    OrderItem = models.OrderItem
+    return dict(db.execute(
+        select(OrderItem.variant_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.variant_id)
+    ).all())
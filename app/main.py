@@ -1,8 +1,16 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from app.api import products, variants, categories, sales, orders, stats, auth, expenses, product_images, customers
+import asyncio
+from starlette.concurrency import run_in_threadpool
+from app.api import products, variants, categories, sales, orders, stats, auth, expenses, product_images, customers, events, exports, reports, invoices
+from app.db.session import SessionLocal, DATABASE_URL
+from app.core.events import EventBroker
+from app.core.jobs import JobQueue
+from app.core.static_files import CachedStaticFiles
+from app.core.upload_limits import UploadLimitMiddleware
+from app.core.config import IMAGE_WORKERS, INVOICE_WORKERS, MAX_IMAGE_UPLOAD_BYTES
+from app.db.partitions import ensure_future_partitions
 
 app = FastAPI(title="Shiakati Store Backend")
 
@@ -14,10 +22,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadLimitMiddleware, max_upload_bytes=MAX_IMAGE_UPLOAD_BYTES)
 
 # Mount static files
 os.makedirs("static/images/products", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Content-addressed images are served as immutable
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -28,5 +38,56 @@ app.include_router(sales.router, prefix="/sales", tags=["sales"])
 app.include_router(orders.router, prefix="/orders", tags=["orders"])
 app.include_router(customers.router, prefix="/customers", tags=["customers"])
 app.include_router(stats.router, prefix="/stats", tags=["stats"])
+app.include_router(reports.router, prefix="/reports", tags=["reports"])
 app.include_router(expenses.router, prefix="/expenses", tags=["expenses"])
-app.include_router(product_images.router, prefix="/product-images", tags=["product_images"])
\ No newline at end of file
+app.include_router(product_images.router, prefix="/product-images", tags=["product_images"])
+app.include_router(events.router, prefix="/events", tags=["events"])
+app.include_router(exports.router, prefix="/exports", tags=["exports"])
+app.include_router(invoices.router, prefix="/invoices", tags=["invoices"])
+
+
+PARTITION_CHECK_INTERVAL = 12 * 60 * 60  # seconds
+
+def _ensure_partitions():
+    db = SessionLocal()
+    try:
+        created = ensure_future_partitions(db)
+        if created:
+            print(f"Created {created} monthly partitions")
+    except Exception as e:
+        db.rollback()
+        print(f"Warning: could not ensure monthly partitions: {str(e)}")
+    finally:
+        db.close()
+
+async def _partition_maintenance_loop():
+    while True:
+        await run_in_threadpool(_ensure_partitions)
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    # Keep upcoming monthly partitions of sales/orders created ahead of time
+    app.state.partition_task = asyncio.create_task(_partition_maintenance_loop())
+
+@app.on_event("startup")
+async def start_event_broker():
+    # Forward pg_notify change events to /events/stream subscribers
+    app.state.event_broker = EventBroker(DATABASE_URL)
+    app.state.event_broker.start(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def stop_event_broker():
+    await run_in_threadpool(app.state.event_broker.stop)
+
+@app.on_event("startup")
+async def start_job_queue():
+    # Worker processes for PDF rendering; started on the first job
+    app.state.job_queue = JobQueue(max_workers=INVOICE_WORKERS)
+    # Separate workers for resizing uploaded images, so uploads never wait on a report
+    app.state.image_queue = JobQueue(max_workers=IMAGE_WORKERS)
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    app.state.job_queue.shutdown()
+    app.state.image_queue.shutdown()
@@ -5,6 +5,7 @@ from datetime import datetime
 class CategoryBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="Category name")
     description: Optional[str] = Field(None, max_length=500, description="Category description")
+    parent_id: Optional[int] = Field(None, description="Parent category; None for a top-level category")
 
 class CategoryCreate(CategoryBase):
     pass
@@ -22,4 +23,14 @@ class Category(CategoryBase):
         "json_encoders": {
             datetime: lambda v: v.isoformat()
         }
-    }
\ No newline at end of file
+    }
+
+class CategoryNode(BaseModel):
+    """A category in the tree returned by GET /categories/tree."""
+    id: int
+    name: str
+    description: Optional[str] = None
+    parent_id: Optional[int] = None
+    products_count: int = 0  # Products directly in this category
+    total_products_count: int = 0  # Including all subcategories
+    children: List["CategoryNode"] = []
@@ -1,19 +1,42 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
+import re
+
+def normalize_phone(phone: str) -> str:
+    """Canonical form of a phone number, used as the customer's unique key.
+
+    Drops everything but digits and '+' and writes the +213 / 00213 country
+    code as the national leading 0: "+213 (555) 12-34-56" -> "0555123456".
+    The normalize_customer_phones migration applied the same rules.
+    """
+    return re.sub(r"^(\+|00)213", "0", re.sub(r"[^0-9+]", "", phone))
+
+def _normalize_phone_number(cls, v):
+    if v is None:
+        return v
+    v = normalize_phone(v)
+    if len(v) < 8:
+        raise ValueError("Phone number must have at least 8 digits")
+    return v
 
 class CustomerBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     phone_number: str = Field(..., min_length=8, max_length=20)
 
+# Only input is normalized; stored numbers the migration left alone must
+# still serialize in responses
 class CustomerCreate(CustomerBase):
-    pass
+    normalize_phone_number = validator('phone_number', allow_reuse=True)(_normalize_phone_number)
 
 class CustomerUpdate(CustomerBase):
     name: Optional[str] = None
     phone_number: Optional[str] = None
 
+    normalize_phone_number = validator('phone_number', allow_reuse=True)(_normalize_phone_number)
+
 class CustomerSummary(BaseModel):
     total_orders: int = 0
     total_spent: Decimal = Decimal('0')
@@ -30,3 +53,41 @@ class Customer(CustomerBase):
             datetime: lambda v: v.isoformat(),
             Decimal: float
         }
+
+class CustomerSegment(str, Enum):
+    CHAMPIONS = "champions"
+    LOYAL = "loyal"
+    NEW = "new"
+    AT_RISK = "at_risk"
+    LOST = "lost"
+    REGULAR = "regular"
+
+class CustomerMetricsSort(str, Enum):
+    RECENCY = "recency"
+    FREQUENCY = "frequency"
+    MONETARY = "monetary"
+    FIRST_PURCHASE = "first_purchase"
+    AVERAGE_ORDER_VALUE = "average_order_value"
+
+class CustomerMetrics(BaseModel):
+    customer_id: int
+    name: str
+    phone_number: str
+    first_purchase_at: Optional[datetime] = None
+    last_purchase_at: Optional[datetime] = None
+    recency_days: Optional[int] = None  # Days since the last purchase
+    purchase_count: int  # Frequency: non-cancelled orders + in-store sales
+    order_count: int
+    sale_count: int
+    total_spent: float  # Monetary value
+    average_order_value: float
+    r_score: int  # 1-5 quintiles across customers, 5 is best
+    f_score: int
+    m_score: int
+    segment: CustomerSegment
+
+class CustomerMetricsPage(BaseModel):
+    total: int
+    page: int
+    page_size: int
+    items: List[CustomerMetrics]
@@ -0,0 +1,8 @@
+from enum import Enum
+
+class ExportDataset(str, Enum):
+    sales = "sales"
+    sale_items = "sale_items"
+    orders = "orders"
+    order_items = "order_items"
+    inventory = "inventory"
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from enum import Enum
+
+class InvoiceJobStatus(str, Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+class MonthlyInvoiceRequest(BaseModel):
+    year: int = Field(..., ge=2000, le=2100)
+    month: int = Field(..., ge=1, le=12)
+
+class InvoiceJob(BaseModel):
+    id: str
+    year: int
+    month: int
+    status: InvoiceJobStatus
+    error: Optional[str] = None
+    download_url: Optional[str] = None  # Set once status is done
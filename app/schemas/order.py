@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from decimal import Decimal
+from .customer import CustomerCreate
 
 class DeliveryMethod(str, Enum):
     HOME = "home"
@@ -73,7 +74,7 @@ class OrderItemOut(OrderItemBase):
         return cls(**data)
 
 class OrderBase(BaseModel):
-    customer_id: int
+    customer_id: Optional[int] = None
     wilaya: str = Field(..., min_length=1)
     commune: str = Field(..., min_length=1)
     delivery_method: DeliveryMethod
@@ -82,6 +83,15 @@ class OrderBase(BaseModel):
     
 class OrderCreate(OrderBase):
     items: List[OrderItemCreate]
+    # Instead of customer_id: the customer is created, or updated if one with
+    # the same (normalized) phone number exists, in the order's transaction
+    customer: Optional[CustomerCreate] = None
+
+    @root_validator(skip_on_failure=True)
+    def one_customer(cls, values):
+        if (values.get('customer_id') is None) == (values.get('customer') is None):
+            raise ValueError("Provide either customer_id or customer")
+        return values
 
     @validator('total')
     def validate_total(cls, v, values):
@@ -104,6 +114,20 @@ class OrderItemUpdate(BaseModel):
     quantity: Optional[int] = Field(None, ge=1)
     price: Optional[Decimal] = Field(None, ge=0)
 
+class OrderLine(OrderItemBase):
+    id: Optional[int] = None  # Existing item to keep or change; None adds a line
+
+class OrderItemsReplace(BaseModel):
+    """The order's complete set of lines; existing items left out are removed."""
+    items: List[OrderLine]
+
+    @validator('items')
+    def unique_item_ids(cls, v):
+        ids = [line.id for line in v if line.id is not None]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each existing item may only appear once")
+        return v
+
 class OrderOut(BaseModel):
     id: int
     customer_id: int
@@ -168,3 +192,65 @@ class OrderOut(BaseModel):
             print(f"Error creating OrderOut for order {data.get('id')}: {str(e)}")
             print(f"Data: {data}")
             raise
+
+
+class OrderSummary(BaseModel):
+    """Order row for list views; items are only included when requested."""
+    id: int
+    customer_id: int
+    customer_name: str = "Unknown Customer"
+    phone_number: str = "No Phone"
+    wilaya: str
+    commune: str
+    delivery_method: DeliveryMethod
+    order_time: datetime
+    status: str
+    notes: Optional[str] = None
+    total: Decimal
+    item_count: int = 0
+    items: Optional[List[OrderItemOut]] = None
+
+    model_config = {
+        "json_encoders": {
+            datetime: lambda v: v.isoformat(),
+            Decimal: lambda v: float(v)
+        }
+    }
+
+class OrderPage(BaseModel):
+    orders: List[OrderSummary]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page; None on the last page
+
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: OrderStatus
+
+class OrderStatusOutcome(BaseModel):
+    order_id: int
+    success: bool
+    old_status: Optional[str] = None
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class OrderStatusBulkResult(BaseModel):
+    updated: int
+    failed: int
+    results: List[OrderStatusOutcome]
+
+class PickListLine(BaseModel):
+    variant_id: int
+    product_name: str = "Unknown Product"
+    size: Optional[str] = None
+    color: Optional[str] = None
+    barcode: Optional[str] = None
+    quantity: int
+    order_count: int  # Orders that contain the variant
+
+class PickList(BaseModel):
+    statuses: List[OrderStatus]
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    order_count: int
+    total_units: int
+    generated_at: datetime
+    lines: List[PickListLine]  # Sorted by product, size and color
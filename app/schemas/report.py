@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import date
+from enum import Enum
+
+class ReportGranularity(str, Enum):
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+class ExpenseCategoryAmount(BaseModel):
+    category: str
+    amount: float
+
+class PnLPeriod(BaseModel):
+    period_start: date
+    period_end: date  # Inclusive
+    sales_revenue: float  # In-store sales
+    order_revenue: float  # Delivered online orders
+    revenue: float
+    cogs: float  # Unit costs captured when the items were sold
+    gross_profit: float
+    gross_margin_percent: float
+    expenses: List[ExpenseCategoryAmount] = []
+    total_expenses: float
+    net_profit: float
+    net_margin_percent: float
+
+class PnLReport(BaseModel):
+    start_date: date
+    end_date: date
+    granularity: ReportGranularity
+    periods: List[PnLPeriod]
+    totals: PnLPeriod
@@ -21,7 +21,7 @@ class SaleBase(BaseModel):
         return v
 
 class SaleCreate(SaleBase):
-    pass
+    customer_id: Optional[int] = None  # Attach the sale to a known customer
 
 class SaleItemOut(SaleItemBase):
     id: int
@@ -43,4 +43,22 @@ class SaleOut(BaseModel):
         json_encoders = {
             datetime: lambda v: v.isoformat(),
             Decimal: lambda v: float(v)  # Convert to float for JSON serialization
-        }
\ No newline at end of file
+        }
+
+class SaleBatchItem(SaleCreate):
+    sale_time: Optional[datetime] = None  # Original sale time when importing or replaying a journal
+    payment_method: Optional[str] = None
+
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleBatchItem] = Field(..., min_length=1, max_length=1000)
+
+class SaleBatchOutcome(BaseModel):
+    index: int  # Position of the sale in the submitted batch
+    success: bool
+    sale_id: Optional[int] = None
+    error: Optional[str] = None
+
+class SaleBatchResult(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[SaleBatchOutcome]
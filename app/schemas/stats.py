@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
+from enum import Enum
 
 class TimeSeriesPoint(BaseModel):
     date: datetime
@@ -26,6 +27,8 @@ class StatsSummary(BaseModel):
     total_orders: int
     total_revenue: float
     total_profit: float
+    total_cost: float = 0
+    margin_percent: float = 0
     sales_over_time: List[TimeSeriesPoint] = []
     top_categories: List[CategoryStats] = []
     top_products: List[ProductStats] = []
@@ -50,4 +53,57 @@ class ProductSaleSummary(BaseModel):
 class SalesOverTime(BaseModel):
     date: date
     revenue: float
-    num_sales: int
\ No newline at end of file
+    num_sales: int
+
+class MarginStats(BaseModel):
+    id: int
+    name: str
+    quantity: float
+    revenue: float
+    cost: float
+    profit: float
+    margin_percent: float
+
+class TimeGranularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class TimeSeriesGroupBy(str, Enum):
+    CATEGORY = "category"
+    PRODUCT = "product"
+    PAYMENT_METHOD = "payment_method"
+    WILAYA = "wilaya"
+
+class TimeSeriesGroup(BaseModel):
+    key: Optional[str] = None  # Group value (id, payment method, wilaya); None when ungrouped
+    label: str
+    revenue: List[float]  # One value per bucket, aligned with TimeSeries.buckets
+    quantity: List[float]
+    transactions: List[int]
+
+class TimeSeries(BaseModel):
+    granularity: TimeGranularity
+    start_date: date
+    end_date: date
+    group_by: Optional[TimeSeriesGroupBy] = None
+    source: str  # "rollup", "sales" or "orders"
+    buckets: List[datetime]
+    series: List[TimeSeriesGroup]
+
+class ReorderSuggestion(BaseModel):
+    variant_id: int
+    product_id: Optional[int] = None
+    product_name: str
+    size: Optional[str] = None
+    color: Optional[str] = None
+    barcode: str
+    stock: float
+    daily_velocity: float  # Mean units sold per day over the window
+    daily_std: float
+    days_of_cover: Optional[float] = None  # None when nothing sold in the window
+    safety_stock: float
+    reorder_point: float
+    suggested_quantity: float
+    needs_reorder: bool
@@ -31,6 +31,9 @@ class VariantOut(BaseModel):
     price: float
     cost_price: Optional[float]  # Added cost_price field
     quantity: float
+    # Held by open orders; available_quantity = quantity - reserved_quantity
+    reserved_quantity: float = 0
+    available_quantity: Optional[float] = None
     created_at: datetime
     product_name: Optional[str] = None  # Added product_name field
     
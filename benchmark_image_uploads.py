@@ -0,0 +1,108 @@
+"""Measure how concurrent image uploads affect other requests' latency.
+
+Probes a cheap endpoint on its own, then again while several large images
+are uploaded at once, and prints latency percentiles for both phases. With
+uploads handled off the event loop the two should stay close.
+
+Run it from another machine than the server, or at least with spare cores:
+on a single core the client's own work shows up as server latency.
+
+Usage (against a running server; needs httpx and Pillow):
+    python benchmark_image_uploads.py --product-id 1 [--uploads 8] [--size-mb 8]
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+
+import httpx
+
+
+def make_image(size_mb: float) -> bytes:
+    """A PNG of random pixels, which barely compresses, of about ``size_mb``."""
+    from PIL import Image
+
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def summary(latencies: List[float]) -> str:
+    ms = sorted(latency * 1000 for latency in latencies)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"n={len(ms)} p50={statistics.median(ms):.1f}ms p95={p95:.1f}ms max={ms[-1]:.1f}ms"
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, interval: float) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def upload(client: httpx.AsyncClient, product_id: int, data: bytes) -> str:
+    response = await client.post(
+        f"/product-images/upload/{product_id}",
+        files={"file": ("benchmark.png", data, "image/png")},
+        timeout=300,
+    )
+    response.raise_for_status()
+    return response.json()["image_url"]
+
+
+async def run(args) -> None:
+    # Distinct images, so uploads aren't stored once and served from the same file
+    data = [make_image(args.size_mb) for _ in range(args.uploads)]
+    print(f"Uploading {args.uploads} x {len(data[0]) / (1024 * 1024):.1f} MB, probing {args.probe_path}")
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        stop = asyncio.Event()
+        probing = asyncio.create_task(probe(client, args.probe_path, stop, args.interval))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        baseline = await probing
+
+        stop = asyncio.Event()
+        probing = asyncio.create_task(probe(client, args.probe_path, stop, args.interval))
+        start = time.perf_counter()
+        urls = await asyncio.gather(*(upload(client, args.product_id, image) for image in data))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        during = await probing
+
+        print(f"baseline:       {summary(baseline)}")
+        print(f"during uploads: {summary(during)}")
+        print(f"uploads took {elapsed:.2f}s")
+
+        if not args.keep:
+            for url in urls:
+                await client.delete(f"/product-images/delete/{args.product_id}", params={"image_url": url})
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark request latency during image uploads")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--product-id", type=int, required=True, help="Product to upload images to")
+    parser.add_argument("--probe-path", default=None, help="Endpoint to probe (default: the product's image list)")
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=float, default=8, help="Size of each uploaded image")
+    parser.add_argument("--baseline", type=float, default=3, help="Seconds to probe before uploading")
+    parser.add_argument("--interval", type=float, default=0.01, help="Pause between probes in seconds")
+    parser.add_argument("--keep", action="store_true", help="Keep the uploaded images")
+
+    args = parser.parse_args(argv)
+    if args.probe_path is None:
+        args.probe_path = f"/product-images/list/{args.product_id}"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from PyQt5.QtCore import Qt, QTimer, QDate, QDateTime, QLocale
 from PyQt5.QtGui import QFont, QTextDocument
 from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
 from ...utils.api_client import APIClient
+from ...utils.event_stream import EventStream
 import os
 import io
 import base64
@@ -125,10 +126,7 @@ class MainWindow(QMainWindow):
             self.content_stack.addWidget(self.expenses_page)
             self.content_stack.addWidget(self.images_page)
             
-            # Set up periodic stats refresh
-            self.stats_timer = QTimer()
-            self.stats_timer.timeout.connect(self.update_stats)
-            self.stats_timer.start(30000)  # Refresh every 30 seconds
+            # Stats/inventory/orders are refreshed from server events once logged in
 
             # Initially show login
             self.show_login()
@@ -347,6 +345,8 @@ class MainWindow(QMainWindow):
                 self.switch_page("pos")
                 # Load initial data
                 self.load_initial_data()
+                # Subscribe to server push of sales, orders and stock changes
+                self.start_event_stream()
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to initialize application after login: {str(e)}")
         else:
@@ -366,6 +366,73 @@ class MainWindow(QMainWindow):
             import traceback
             traceback.print_exc()
 
+    def start_event_stream(self):
+        """Start listening for server events and wire them to incremental refreshes."""
+        if getattr(self, 'event_stream', None) is not None:
+            return
+        
+        # Bursts of events (e.g. a batch of sales) collapse into one reload
+        self.stats_refresh_timer = QTimer(self)
+        self.stats_refresh_timer.setSingleShot(True)
+        self.stats_refresh_timer.setInterval(1000)
+        self.stats_refresh_timer.timeout.connect(self.update_stats)
+        
+        self.orders_refresh_timer = QTimer(self)
+        self.orders_refresh_timer.setSingleShot(True)
+        self.orders_refresh_timer.setInterval(500)
+        self.orders_refresh_timer.timeout.connect(self.load_orders_data)
+        
+        self.event_stream = EventStream(self.api_client, self)
+        self.event_stream.event_received.connect(self.handle_server_event)
+        self.event_stream.connection_changed.connect(self.on_event_stream_connection)
+        self.event_stream.start()
+
+    def on_event_stream_connection(self, connected: bool):
+        """Poll stats on a timer only while push updates are unavailable."""
+        if connected:
+            # Anything that changed while we were disconnected was missed
+            if getattr(self, '_event_stream_was_connected', False):
+                self.handle_server_event("resync", {})
+            self._event_stream_was_connected = True
+        timer = getattr(self, 'stats_timer', None)
+        if timer is None:
+            return
+        if connected:
+            timer.stop()
+        elif not timer.isActive():
+            timer.start(30000)
+
+    def handle_server_event(self, event_type: str, data: dict):
+        """Apply a server event to the affected views."""
+        try:
+            if event_type == "variant.stock_changed":
+                levels = data.get("variants", [])
+                if self.api_client.apply_stock_levels(levels):
+                    # A variant we don't know about yet (e.g. created on another terminal)
+                    self.setup_inventory_table()
+                else:
+                    self.apply_stock_levels_to_table(levels)
+            elif event_type == "sale.created":
+                self.stats_refresh_timer.start()
+            elif event_type in ("order.created", "order.status_changed"):
+                self.orders_refresh_timer.start()
+                self.stats_refresh_timer.start()
+            elif event_type == "resync":
+                # Events may have been missed; reload everything once
+                self.api_client.clear_cache("inventory_data")
+                self.setup_inventory_table()
+                self.orders_refresh_timer.start()
+                self.stats_refresh_timer.start()
+        except Exception as e:
+            print(f"Error handling server event {event_type}: {str(e)}")
+
+    def closeEvent(self, event):
+        """Stop the event stream thread before closing."""
+        if getattr(self, 'event_stream', None) is not None:
+            self.event_stream.stop()
+            self.event_stream = None
+        super().closeEvent(event)
+
     def setup_sidebar(self):
         """Set up the sidebar with navigation buttons."""
         self.sidebar = QWidget()
@@ -6,15 +6,11 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, 
     QTableWidget, QTableWidgetItem, QDateEdit, QMessageBox, QDialog,
     QFormLayout, QDialogButtonBox, QDoubleSpinBox, QComboBox,
-    QTextEdit, QHeaderView, QWidget, QFileDialog
+    QTextEdit, QHeaderView, QWidget, QFileDialog, QApplication
 )
 from PyQt5.QtCore import Qt, QDate, QDateTime
 from PyQt5.QtGui import QColor
 
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
-
 
 class ExpensesPageMixin:
     """Mixin class for the Expenses page functionality."""
@@ -649,107 +645,32 @@ class ExpensesPageMixin:
                 QMessageBox.warning(self, "Error", f"Failed to delete expense: {str(e)}")
 
     def export_expenses_to_excel(self):
-        """Export expenses data to Excel spreadsheet."""
-        if self.expenses_table.rowCount() == 0:
-            QMessageBox.warning(self, "Warning", "No expenses to export")
+        """Download the expenses in the selected date range as an Excel file built by the server."""
+        start = self.expense_start_date.date().toString("yyyy-MM-dd")
+        end = self.expense_end_date.date().toString("yyyy-MM-dd")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Excel File", f"expenses_{start}_{end}.xlsx", "Excel Files (*.xlsx);;All Files (*)"
+        )
+        if not file_path:
             return
+        if not file_path.endswith(".xlsx"):
+            file_path += ".xlsx"
 
+        QApplication.setOverrideCursor(Qt.WaitCursor)
         try:
-            # Create a new workbook and select the active worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Expenses"
+            exported = self.api_client.download_excel_export("expenses", file_path, start, end)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if not exported:
+            QMessageBox.warning(self, "Error", "Failed to export expenses")
+            return
 
-            # Define styles
-            header_font = Font(bold=True, size=12, color="FFFFFF")
-            header_fill = PatternFill(start_color="C0392B", end_color="C0392B", fill_type="solid")  # Red for expenses
-            border = Border(
-                left=Side(border_style="thin"),
-                right=Side(border_style="thin"),
-                top=Side(border_style="thin"),
-                bottom=Side(border_style="thin")
-            )
-            
-            # Add headers
-            headers = ["ID", "Date", "Category", "Amount", "Description", "Payment Method"]
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Add data from visible rows (respecting filters)
-            row_num = 2
-            total_amount = 0
-            for table_row in range(self.expenses_table.rowCount()):
-                if not self.expenses_table.isRowHidden(table_row):
-                    # Skip the Actions column
-                    for col in range(6):  # Only first 6 columns (exclude Actions)
-                        item = self.expenses_table.item(table_row, col)
-                        if item:
-                            cell = ws.cell(row=row_num, column=col+1, value=item.text())
-                            cell.border = border
-                            
-                            # Right align amount column
-                            if col == 3:  # Amount column
-                                cell.alignment = Alignment(horizontal="right")
-                                try:
-                                    # Store the numeric amount for total calculation
-                                    amount = self.parse_price(item.text())
-                                    total_amount += amount
-                                except:
-                                    pass
-                    
-                    row_num += 1
-            
-            # Add total row at the bottom
-            row_num += 1
-            total_label = ws.cell(row=row_num, column=3, value="Total")
-            total_label.font = Font(bold=True)
-            total_label.border = border
-            
-            total_value = ws.cell(row=row_num, column=4, value=self.format_price(total_amount))
-            total_value.font = Font(bold=True, color="C0392B")  # Red color
-            total_value.border = border
-            total_value.alignment = Alignment(horizontal="right")
-            
-            # Auto-size columns
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Ask user for save location
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, "Save Excel File", "", "Excel Files (*.xlsx);;All Files (*)"
-            )
-            
-            if file_path:
-                if not file_path.endswith(".xlsx"):
-                    file_path += ".xlsx"
-                wb.save(file_path)
-                QMessageBox.information(self, "Success", f"Expenses exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                reply = QMessageBox.question(
-                    self, 
-                    "Open File", 
-                    "Would you like to open the exported file?",
-                    QMessageBox.Yes | QMessageBox.No, 
-                    QMessageBox.No
-                )
-                
-                if reply == QMessageBox.Yes:
-                    self.open_file_with_default_app(file_path)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to export expenses: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        reply = QMessageBox.question(
+            self,
+            "Open File",
+            f"Expenses exported to {file_path}\n\nWould you like to open the exported file?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.open_file_with_default_app(file_path)
@@ -195,52 +195,36 @@ class ImagesPageMixin:
             product_names = set()
             categories = set()
             
-            # Process products for table display - get fresh data for each product
+            # Images of every product in one request
+            product_ids = [product.get('id') for product in products if product.get('id')]
+            images_by_product = self.api_client.get_product_images_batch(product_ids)
+            if images_by_product is None:
+                print("Warning: Could not load product images, falling back to main image URLs")
+            
+            # Process products for table display
             rows = []
             for product in products:
                 product_id = product.get('id')
                 if not product_id:
                     continue
-                
-                try:
-                    # Get fresh product data to ensure we have latest visibility status
-                    fresh_product = self.api_client.get_product_by_id(product_id)
-                    if fresh_product:
-                        product = fresh_product  # Use the fresh data
-                except Exception as e:
-                    print(f"Warning: Could not get fresh data for product {product_id}: {str(e)}")
-                    # Continue with the original product data as fallback
                     
                 product_name = product.get('name', 'Unknown Product')
                 category_name = product.get('category_name', 'Uncategorized')
                 variants_count = str(product.get('variants_count', 0))
                 show_on_website = product.get('show_on_website', 0)
                 
-                # Debug logging for visibility
-                print(f"Product {product_id} ({product_name}): show_on_website = {show_on_website} (type: {type(show_on_website)})")
-                
                 # Add to search suggestions
                 if product_name:
                     product_names.add(product_name)
                 if category_name:
                     categories.add(category_name)
                 
-                # Check if product has images using the proper API method
-                has_images = False
-                try:
-                    # Use the dedicated API method to check for images
-                    product_images = self.api_client.get_product_images_by_id(product_id)
-                    has_images = bool(product_images and len(product_images) > 0)
-                    print(f"Product {product_id}: Found {len(product_images) if product_images else 0} images via API")
-                except Exception as e:
-                    print(f"Error checking images for product {product_id}: {str(e)}")
-                    # Fallback to checking the main image URL
+                # Check if product has images
+                if images_by_product is not None:
+                    has_images = bool(images_by_product.get(product_id))
+                else:
                     main_image_url = product.get('image_url')
-                    if main_image_url and main_image_url != "None" and main_image_url.strip():
-                        has_images = True
-                        print(f"Product {product_id}: Fallback found main image: {main_image_url}")
-                    else:
-                        print(f"Product {product_id}: No images found (fallback)")
+                    has_images = bool(main_image_url and main_image_url != "None" and main_image_url.strip())
                     
                 rows.append({
                     'id': product_id,
@@ -374,8 +358,8 @@ class ImagesPageMixin:
                 return
                 
             # Check if product has images
-            images = self.api_client.get_product_images_by_id(product_id)
-            has_images = bool(images and len(images) > 0)
+            images = (self.api_client.get_product_images_batch([product_id]) or {}).get(product_id)
+            has_images = bool(images)
             
             # Update "Has Images" column (column 4)
             has_images_item = QTableWidgetItem()
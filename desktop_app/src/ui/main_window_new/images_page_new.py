@@ -189,6 +189,12 @@ class ImagesPageMixin:
             product_names = set()
             categories = set()
             
+            # Images of every product in one request
+            product_ids = [product.get('id') for product in products if product.get('id')]
+            images_by_product = self.api_client.get_product_images_batch(product_ids)
+            if images_by_product is None:
+                print("Warning: Could not load product images, falling back to main image URLs")
+            
             # Process products for table display
             rows = []
             for product in products:
@@ -208,10 +214,11 @@ class ImagesPageMixin:
                     categories.add(category_name)
                 
                 # Check if product has images
-                has_images = False
-                main_image_url = product.get('image_url')
-                if main_image_url and main_image_url != "None" and main_image_url.strip():
-                    has_images = True
+                if images_by_product is not None:
+                    has_images = bool(images_by_product.get(product_id))
+                else:
+                    main_image_url = product.get('image_url')
+                    has_images = bool(main_image_url and main_image_url != "None" and main_image_url.strip())
                     
                 rows.append({
                     'id': product_id,
@@ -341,8 +348,8 @@ class ImagesPageMixin:
                 return
                 
             # Check if product has images
-            images = self.api_client.get_product_images_by_id(product_id)
-            has_images = bool(images and len(images) > 0)
+            images = (self.api_client.get_product_images_batch([product_id]) or {}).get(product_id)
+            has_images = bool(images)
             
             # Update "Has Images" column (column 4)
             has_images_item = QTableWidgetItem()
@@ -171,6 +171,9 @@ class InventoryPageMixin:
                     item["quantity"] = 0
                     item["stock"] = 0
                 
+                # Remember the variant so pushed stock changes can find its row
+                self.inventory_table.item(row, 0).setData(Qt.UserRole, item.get("variant_id"))
+                
                 try:
                     self.inventory_table.setItem(row, 4, QTableWidgetItem(item["category"]))
                 except KeyError as e:
@@ -244,6 +247,20 @@ class InventoryPageMixin:
             traceback.print_exc()
             QMessageBox.warning(self, "Error", f"Failed to load inventory: {str(e)}")
 
+    def apply_stock_levels_to_table(self, levels):
+        """Update the stock column for [variant_id, quantity, available] rows without reloading."""
+        stock_by_variant = {variant_id: quantity for variant_id, quantity, _ in levels}
+        for row in range(self.inventory_table.rowCount()):
+            name_item = self.inventory_table.item(row, 0)
+            if name_item is None:
+                continue
+            variant_id = name_item.data(Qt.UserRole)
+            if variant_id in stock_by_variant:
+                quantity = stock_by_variant[variant_id]
+                # Show whole quantities without a trailing .0
+                text = str(int(quantity)) if float(quantity).is_integer() else str(quantity)
+                self.inventory_table.setItem(row, 3, QTableWidgetItem(text))
+
     def filter_inventory(self):
         """Filter the inventory table based on search text."""
         search_text = self.search_input.text().lower()
@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, 
     QTableWidget, QTableWidgetItem, QDateEdit, QMessageBox, QDialog,
     QTextEdit, QHeaderView, QFileDialog, QFormLayout, QComboBox,
-    QDialogButtonBox, QApplication
+    QDialogButtonBox, QApplication, QInputDialog
 )
 from PyQt5.QtCore import Qt, QDate, QDateTime
 from PyQt5.QtGui import QColor, QTextDocument
@@ -14,9 +14,8 @@ from PyQt5.QtPrintSupport import QPrinter
 
 import os
 import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
+
+from ...utils.invoice_job import InvoiceJob
 
 
 class OrdersPageMixin:
@@ -102,6 +101,7 @@ class OrdersPageMixin:
         search_layout.addWidget(export_orders_button)
         
         generate_invoice_button = QPushButton("📋 Generate Invoice")
+        self.generate_invoice_button = generate_invoice_button
         generate_invoice_button.setStyleSheet("""
             QPushButton {
                 background-color: #007bff;
@@ -123,6 +123,28 @@ class OrdersPageMixin:
         generate_invoice_button.clicked.connect(self.generate_monthly_invoice)
         search_layout.addWidget(generate_invoice_button)
         
+        pick_list_button = QPushButton("📦 Pick List")
+        pick_list_button.setStyleSheet("""
+            QPushButton {
+                background-color: #6f42c1;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                padding: 8px 15px;
+                font-weight: bold;
+                font-size: 14px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #5a32a3;
+            }
+            QPushButton:pressed {
+                background-color: #4c2889;
+            }
+        """)
+        pick_list_button.clicked.connect(self.generate_pick_list)
+        search_layout.addWidget(pick_list_button)
+        
         layout.addLayout(search_layout)
         
         # Orders table
@@ -713,354 +735,97 @@ class OrdersPageMixin:
             month_idx = month_combo.currentIndex() + 1  # 1-12
             year = int(year_combo.currentText())
             
-            # Calculate date range for the selected month
-            start_date = QDate(year, month_idx, 1)
-            end_date = QDate(year, month_idx, 1).addMonths(1).addDays(-1)
-            
-            # Get orders for the date range
-            start_date_str = start_date.toString("yyyy-MM-dd")
-            end_date_str = end_date.toString("yyyy-MM-dd")
-            
-            # Show a progress dialog
-            progress = QMessageBox()
-            progress.setWindowTitle("Generating Invoice")
-            progress.setText("Fetching orders data...")
-            progress.setStandardButtons(QMessageBox.NoButton)
-            progress.show()
-            QApplication.processEvents()
-            
-            # Fetch orders using the new date range method
-            orders = self.api_client.get_orders_by_date_range(start_date_str, end_date_str)
-            
-            if not orders:
-                progress.close()
-                QMessageBox.warning(self, "No Orders", f"No orders found for {month_names[month_idx-1]} {year}")
-                return
-            
             # Create directory for invoices if it doesn't exist
             invoice_dir = "invoices"
             if not os.path.exists(invoice_dir):
                 os.makedirs(invoice_dir)
-                
-            # Create filename for the monthly invoice
             file_path = f"{invoice_dir}/Monthly-Invoice-{year}-{month_idx:02d}.pdf"
             
-            # Update progress
-            progress.setText("Generating invoice PDF...")
-            QApplication.processEvents()
-            
-            # Set up printer for PDF
-            printer = QPrinter()
-            printer.setPageSize(QPrinter.A4)
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(file_path)
-            printer.setPageMargins(15, 15, 15, 15, QPrinter.Unit.Millimeter)
-            
-            # Create document and set margin
-            document = QTextDocument()
-            document.setDocumentMargin(10)
-            
-            # Calculate totals
-            total_sales = sum(order.get("total", 0) for order in orders)
-            total_items = sum(len(order.get("items", [])) for order in orders)
-            
-            # Build HTML content for the invoice
-            html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <style>
-                    @page {{ 
-                        size: A4;
-                        margin: 0;
-                    }}
-                    body {{ 
-                        font-family: Arial, sans-serif;
-                        margin: 0;
-                        padding: 15mm;
-                    }}
-                    h1, h2 {{ 
-                        color: #34495e;
-                    }}
-                    .header {{ 
-                        text-align: center;
-                        margin-bottom: 20px;
-                        border-bottom: 1px solid #ccc;
-                        padding-bottom: 10px;
-                    }}
-                    .company-name {{
-                        font-size: 22pt;
-                        font-weight: bold;
-                        color: #2c3e50;
-                    }}
-                    .invoice-title {{
-                        font-size: 18pt;
-                        margin-top: 10px;
-                    }}
-                    .summary-box {{
-                        background-color: #f8f9fa;
-                        border: 1px solid #e9ecef;
-                        border-radius: 4px;
-                        padding: 15px;
-                        margin-bottom: 20px;
-                    }}
-                    table {{
-                        width: 100%;
-                        border-collapse: collapse;
-                        margin-bottom: 20px;
-                    }}
-                    table, th, td {{
-                        border: 1px solid #ddd;
-                    }}
-                    th {{
-                        background-color: #f8f9fa;
-                        color: #2c3e50;
-                        padding: 8px;
-                        text-align: left;
-                    }}
-                    td {{
-                        padding: 8px;
-                    }}
-                    .total-row {{
-                        font-weight: bold;
-                    }}
-                    .footer {{
-                        margin-top: 30px;
-                        font-size: 9pt;
-                        color: #7f8c8d;
-                        text-align: center;
-                        border-top: 1px solid #ccc;
-                        padding-top: 10px;
-                    }}
-                    .status-pending {{ color: #f39c12; }}
-                    .status-completed {{ color: #27ae60; }}
-                    .status-canceled {{ color: #e74c3c; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <div class="company-name">Shiakati Store</div>
-                    <div class="invoice-title">MONTHLY SALES REPORT</div>
-                    <div>{month_names[month_idx-1]} {year}</div>
-                </div>
-                
-                <div class="summary-box">
-                    <h2>Monthly Summary</h2>
-                    <p><strong>Period:</strong> {start_date.toString("MMMM d, yyyy")} - {end_date.toString("MMMM d, yyyy")}</p>
-                    <p><strong>Total Orders:</strong> {len(orders)}</p>
-                    <p><strong>Total Items Sold:</strong> {total_items}</p>
-                    <p><strong>Total Revenue:</strong> {total_sales:.2f} DZD</p>
-                </div>
-                
-                <h2>Orders</h2>
-                <table>
-                    <tr>
-                        <th>Order ID</th>
-                        <th>Date</th>
-                        <th>Customer</th>
-                        <th>Items</th>
-                        <th>Total</th>
-                        <th>Status</th>
-                    </tr>
-            """
-            
-            # Add orders to the report
-            for order in orders:
-                order_id = order.get("id", "")
-                
-                # Format the order date
-                order_date = order.get("order_time", "")[:19]  # Remove microseconds
-                try:
-                    date_obj = datetime.datetime.fromisoformat(order_date)
-                    formatted_date = date_obj.strftime("%Y-%m-%d %H:%M")
-                except:
-                    formatted_date = order_date
-                
-                customer_name = order.get("customer_name", "N/A")
-                item_count = len(order.get("items", []))
-                total = order.get("total", 0)
-                status = order.get("status", "pending")
-                
-                # Set status CSS class
-                status_class = ""
-                if status.lower() == "completed":
-                    status_class = "status-completed"
-                elif status.lower() == "canceled":
-                    status_class = "status-canceled"
-                elif status.lower() == "pending":
-                    status_class = "status-pending"
-                
-                html += f"""
-                    <tr>
-                        <td>{order_id}</td>
-                        <td>{formatted_date}</td>
-                        <td>{customer_name}</td>
-                        <td>{item_count}</td>
-                        <td>{total:.2f} DZD</td>
-                        <td class="{status_class}">{status.upper()}</td>
-                    </tr>
-                """
-            
-            # Complete the HTML
-            html += f"""
-                </table>
-                
-                <h2>Status Distribution</h2>
-                <table>
-                    <tr>
-                        <th>Status</th>
-                        <th>Count</th>
-                        <th>Percentage</th>
-                    </tr>
-            """
-            
-            # Calculate status distribution
-            status_counts = {}
-            for order in orders:
-                status = order.get("status", "pending").lower()
-                status_counts[status] = status_counts.get(status, 0) + 1
-            
-            # Add status summary
-            for status, count in status_counts.items():
-                percentage = (count / len(orders)) * 100 if orders else 0
-                
-                # Set status CSS class
-                status_class = ""
-                if status.lower() == "completed":
-                    status_class = "status-completed"
-                elif status.lower() == "canceled":
-                    status_class = "status-canceled"
-                elif status.lower() == "pending":
-                    status_class = "status-pending"
-                
-                html += f"""
-                    <tr>
-                        <td class="{status_class}">{status.upper()}</td>
-                        <td>{count}</td>
-                        <td>{percentage:.1f}%</td>
-                    </tr>
-                """
-            
-            # Complete the HTML
-            html += f"""
-                </table>
-                
-                <div class="footer">
-                    <p>Report generated on {datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}</p>
-                    <p>Shiakati Store - All rights reserved</p>
-                </div>
-            </body>
-            </html>
-            """
-            
-            # Close the progress dialog
-            progress.close()
-            
-            # Set HTML content and print to PDF
-            document.setHtml(html)
-            document.print(printer)
-            
-            # Show success message with option to open the invoice
-            reply = QMessageBox.information(
-                self,
-                "Monthly Report Generated",
-                f"Monthly sales report has been saved to {file_path}",
-                QMessageBox.Open | QMessageBox.Ok,
-                QMessageBox.Ok
-            )
-            
-            # If user clicked 'Open', open the PDF file
-            if reply == QMessageBox.Open:
-                import os
-                os.system(f"xdg-open {file_path}")
+            # The server renders the PDF; wait for it off the UI thread
+            self.generate_invoice_button.setEnabled(False)
+            self.generate_invoice_button.setText("⏳ Generating...")
+            self.invoice_job = InvoiceJob(self.api_client, year, month_idx, file_path, self)
+            self.invoice_job.finished_ok.connect(self.on_monthly_invoice_ready)
+            self.invoice_job.failed.connect(self.on_monthly_invoice_failed)
+            self.invoice_job.finished.connect(self.reset_invoice_button)
+            self.invoice_job.start()
                 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to generate monthly report: {str(e)}")
 
+    def reset_invoice_button(self):
+        self.generate_invoice_button.setEnabled(True)
+        self.generate_invoice_button.setText("📋 Generate Invoice")
+
+    def on_monthly_invoice_ready(self, file_path):
+        """Offer to open the invoice once it has been downloaded."""
+        reply = QMessageBox.information(
+            self,
+            "Monthly Report Generated",
+            f"Monthly sales report has been saved to {file_path}",
+            QMessageBox.Open | QMessageBox.Ok,
+            QMessageBox.Ok
+        )
+        if reply == QMessageBox.Open:
+            self.open_file_with_default_app(file_path)
+
+    def on_monthly_invoice_failed(self, message):
+        QMessageBox.warning(self, "Error", f"Failed to generate monthly report: {message}")
+
+    def generate_pick_list(self):
+        """Download a pick list PDF for all orders in a status within the selected dates."""
+        statuses = ["confirmed", "processing", "pending"]
+        order_status, ok = QInputDialog.getItem(
+            self, "Pick List", "Orders with status:", [s.capitalize() for s in statuses], 0, False
+        )
+        if not ok:
+            return
+        
+        start = self.start_date.date().toString("yyyy-MM-dd")
+        end = self.end_date.date().toString("yyyy-MM-dd")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Pick List", f"pick-list-{order_status.lower()}-{start}_{end}.pdf", "PDF Files (*.pdf)"
+        )
+        if not file_path:
+            return
+        if not file_path.endswith(".pdf"):
+            file_path += ".pdf"
+        
+        if self.api_client.download_pick_list(file_path, [order_status.lower()], start, end):
+            self.open_file_with_default_app(file_path)
+        else:
+            QMessageBox.warning(self, "Error", "Failed to generate the pick list")
+
     def export_orders_to_excel(self):
-        """Export orders data to Excel spreadsheet."""
-        if self.orders_table.rowCount() == 0:
-            QMessageBox.warning(self, "Warning", "No orders to export")
+        """Download the orders in the selected date range as an Excel file built by the server."""
+        start = self.start_date.date().toString("yyyy-MM-dd")
+        end = self.end_date.date().toString("yyyy-MM-dd")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Excel File", f"orders_{start}_{end}.xlsx", "Excel Files (*.xlsx);;All Files (*)"
+        )
+        if not file_path:
             return
+        if not file_path.endswith(".xlsx"):
+            file_path += ".xlsx"
 
+        QApplication.setOverrideCursor(Qt.WaitCursor)
         try:
-            # Create a new workbook and select the active worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Orders"
+            exported = self.api_client.download_excel_export("orders", file_path, start, end)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if not exported:
+            QMessageBox.warning(self, "Error", "Failed to export orders")
+            return
 
-            # Define styles
-            header_font = Font(bold=True, size=12, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            border = Border(
-                left=Side(border_style="thin"),
-                right=Side(border_style="thin"),
-                top=Side(border_style="thin"),
-                bottom=Side(border_style="thin")
-            )
-            
-            # Add headers
-            headers = []
-            for col in range(self.orders_table.columnCount()):
-                headers.append(self.orders_table.horizontalHeaderItem(col).text())
-            
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Add data from table
-            for row in range(self.orders_table.rowCount()):
-                for col in range(self.orders_table.columnCount()):
-                    item = self.orders_table.item(row, col)
-                    if item:
-                        cell = ws.cell(row=row+2, column=col+1, value=item.text())
-                        cell.border = border
-                        if col == 6:  # Total column (price)
-                            cell.alignment = Alignment(horizontal="right")
-            
-            # Auto-size columns
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            # Ask user for save location
-            file_path, _ = QFileDialog.getSaveFileName(
-                self, "Save Excel File", "", "Excel Files (*.xlsx);;All Files (*)"
-            )
-            
-            if file_path:
-                if not file_path.endswith(".xlsx"):
-                    file_path += ".xlsx"
-                wb.save(file_path)
-                QMessageBox.information(self, "Success", f"Orders exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                reply = QMessageBox.question(
-                    self, 
-                    "Open File", 
-                    "Would you like to open the exported file?",
-                    QMessageBox.Yes | QMessageBox.No, 
-                    QMessageBox.No
-                )
-                
-                if reply == QMessageBox.Yes:
-                    self.open_file_with_default_app(file_path)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to export orders: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        reply = QMessageBox.question(
+            self,
+            "Open File",
+            f"Orders exported to {file_path}\n\nWould you like to open the exported file?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.open_file_with_default_app(file_path)
 
     def open_file_with_default_app(self, file_path):
         """Open a file with the default application."""
@@ -189,7 +189,8 @@ class ProductImageDialog(QDialog):
             image_url = image_data.get('image_url', '')
             is_main = image_data.get('is_main', False)
             
-            pixmap = self.load_image_from_url(image_url)
+            # The server's thumbnail is a few KB; fall back to the original until it's generated
+            pixmap = self.load_image_from_url(image_data.get('thumbnail_url') or image_url)
             if pixmap:
                 image_label.setPixmap(pixmap)
             else:
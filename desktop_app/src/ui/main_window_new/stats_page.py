@@ -292,7 +292,8 @@ class StatsPageMixin:
         # Initial load of sales history
         self.load_sales_history()
         
-        # Set up periodic stats refresh
+        # Fallback periodic stats refresh; stopped while the server event
+        # stream is connected (see MainWindow.on_event_stream_connection)
         self.stats_timer = QTimer()
         self.stats_timer.timeout.connect(self.update_stats)
         self.stats_timer.start(30000)  # Refresh every 30 seconds
@@ -274,6 +274,163 @@ class APIClient:
             print(f"Error in clear_sales_history: {str(e)}")
             return False
 
+    def get_orders_page(self, cursor: str = None, limit: int = 50, status: List[str] = None,
+                        start_date: str = None, end_date: str = None, wilaya: str = None,
+                        phone: str = None, include_items: bool = False) -> Dict[str, Any]:
+        """Get one page of orders, newest first.
+        
+        Returns:
+            Dict with "orders" and "next_cursor"; pass next_cursor back as cursor
+            for the following page (None on the last page).
+        """
+        try:
+            if not self._ensure_authenticated():
+                print("Authentication failed, cannot get orders")
+                return {"orders": [], "next_cursor": None}
+            
+            params = {"limit": limit, "include_items": str(include_items).lower()}
+            if cursor:
+                params["cursor"] = cursor
+            if status:
+                params["status"] = status
+            if start_date:
+                params["start_date"] = start_date
+            if end_date:
+                params["end_date"] = end_date
+            if wilaya:
+                params["wilaya"] = wilaya
+            if phone:
+                params["phone"] = phone
+            
+            response = self.session.get(
+                f"{self.base_url}/orders/list", params=params, headers=self.get_headers(), timeout=30
+            )
+            if response.status_code != 200:
+                print(f"Error getting orders page: {response.status_code}")
+                return {"orders": [], "next_cursor": None}
+            return response.json()
+        except Exception as e:
+            print(f"Error in get_orders_page: {str(e)}")
+            return {"orders": [], "next_cursor": None}
+
+    def download_pick_list(self, file_path: str, status: List[str] = None,
+                           start_date: str = None, end_date: str = None) -> bool:
+        """Save the pick list PDF for orders in the given statuses (default: confirmed)."""
+        try:
+            if not self._ensure_authenticated():
+                print("Authentication failed, cannot download pick list")
+                return False
+            
+            params = {}
+            if status:
+                params["status"] = status
+            if start_date:
+                params["start_date"] = start_date
+            if end_date:
+                params["end_date"] = end_date
+            
+            response = self.session.get(
+                f"{self.base_url}/orders/pick-list.pdf", params=params, headers=self.get_headers(), timeout=60
+            )
+            if response.status_code != 200:
+                print(f"Error downloading pick list: {response.status_code} - {response.text}")
+                return False
+            with open(file_path, "wb") as f:
+                f.write(response.content)
+            return True
+        except Exception as e:
+            print(f"Error in download_pick_list: {str(e)}")
+            return False
+
+    def request_monthly_invoice(self, year: int, month: int) -> Dict[str, Any]:
+        """Ask the server to render a month's invoice PDF in the background.
+
+        Returns:
+            The job ({"id", "status", "download_url", ...}), or None on error
+        """
+        try:
+            if not self._ensure_authenticated():
+                print("Authentication failed, cannot request invoice")
+                return None
+            response = self.session.post(
+                f"{self.base_url}/invoices/monthly",
+                json={"year": year, "month": month},
+                headers=self.get_headers(),
+                timeout=30
+            )
+            if response.status_code not in (200, 202):
+                print(f"Error requesting invoice: {response.status_code} - {response.text}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"Error in request_monthly_invoice: {str(e)}")
+            return None
+
+    def get_invoice_job(self, job_id: str) -> Dict[str, Any]:
+        """Current state of an invoice job, or None on error."""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/invoices/jobs/{job_id}", headers=self.get_headers(), timeout=10
+            )
+            if response.status_code != 200:
+                print(f"Error getting invoice job: {response.status_code} - {response.text}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"Error in get_invoice_job: {str(e)}")
+            return None
+
+    def download_invoice(self, job_id: str, file_path: str) -> bool:
+        """Save a finished invoice job's PDF to file_path."""
+        try:
+            with self.session.get(
+                f"{self.base_url}/invoices/jobs/{job_id}/download",
+                headers=self.get_headers(), stream=True, timeout=60
+            ) as response:
+                if response.status_code != 200:
+                    print(f"Error downloading invoice: {response.status_code} - {response.text}")
+                    return False
+                with open(file_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+            return True
+        except Exception as e:
+            print(f"Error in download_invoice: {str(e)}")
+            return False
+
+    def download_excel_export(self, resource: str, file_path: str, start_date: str = None,
+                              end_date: str = None, **filters) -> bool:
+        """Save the server-built Excel export of "orders" or "expenses" to file_path.
+
+        Dates are YYYY-MM-DD (inclusive); other filters are passed through as
+        query parameters, e.g. status=["pending"] for orders.
+        """
+        try:
+            if not self._ensure_authenticated():
+                print(f"Authentication failed, cannot export {resource}")
+                return False
+
+            params = {key: value for key, value in filters.items() if value}
+            if start_date:
+                params["start_date"] = start_date
+            if end_date:
+                params["end_date"] = end_date
+
+            with self.session.get(
+                f"{self.base_url}/{resource}/export.xlsx", params=params,
+                headers=self.get_headers(), stream=True, timeout=300
+            ) as response:
+                if response.status_code != 200:
+                    print(f"Error exporting {resource}: {response.status_code} - {response.text}")
+                    return False
+                with open(file_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+            return True
+        except Exception as e:
+            print(f"Error in download_excel_export: {str(e)}")
+            return False
+
     def get_orders(self) -> List[Dict[str, Any]]:
         """Get all orders with their details."""
         try:
@@ -866,6 +1023,33 @@ class APIClient:
                 if k in self._cache_timeout:
                     del self._cache_timeout[k]
             print(f"Cleared {len(keys_to_delete)} cache entries with prefix '{prefix}'")
+
+    def apply_stock_levels(self, levels: List[List[float]]) -> bool:
+        """Update cached inventory with stock levels pushed by the server.
+
+        Args:
+            levels: [variant_id, quantity, available] rows from a variant.stock_changed event
+
+        Returns:
+            True if a variant was not in the cache (e.g. newly created), meaning
+            the inventory should be reloaded
+        """
+        inventory = self._cache.get("inventory_data")
+        if inventory is None:
+            return False
+        by_variant = {item.get("variant_id"): item for item in inventory if item.get("variant_id") is not None}
+        missing = False
+        for variant_id, quantity, available in levels:
+            item = by_variant.get(variant_id)
+            if item is None:
+                missing = True
+                continue
+            item["stock"] = quantity
+            item["quantity"] = quantity
+            item["available_quantity"] = available
+        if missing:
+            self.clear_cache("inventory_data")
+        return missing
     
     def get_inventory(self) -> List[Dict[str, Any]]:
         """Get all variants with their product information for inventory management.
@@ -1646,7 +1830,9 @@ class APIClient:
             product_id: The ID of the product
             
         Returns:
-            A list of image URLs or None if there was an error
+            A list of {"image_url", "is_main", "thumbnail_url", "sizes"} dicts
+            or None if there was an error. thumbnail_url is None until the
+            server has generated the resized copies.
         """
         if not self._ensure_authenticated():
             print("Authentication failed, cannot get product images")
@@ -1681,7 +1867,50 @@ class APIClient:
         except Exception as e:
             print(f"Error in get_product_images_by_id: {str(e)}")
             return None
-            
+
+    def get_product_images_batch(self, product_ids: List[int], batch_size: int = 500) -> Optional[Dict[int, List[Dict[str, Any]]]]:
+        """Get the images of many products in as few requests as possible.
+
+        Args:
+            product_ids: The IDs of the products
+            batch_size: Products per request (the server accepts up to 1000)
+
+        Returns:
+            {product_id: [image dicts as returned by get_product_images_by_id]},
+            with an empty list for products without images, or None if there
+            was an error.
+        """
+        if not self._ensure_authenticated():
+            print("Authentication failed, cannot get product images")
+            return None
+
+        result = {}
+        try:
+            product_ids = list(product_ids)
+            for start in range(0, len(product_ids), batch_size):
+                batch = product_ids[start:start + batch_size]
+                response = self.session.get(
+                    f"{self.base_url}/product-images/batch",
+                    params={"product_ids": ",".join(str(product_id) for product_id in batch)},
+                    headers=self.get_headers(),
+                    timeout=30
+                )
+
+                if response.status_code == 401 and self._handle_auth_error(response):
+                    # Try again after re-authentication
+                    return self.get_product_images_batch(product_ids, batch_size)
+                if response.status_code != 200:
+                    print(f"Failed to get product images. Status code: {response.status_code}")
+                    print(f"Response: {response.text}")
+                    return None
+                # JSON object keys are strings
+                result.update({int(product_id): images for product_id, images in response.json().items()})
+            return result
+
+        except Exception as e:
+            print(f"Error in get_product_images_batch: {str(e)}")
+            return None
+
     def upload_product_image(self, product_id: int, image_path: str, set_as_main: bool = False) -> Optional[Dict[str, Any]]:
         """Upload an image for a product.
         
@@ -1876,7 +2105,12 @@ class APIClient:
             return False
 
     def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new order."""
+        """Create a new order.
+
+        order_data carries either "customer_id" or inline
+        "customer": {"name", "phone_number"}; the server then creates the
+        customer, or reuses the one with that phone number, along with the order.
+        """
         try:
             print(f"Creating order: {order_data}")
             
@@ -1945,6 +2179,46 @@ class APIClient:
             print(f"Error in update_order: {str(e)}")
             return None
 
+    def replace_order_items(self, order_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Replace an order's items in one request.
+
+        Args:
+            order_id: The order to edit
+            items: The complete list of lines ({"id", "variant_id", "quantity", "price"});
+                omit "id" for new lines, leave out items that should be removed
+
+        Returns:
+            The updated order, or None on error
+        """
+        try:
+            if not self._ensure_authenticated():
+                print("Authentication failed, cannot update order items")
+                return None
+                
+            response = self.session.patch(
+                f"{self.base_url}/orders/{order_id}/items",
+                json={"items": items},
+                headers=self.get_headers(),
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 401:
+                if self._handle_auth_error(response):
+                    print("Re-authenticated successfully, retrying request...")
+                    return self.replace_order_items(order_id, items)
+                else:
+                    print("Re-authentication failed")
+                    return None
+            else:
+                print(f"Error updating order items: {response.status_code} - {response.text}")
+                return None
+                
+        except Exception as e:
+            print(f"Error in replace_order_items: {str(e)}")
+            return None
+
     def delete_order(self, order_id: str) -> bool:
         """Delete an order."""
         try:
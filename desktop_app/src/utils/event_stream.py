@@ -0,0 +1,97 @@
+"""
+Background reader for the server's /events/stream (server-sent events).
+
+Emits one Qt signal per event so the UI can update incrementally instead of
+polling on timers.
+"""
+
+import json
+import time
+import requests
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class EventStream(QThread):
+    """Reads server-sent events on a background thread and re-emits them as signals."""
+
+    # (event type, payload)
+    event_received = pyqtSignal(str, dict)
+    # True while the stream is connected
+    connection_changed = pyqtSignal(bool)
+
+    MAX_RECONNECT_DELAY = 30  # seconds
+    # The server sends a heartbeat every 15 seconds
+    READ_TIMEOUT = 45  # seconds
+
+    def __init__(self, api_client, parent=None):
+        super().__init__(parent)
+        self.api_client = api_client
+        self._running = True
+        self._response = None
+
+    def stop(self):
+        """Stop reading and wait for the thread to finish."""
+        self._running = False
+        response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+        self.wait(2000)
+
+    def run(self):
+        delay = 1
+        while self._running:
+            try:
+                self._response = requests.get(
+                    f"{self.api_client.base_url}/events/stream",
+                    headers={**self.api_client.get_headers(), "Accept": "text/event-stream"},
+                    stream=True,
+                    timeout=(5, self.READ_TIMEOUT)
+                )
+                self._response.raise_for_status()
+                self.connection_changed.emit(True)
+                delay = 1
+                self._read_events(self._response)
+            except Exception as e:
+                if self._running:
+                    print(f"Event stream disconnected: {str(e)}")
+            finally:
+                if self._response is not None:
+                    self._response.close()
+                    self._response = None
+                self.connection_changed.emit(False)
+
+            # Back off before reconnecting, checking for stop() every 100ms
+            deadline = time.time() + delay
+            while self._running and time.time() < deadline:
+                self.msleep(100)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    def _read_events(self, response):
+        event_type = "message"
+        data_lines = []
+        # chunk_size=1 so an event is handled as soon as it arrives instead of
+        # waiting for a full read buffer
+        for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+            if not self._running:
+                return
+            if line is None:
+                continue
+            if line == "":
+                # Blank line terminates an event
+                if data_lines:
+                    try:
+                        payload = json.loads("\n".join(data_lines))
+                        self.event_received.emit(payload.get("type", event_type), payload)
+                    except ValueError:
+                        print(f"Ignoring malformed event: {data_lines}")
+                event_type = "message"
+                data_lines = []
+            elif line.startswith(":"):
+                continue  # heartbeat / comment
+            elif line.startswith("event:"):
+                event_type = line[6:].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
@@ -0,0 +1,49 @@
+"""
+Background runner for server-side invoice jobs.
+
+Requests the invoice, polls the job and downloads the PDF on a QThread, so
+the UI stays responsive while the server renders it.
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class InvoiceJob(QThread):
+    """Requests a monthly invoice, waits for it and saves it to file_path."""
+
+    # Path of the saved PDF
+    finished_ok = pyqtSignal(str)
+    # Error message
+    failed = pyqtSignal(str)
+
+    POLL_INTERVAL = 1000  # milliseconds
+    TIMEOUT = 10 * 60  # seconds
+
+    def __init__(self, api_client, year, month, file_path, parent=None):
+        super().__init__(parent)
+        self.api_client = api_client
+        self.year = year
+        self.month = month
+        self.file_path = file_path
+
+    def run(self):
+        job = self.api_client.request_monthly_invoice(self.year, self.month)
+        if not job:
+            self.failed.emit("The server could not start the invoice")
+            return
+
+        waited = 0
+        while job["status"] == "pending":
+            if waited >= self.TIMEOUT * 1000:
+                self.failed.emit("Timed out waiting for the invoice")
+                return
+            self.msleep(self.POLL_INTERVAL)
+            waited += self.POLL_INTERVAL
+            job = self.api_client.get_invoice_job(job["id"]) or job
+
+        if job["status"] != "done":
+            self.failed.emit(job.get("error") or "Invoice generation failed")
+        elif self.api_client.download_invoice(job["id"], self.file_path):
+            self.finished_ok.emit(self.file_path)
+        else:
+            self.failed.emit("Could not download the invoice")
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Tests for the phone number filter of the order list and export
+"""
+from sqlalchemy.dialects import postgresql
+
+from app.api.orders import _phone_match
+
+
+def _sql(phone):
+    clause = _phone_match(phone)
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_fragments_are_normalized_like_stored_numbers():
+    assert "'%%' || '055512' || '%%'" in _sql("0555-12")
+    assert "'%%' || '5551234' || '%%'" in _sql(" 555 12 34 ")
+
+
+def test_country_code_fragment_matches_the_start_of_the_number():
+    assert _sql("+213 555 12") == "customers.phone_number LIKE '055512' || '%%'"
+    assert _sql("002135") == "customers.phone_number LIKE '05' || '%%'"
+
+
+def test_country_code_alone_is_not_rewritten_to_zero():
+    assert _sql("+213") == "customers.phone_number LIKE '%%' || '213' || '%%'"
+    assert _sql("00213") == "customers.phone_number LIKE '%%' || '00213' || '%%'"
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized reorder-point engine
+"""
+import math
+
+import numpy as np
+
+from app.core.replenishment import compute_reorder, daily_matrix, service_level_z
+
+
+def test_daily_matrix_fills_missing_days_with_zero_and_sums_duplicates():
+    matrix = daily_matrix(
+        np.array([0, 0, 1, 1]), np.array([0, 2, 1, 1]), np.array([1.0, 2.0, 3.0, 4.0]),
+        n_variants=3, n_days=3
+    )
+    assert matrix.tolist() == [[1.0, 0.0, 2.0], [0.0, 7.0, 0.0], [0.0, 0.0, 0.0]]
+
+
+def test_steady_seller_below_reorder_point_gets_order_up_to_quantity():
+    sales = np.full((1, 30), 2.0)  # 2 per day, no variability
+    result = compute_reorder(sales, np.array([10.0]), lead_time_days=7, review_days=7, service_level=0.95)
+
+    assert result["velocity"][0] == 2.0
+    assert result["std"][0] == 0.0
+    assert result["days_of_cover"][0] == 5.0
+    assert result["reorder_point"][0] == 14.0
+    assert result["needs_reorder"][0]
+    assert result["suggested_quantity"][0] == 18.0  # 2 * (7 + 7) - 10
+
+
+def test_variability_raises_safety_stock():
+    sales = np.array([[2.0] * 30, [0.0, 4.0] * 15])
+    result = compute_reorder(sales, np.array([100.0, 100.0]), lead_time_days=4)
+
+    assert result["velocity"].tolist() == [2.0, 2.0]
+    assert result["safety_stock"][0] == 0.0
+    expected = service_level_z(0.95) * np.std([0.0, 4.0] * 15, ddof=1) * 2
+    assert math.isclose(result["safety_stock"][1], expected)
+    assert not result["needs_reorder"].any()
+
+
+def test_unsold_variants_have_infinite_cover_and_no_suggestion():
+    result = compute_reorder(np.zeros((2, 10)), np.array([0.0, 5.0]))
+
+    assert np.isinf(result["days_of_cover"]).all()
+    assert not result["needs_reorder"].any()
+    assert result["suggested_quantity"].tolist() == [0.0, 0.0]
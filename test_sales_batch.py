@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk sales ingest endpoint
+"""
+from sqlalchemy.dialects import postgresql
+
+from app.api.sales import create_sales_batch
+from app.schemas.sale import SaleBatchCreate
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class RecordingSession:
+    """Records the SQL of every statement, compiled for PostgreSQL.
+
+    INSERT ... RETURNING into sales gets sequential ids; nothing else returns rows.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.committed = False
+        self.next_sale_id = 1
+
+    def execute(self, statement, params=None):
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.statements.append((sql, params))
+        if sql.startswith("INSERT INTO sales ") and "RETURNING" in sql:
+            ids = list(range(self.next_sale_id, self.next_sale_id + len(params)))
+            self.next_sale_id += len(params)
+            return _Result(ids)
+        return _Result([])
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def test_batch_of_sales_without_items_skips_item_insert_and_stock_update():
+    db = RecordingSession()
+    batch = SaleBatchCreate(sales=[
+        {"items": [], "total": 0},
+        {"items": [], "total": 0, "payment_method": "card"},
+    ])
+
+    result = create_sales_batch(batch, db)
+
+    assert db.committed
+    assert result.accepted == 2 and result.rejected == 0
+    assert [(outcome.success, outcome.sale_id) for outcome in result.results] == [(True, 1), (True, 2)]
+    executed = [sql for sql, _ in db.statements]
+    assert not any(sql.startswith("INSERT INTO sale_items") for sql in executed)
+    assert not any(sql.startswith("UPDATE variants") for sql in executed)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-flight stats result cache
+"""
+import threading
+import time
+
+from app.core.cache import SingleFlightCache
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = SingleFlightCache("test", default_ttl=60)
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {"total": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("summary", compute)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * 8
+    metrics = cache.metrics()
+    assert metrics["recomputes"] == 1
+    assert metrics["misses"] + metrics["waits"] == 8
+
+
+def test_entries_expire_and_are_reused_before_ttl():
+    cache = SingleFlightCache("test", default_ttl=60)
+    counter = iter(range(100))
+
+    assert cache.get_or_compute("k", lambda: next(counter)) == 0
+    assert cache.get_or_compute("k", lambda: next(counter)) == 0
+    assert cache.metrics()["hits"] == 1
+
+    assert cache.get_or_compute("short", lambda: next(counter), ttl=0) == 1
+    assert cache.get_or_compute("short", lambda: next(counter), ttl=0) == 2
+
+
+def test_invalidate_discards_entries_and_in_flight_results():
+    cache = SingleFlightCache("test", default_ttl=60)
+    cache.get_or_compute("k", lambda: "old")
+    cache.invalidate()
+    assert cache.get_or_compute("k", lambda: "new") == "new"
+
+    def compute_while_invalidated():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_compute("other", compute_while_invalidated) == "stale"
+    assert cache.get_or_compute("other", lambda: "fresh") == "fresh"
+
+
+def test_errors_propagate_and_are_not_cached():
+    cache = SingleFlightCache("test", default_ttl=60)
+
+    def fail():
+        raise RuntimeError("db down")
+
+    try:
+        cache.get_or_compute("k", fail)
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+    assert cache.metrics()["errors"] == 1
+
+
+def test_callers_after_invalidate_do_not_join_an_older_computation():
+    cache = SingleFlightCache("test", default_ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_compute():
+        started.set()
+        release.wait(2)
+        return "before write"
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(cache.get_or_compute("summary", slow_compute)))
+    thread.start()
+    started.wait(2)
+    cache.invalidate()
+
+    assert cache.get_or_compute("summary", lambda: "after write") == "after write"
+    release.set()
+    thread.join(2)
+
+    assert results == ["before write"]
+    assert cache.get_or_compute("summary", lambda: "recomputed") == "after write"
+    assert cache.metrics()["in_flight"] == 0